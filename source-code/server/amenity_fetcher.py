@@ -0,0 +1,108 @@
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from http_client import HTTP_CONNECT_TIMEOUT, get_http_client
+
+OVERPASS_URL = "http://overpass-api.de/api/interpreter"
+
+# Layer name -> (OSM key, value) filter; all layers are fetched in a single query
+AMENITY_LAYERS = {
+    "school": ("amenity", "school"),
+    "hospital": ("amenity", "hospital"),
+    "supermarket": ("shop", "supermarket"),
+}
+
+# The only tags the analysis reads; everything else in the response is dropped
+KEPT_TAGS = ["name", "isced:level"]
+
+# Overpass area ids are the OSM id offset by element type
+AREA_ID_OFFSETS = {"relation": 3600000000, "way": 2400000000}
+
+
+class AmenityFetcher:
+    """Fetch every amenity layer for a city with one centroid-only Overpass query.
+
+    Replaces one `features_from_place` call per tag filter (each of which
+    geocodes the place again and downloads full polygon geometries) with a
+    single `out center` query, split into layers locally."""
+
+    def __init__(self, url=OVERPASS_URL, timeout=90, layers=AMENITY_LAYERS):
+        self.url = url
+        self.timeout = timeout
+        self.layers = layers
+
+    def build_query(self, boundary_gdf):
+        """Overpass QL for the union of all layer filters inside the city boundary"""
+        area_id = _area_id(boundary_gdf)
+        if area_id is not None:
+            scope = "(area.searchArea)"
+            header = f"area({area_id})->.searchArea;\n"
+        else:
+            minx, miny, maxx, maxy = boundary_gdf.total_bounds
+            scope = f"({miny},{minx},{maxy},{maxx})"
+            header = ""
+
+        filters = "\n".join(
+            f'  nwr["{key}"="{value}"]{scope};' for key, value in self.layers.values()
+        )
+        return f"[out:json][timeout:{self.timeout}];\n{header}(\n{filters}\n);\nout tags center qt;"
+
+    def fetch(self, boundary_gdf):
+        """Return {layer name: GeoDataFrame of centroid points} for the city"""
+        query = self.build_query(boundary_gdf)
+        print(f"🛰️ Fetching {len(self.layers)} amenity layers in one Overpass query")
+        response = get_http_client().post(
+            "overpass", self.url, data={"data": query}, timeout=(HTTP_CONNECT_TIMEOUT, self.timeout + 10)
+        )
+        response.raise_for_status()
+        elements = response.json().get("elements", [])
+        print(f"✅ Overpass returned {len(elements)} amenity elements")
+
+        layers = self.split_layers(elements)
+        # A bounding-box query can reach outside the city, so clip to the boundary
+        if _area_id(boundary_gdf) is None:
+            boundary = boundary_gdf.union_all()
+            layers = {
+                name: gdf[shapely.contains_xy(boundary, gdf.geometry.x, gdf.geometry.y)]
+                for name, gdf in layers.items()
+            }
+        return layers
+
+    def split_layers(self, elements):
+        """Group Overpass elements into one point GeoDataFrame per layer"""
+        rows = {name: [] for name in self.layers}
+        for elem in elements:
+            tags = elem.get("tags", {})
+            if "lat" in elem and "lon" in elem:
+                lat, lon = elem["lat"], elem["lon"]
+            elif "center" in elem:
+                lat, lon = elem["center"]["lat"], elem["center"]["lon"]
+            else:
+                continue
+
+            for name, (key, value) in self.layers.items():
+                if tags.get(key) == value:
+                    rows[name].append((elem["type"], elem["id"], lon, lat,
+                                       *(tags.get(tag) for tag in KEPT_TAGS)))
+
+        return {name: _to_gdf(layer_rows) for name, layer_rows in rows.items()}
+
+
+def _area_id(boundary_gdf):
+    if boundary_gdf is None or boundary_gdf.empty:
+        return None
+    row = boundary_gdf.iloc[0]
+    offset = AREA_ID_OFFSETS.get(row.get("osm_type"))
+    if offset is None or pd.isna(row.get("osm_id")):
+        return None
+    return offset + int(row["osm_id"])
+
+
+def _to_gdf(rows):
+    columns = ["element", "id", "lon", "lat", *KEPT_TAGS]
+    df = pd.DataFrame(rows, columns=columns).drop_duplicates(subset=["element", "id"])
+    # Index features by (element, id) like osmnx does
+    df = df.set_index(["element", "id"])
+    geometry = gpd.points_from_xy(df["lon"].to_numpy(dtype=float), df["lat"].to_numpy(dtype=float))
+    return gpd.GeoDataFrame(df[KEPT_TAGS], geometry=geometry, crs="EPSG:4326")
@@ -0,0 +1,113 @@
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+from projection import BRITISH_NATIONAL_GRID, WGS84, get_transformer, project_coords
+
+
+class AmenityIndex:
+    """Nearest-neighbour index over one layer of amenities (schools, hospitals, ...).
+
+    Geometries are projected once into British National Grid when the index is
+    built and stored in an STRtree, so each lookup is a logarithmic tree query
+    in true metres instead of a scan that re-projects every amenity."""
+
+    def __init__(self, gdf, crs=BRITISH_NATIONAL_GRID):
+        self.gdf = gdf
+        self.crs = crs
+        self.transformer = get_transformer(WGS84, crs)
+        self.tree = None
+        self.positions = np.empty(0, dtype=np.int64)
+        self.geometries = np.empty(0, dtype=object)
+        # Projected centroids and their WGS84 equivalents, indexed by row position
+        self.x = self.y = self.lons = self.lats = np.empty(0)
+        self.build()
+
+    def build(self):
+        """Project the layer's geometries and build the STRtree"""
+        if self.gdf is None or self.gdf.empty or "geometry" not in self.gdf:
+            return
+
+        geoms = np.asarray(self.gdf.geometry.values, dtype=object)
+        valid = ~shapely.is_missing(geoms) & ~shapely.is_empty(geoms)
+        if not valid.any():
+            return
+
+        # Keep track of each projected geometry's row in the original frame
+        self.positions = np.flatnonzero(valid)
+        self.geometries = shapely.transform(
+            geoms[valid], lambda coords: project_coords(coords, WGS84, self.crs)
+        )
+        self.tree = STRtree(self.geometries)
+
+        centroids = shapely.centroid(self.geometries)
+        self.x = np.full(len(geoms), np.nan)
+        self.y = np.full(len(geoms), np.nan)
+        self.x[self.positions] = shapely.get_x(centroids)
+        self.y[self.positions] = shapely.get_y(centroids)
+        self.lons, self.lats = get_transformer(self.crs, WGS84).transform(self.x, self.y)
+
+    @property
+    def empty(self):
+        return self.tree is None
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def nearest(self, pt):
+        """Find the nearest amenity and its distance (in metres) from a WGS84 point."""
+        if self.empty:
+            return None, None
+
+        pt_proj = shapely.points(*self.transformer.transform(pt.x, pt.y))
+        indices, distances = self.tree.query_nearest(pt_proj, return_distance=True)
+        if len(indices) == 0:
+            return None, None
+
+        return float(distances[0]), self.gdf.iloc[self.positions[indices[0]]]
+
+    def nearest_many(self, lons, lats):
+        """Nearest amenity for many WGS84 points in one vectorised tree query.
+
+        Returns an array of distances (metres, NaN where the layer is empty) and
+        an array of row positions into the layer's GeoDataFrame (-1 if none)."""
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        distances = np.full(len(lons), np.nan)
+        positions = np.full(len(lons), -1, dtype=np.int64)
+        if self.empty or len(lons) == 0:
+            return distances, positions
+
+        x, y = self.transformer.transform(lons, lats)
+        (point_idx, tree_idx), dist = self.tree.query_nearest(
+            shapely.points(x, y), return_distance=True, all_matches=False
+        )
+        distances[point_idx] = dist
+        positions[point_idx] = self.positions[tree_idx]
+        return distances, positions
+
+    def row(self, position):
+        """Return the layer row at a position produced by nearest_many"""
+        return self.gdf.iloc[position]
+
+    def centroid(self, position):
+        """WGS84 (lat, lon) of a row's centroid, computed once in the projected CRS"""
+        return float(self.lats[position]), float(self.lons[position])
+
+
+def batch_nearest(lons, lats, indexes):
+    """Score every candidate point against every amenity layer in one pass.
+
+    Returns (distances, positions) matrices of shape (n_points, n_layers), with
+    columns in the order of `indexes`."""
+    n = len(lons)
+    distances = np.full((n, len(indexes)), np.nan)
+    positions = np.full((n, len(indexes)), -1, dtype=np.int64)
+    for col, index in enumerate(indexes):
+        distances[:, col], positions[:, col] = index.nearest_many(lons, lats)
+    return distances, positions
+
+
+def distance_decay_scores(distances, reference_km):
+    """Linear 0-1 proximity score that reaches zero at reference_km (NaN stays NaN)"""
+    return np.maximum(0, 1 - (np.asarray(distances) / 1000) / reference_km)
@@ -0,0 +1,66 @@
+import threading
+
+from amenity_index import AmenityIndex
+from school_catalogue import SchoolCatalogue
+
+
+class AmenityStore:
+    """Projected amenity layers for a single city.
+
+    Each fetched layer is projected into British National Grid once and kept
+    as an AmenityIndex; refetching an unchanged layer reuses the existing
+    projection instead of building it again."""
+
+    def __init__(self, city):
+        self.city = city
+        self.layers = {}
+        self.school_catalogue = None
+        self._lock = threading.Lock()
+
+    def load_layer(self, name, gdf):
+        """Index a freshly fetched layer, reusing the current index if nothing changed"""
+        with self._lock:
+            current = self.layers.get(name)
+            if current is not None and _same_features(current.gdf, gdf):
+                return current
+
+            index = AmenityIndex(gdf)
+            self.layers[name] = index
+            print(f"🗂️ Indexed {len(index)} {name} features for {self.city}")
+            return index
+
+    def load_schools(self, schools_gdf, top_primary_dict, top_secondary_dict):
+        """Classify and index the city's schools, reusing the catalogue if nothing changed"""
+        with self._lock:
+            current = self.school_catalogue
+            if current is not None and _same_features(current.source, schools_gdf):
+                return current
+
+            catalogue = SchoolCatalogue(self.city, schools_gdf, top_primary_dict, top_secondary_dict)
+            self.school_catalogue = catalogue
+            return catalogue
+
+
+def _same_features(old_gdf, new_gdf):
+    if old_gdf is None or new_gdf is None:
+        return False
+    if len(old_gdf) != len(new_gdf):
+        return False
+    try:
+        return old_gdf.index.equals(new_gdf.index) and old_gdf.geometry.equals(new_gdf.geometry)
+    except Exception:
+        return False
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_amenity_store(city):
+    """Return the shared AmenityStore for a city, creating it on first use"""
+    with _stores_lock:
+        store = _stores.get(city)
+        if store is None:
+            store = AmenityStore(city)
+            _stores[city] = store
+        return store
@@ -1,24 +1,29 @@
 from flask import Flask, request, jsonify
 import osmnx as ox
-import geopandas as gpd
-import random
-from shapely.geometry import Point
-from shapely.ops import transform
-import pyproj
-from functools import lru_cache
-import math
-import requests
+import shapely
 import os
-import time
-import pandas as pd
 import json
 from gtfs_service import GTFSService
 from flask_cors import CORS
 import numpy as np
-from shapely.geometry import Point, Polygon, box
-import logging
-from datetime import datetime, timedelta
-from otp import run_otp_query
+from amenity_index import batch_nearest, distance_decay_scores
+from amenity_store import get_amenity_store
+from snapshot_store import SnapshotStore, SnapshotUnavailable
+from amenity_fetcher import AMENITY_LAYERS, AmenityFetcher
+from boundary_cache import BoundaryCache
+from score_grid import ScoreGridBuilder, nearest_area_codes
+from candidate_search import SEARCH_MODES, adaptive_search
+from parallel_scoring import CandidateScorer
+from travel_bounds import (
+    MODE_PROFILES, fastest_mode_times, shortlist_by_upper_bound, travel_score, travel_score_upper_bounds, trip_penalty
+)
+from travel_time_executor import TravelTimeExecutor, profile_service
+from ors_matrix import OrsMatrixClient
+from service_health import HealthMonitor, ors_probe, otp_probe
+from otp_batch import OtpBatchPlanner
+from http_client import HTTP_CONNECT_TIMEOUT, get_http_client
+from postcode_service import get_postcode_service, normalize_postcode
+from travel_time_store import TravelTimeStore
 
 # Load top-rated schools data
 TOP_SECONDARY_SCHOOLS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'top_schools.json')
@@ -58,86 +63,117 @@ print("Server: Starting up Flask application...")
 ox.settings.use_cache = False
 ox.settings.log_console = True
 
+# Pooled keep-alive HTTP sessions for ORS, OTP, postcodes.io and Overpass
+http_client = get_http_client()
+
+# Cached postcodes.io lookups (POSTCODE_CACHE_PATH, POSTCODE_CACHE_TTL_DAYS, POSTCODE_NEGATIVE_TTL_HOURS)
+postcode_service = get_postcode_service()
+
+# Routing results shared across workers and restarts (TRAVEL_TIME_DB, TRAVEL_TIME_SNAP_METRES, ...)
+travel_time_store = TravelTimeStore()
+
 # Initialize GTFS service
 gtfs_service = GTFSService()
 
+# Transit scoring for candidate batches, over a process pool when SCORING_WORKERS > 1.
+# The pool starts here, before any request or background thread exists.
+candidate_scorer = CandidateScorer(gtfs_service, GTFSService)
+candidate_scorer.start()
+
+# Local snapshots of OSMnx/Overpass fetches (configured via SNAPSHOT_DIR, SNAPSHOT_TTL_HOURS, OFFLINE_MODE)
+snapshot_store = SnapshotStore()
+print(f"Snapshot store: {snapshot_store.status()}")
+
+# Single combined Overpass query per city for all amenity layers
+amenity_fetcher = AmenityFetcher()
+
+# Prepared, simplified city boundaries used for candidate sampling
+boundary_cache = BoundaryCache()
+
+# Background-built grids of the static (user-independent) score components
+score_grid_builder = ScoreGridBuilder()
+
+# Distance (km) at which each amenity's proximity score decays to zero
+AMENITY_REFERENCE_KM = {
+    "school": 2,
+    "hospital": 3,
+    "supermarket": 1
+}
+
+# Candidates returned per analysis, and the static-score pool used when scoring is cheap.
+# The pool is CANDIDATE_POOL_FACTOR x TOP_LOCATIONS (8 x 5 = 40), so the adaptive search still
+# picks from about six evaluations per pooled candidate (ADAPTIVE_SEARCH_BUDGET = 240).
+TOP_LOCATIONS = 5
+CANDIDATE_POOL_FACTOR = int(os.environ.get("CANDIDATE_POOL_FACTOR", "8"))
+CANDIDATE_POOL_SIZE = TOP_LOCATIONS * CANDIDATE_POOL_FACTOR
+# Shortlisted candidates whose travel times are fetched concurrently in one go
+ROUTING_BATCH_SIZE = int(os.environ.get("ROUTING_BATCH_SIZE", "10"))
+
+# openrouteservice base URL (directions and matrix endpoints)
+ORS_API_URL = "http://192.168.1.162:8080/ors"
+
 # OpenTripPlanner API URL
 OTP_API_URL = "http://192.168.1.161:8080/otp/routers/default/index/graphql"
 
-@lru_cache(maxsize=128)
-def otp_fastest_minutes(origin, destination, dt_iso="2025-05-01T08:00:00+01:00"):
-    """Return best door-to-door duration (min) using TRANSIT+WALK or None."""
-    lat1, lon1 = origin
-    lat2, lon2 = destination
-    
-    # Use a much simpler query structure that works with most OTP versions
-    gql = {
-        "query": f"""
-        {{
-          plan(
-            fromPlace: "{lat1},{lon1}"
-            toPlace: "{lat2},{lon2}"
-            date: "{dt_iso[:10]}"
-            time: "{dt_iso[11:19]}"
-          ) {{
-            itineraries {{
-              duration
-              legs {{
-                mode
-                duration
-              }}
-            }}
-          }}
-        }}
-        """
-    }
-    
-    try:
-        print(f"Calling OTP for route from {lat1},{lon1} to {lat2},{lon2}")
-        r = requests.post(OTP_API_URL, json=gql, timeout=15).json()
-        
-        # Print the raw response for debugging
-        print(f"OTP response: {r}")
-        
-        # Bail out cleanly if GraphQL reports errors
-        if "errors" in r:
-            error_msg = r["errors"][0]["message"] if r["errors"] and len(r["errors"]) > 0 and "message" in r["errors"][0] else "Unknown GraphQL error"
-            print(f"OTP GraphQL error: {error_msg}")
-            return None
+# Departure time used for transit plans
+OTP_DEPARTURE = "2025-05-01T08:00:00+01:00"
 
-        # Check if we got valid data
-        if "data" not in r:
-            print("OTP response missing data property")
-            return None
+# Bus routing: 'otp', 'raptor' (in-process router over the GTFS timetable) or
+# 'auto' (OTP while it's healthy, the local router when it's down)
+BUS_ROUTING_ENGINE = os.environ.get("BUS_ROUTING_ENGINE", "auto")
 
-        plan = r.get("data", {}).get("plan")
-        if not plan:
-            print("OTP response missing plan property")
-            return None
-            
-        if not plan.get("itineraries") or len(plan["itineraries"]) == 0:
-            print("OTP found no transit itinerary")
-            return None
+# Transit plans for many pairs per GraphQL request (OTP_BATCH_SIZE)
+otp_planner = OtpBatchPlanner(OTP_API_URL)
 
-        if not plan["itineraries"][0].get("duration"):
-            print("OTP itinerary missing duration")
-            return None
+# Background ORS/OTP probes; a failed probe opens the service's circuit breaker
+health_monitor = HealthMonitor({"ors": ors_probe(ORS_API_URL), "otp": otp_probe(OTP_API_URL)})
+health_monitor.start()
 
-        sec = plan["itineraries"][0]["duration"]
-        transit_min = sec / 60
-        print(f"OTP found transit route: {transit_min:.2f} minutes")
-        return transit_min
-        
-    except requests.exceptions.Timeout:
-        print("OTP request timed out after 15 seconds")
-        return None
-    except requests.exceptions.ConnectionError:
-        print("OTP connection error - server may be down")
-        return None
-    except Exception as e:
-        print(f"OTP parsing error: {str(e)}")
+def otp_fastest_minutes(origin, destination, dt_iso=OTP_DEPARTURE, use_store=True):
+    """Return best door-to-door duration (min) using TRANSIT+WALK or None."""
+    if use_store:
+        stored = travel_time_store.get(origin, destination, "bus-transit", dt_iso)
+        if stored is not None:
+            return stored
+
+    print(f"Calling OTP for route from {origin[0]},{origin[1]} to {destination[0]},{destination[1]}")
+    transit_min = otp_planner.plan_many([(origin, destination)], dt_iso)[0]
+    if transit_min is None:
+        print("OTP found no transit itinerary")
         return None
 
+    print(f"OTP found transit route: {transit_min:.2f} minutes")
+    if use_store:
+        travel_time_store.put(origin, destination, "bus-transit", transit_min, dt_iso)
+    return transit_min
+
+def local_transit_active():
+    """Whether bus times come from the local RAPTOR router instead of OTP"""
+    return BUS_ROUTING_ENGINE == "raptor" or (BUS_ROUTING_ENGINE == "auto" and not health_monitor.is_available("otp"))
+
+def transit_minutes(origin, destination, use_store=True):
+    """Bus door-to-door minutes from the configured engine, or None"""
+    if local_transit_active():
+        return gtfs_service.transit_minutes(origin, destination, OTP_DEPARTURE)
+    return otp_fastest_minutes(origin, destination, use_store=use_store)
+
+def transit_durations(origins, destinations):
+    """{(origin, destination): minutes} for origins[i] -> destinations[i] from the configured engine"""
+    if local_transit_active():
+        return {(origin, destination): gtfs_service.transit_minutes(origin, destination, OTP_DEPARTURE)
+                for origin, destination in dict.fromkeys(zip(origins, destinations))}
+    return otp_planner.durations(origins, destinations, OTP_DEPARTURE)
+
+def store_routing_results(service):
+    """Local RAPTOR estimates aren't stored, so they can't shadow OTP answers once OTP is back"""
+    return not (service == "otp" and local_transit_active())
+
+def routing_available(service):
+    """Whether a routing service can answer now; bus routing can fall back to the local router"""
+    if service == "otp" and BUS_ROUTING_ENGINE != "otp":
+        return True
+    return health_monitor.is_available(service)
+
 @app.after_request
 def after_request(response):
     # Allow all origins
@@ -157,109 +193,9 @@ def after_request(response):
     
     return response
 
-def get_nearest_amenity(pt, gdf):
-    """Find the nearest amenity and its distance from a point."""
-    if gdf.empty:
-        return None, None
-        
-    transformer = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
-    pt_proj = transform(transformer.transform, pt)
-    min_distance = None
-    nearest_row = None
-    
-    for idx, row in gdf.iterrows():
-        geom = row.geometry
-        amenity_proj = transform(transformer.transform, geom)
-        d = pt_proj.distance(amenity_proj)
-        if min_distance is None or d < min_distance:
-            min_distance = d
-            nearest_row = row
-    return min_distance, nearest_row
-
-def get_nearest_school_by_type(pt, schools_gdf, school_type, top_schools_dict):
-    """Find the nearest school of a specific type (primary or secondary)."""
-    if schools_gdf.empty:
-        return None, None
-        
-    transformer = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
-    pt_proj = transform(transformer.transform, pt)
-    
-    # Create a list to store schools and their distances
-    school_distances = []
-    
-    for idx, row in schools_gdf.iterrows():
-        geom = row.geometry
-        school_name = row.get("name", "")
-        
-        # Skip schools without names
-        if not school_name:
-            continue
-            
-        # Determine if this is the right type of school
-        detected_type = get_school_type(school_name, top_primary_schools_dict, top_secondary_schools_dict)
-        is_right_type = (detected_type == school_type)
-        
-        # If it's the right type, calculate distance
-        if is_right_type:
-            amenity_proj = transform(transformer.transform, geom)
-            d = pt_proj.distance(amenity_proj)
-            school_distances.append((d, row))
-    
-    # Sort by distance and return the closest one
-    if school_distances:
-        school_distances.sort(key=lambda x: x[0])
-        return school_distances[0]
-    
-    return None, None
-
-def generate_random_points(polygon, num_points):
-    """Generate random points within a polygon"""
-    points = []
-    minx, miny, maxx, maxy = polygon.bounds
-    attempts = 0
-    max_attempts = num_points * 20
-
-    while len(points) < num_points and attempts < max_attempts:
-        random_point = Point(
-            random.uniform(minx, maxx),
-            random.uniform(miny, maxy)
-        )
-        if polygon.contains(random_point):
-            points.append(random_point)
-        attempts += 1
-
-    print(f"✅ Generated {len(points)} points after {attempts} attempts")
-    return points
-
-def haversine(coord1, coord2):
-    """Calculate distance between two coordinates."""
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-    R = 6371000  # Earth radius in meters
-
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-
-    a = math.sin(dphi/2)**2 + \
-        math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-    return 2*R*math.asin(math.sqrt(a))
-
-def find_nearest_area(lat, lon, areas):
-    """Find the nearest area name for a location."""
-    if not areas:
-        return "Unknown Area"
-        
-    min_dist = None
-    nearest_area = None
-    
-    for area in areas:
-        d = haversine((lat, lon), (area["lat"], area["lon"]))
-        if min_dist is None or d < min_dist:
-            min_dist = d
-            nearest_area = area
-    
-    return nearest_area["name"] if nearest_area else "Unknown Area"
+def find_nearest_areas(lats, lons, areas):
+    """Nearest area name for each location."""
+    return [areas[code]["name"] if code >= 0 else "Unknown Area" for code in nearest_area_codes(lats, lons, areas)]
 
 def get_area_names(bbox):
     """Get area names within a bounding box."""
@@ -278,7 +214,7 @@ def get_area_names(bbox):
     
     try:
         print(f"Fetching areas within bounding box: {bbox}")
-        response = requests.get(overpass_url, params={'data': area_query}, timeout=30)
+        response = http_client.get("overpass", overpass_url, params={'data': area_query}, timeout=(HTTP_CONNECT_TIMEOUT, 30))
         print(f"Area response status: {response.status_code}")
         
         if response.status_code != 200:
@@ -310,42 +246,212 @@ def get_area_names(bbox):
         print(f"⚠️ Error retrieving area names: {e}")
         return []
 
-def get_school_type(school_name, top_primary_dict, top_secondary_dict):
-    """Safely determine a school's type (primary or secondary) based on name and top schools lists."""
+def fetch_boundary(city):
+    """City boundary GeoDataFrame, served from the snapshot store when available."""
+    return snapshot_store.fetch("boundary", city, None, lambda: ox.geocode_to_gdf(city))
+
+def fetch_amenity_layers(city):
+    """All amenity layers for a city from one Overpass query, served from the snapshot store when available."""
+    return snapshot_store.fetch(
+        "amenity_layers", city, AMENITY_LAYERS,
+        lambda: amenity_fetcher.fetch(fetch_boundary(city))
+    )
+
+def fetch_area_names(city, bbox):
+    """Area names for a city, served from the snapshot store when available."""
+    def load():
+        areas = get_area_names(bbox)
+        if not areas:
+            # Don't snapshot a failed or empty lookup
+            raise ValueError("no area names returned")
+        return areas
+
     try:
-        # Ensure school name is a string
-        name_str = str(school_name) if school_name is not None else ""
-        
-        # First check if it's in our top schools lists
-        if name_str in top_secondary_dict:
-            return "secondary"
-        elif name_str in top_primary_dict:
-            return "primary"
-        
-        # Otherwise guess from name
-        name_lower = name_str.lower()
-        if any(keyword in name_lower for keyword in ["primary", "junior", "infant", "elementary"]):
-            return "primary"
-        elif any(keyword in name_lower for keyword in ["secondary", "high", "comprehensive", "academy", "college"]):
-            return "secondary"
-        else:
-            return "unknown"
+        return snapshot_store.fetch("areas", city, None, load)
     except Exception as e:
-        print(f"⚠️ Error determining school type: {str(e)}")
-        return "unknown"
+        print(f"⚠️ Area names unavailable for {city}: {e}")
+        return []
+
+def get_school_catalogue(city, amenity_layers=None):
+    """Return the classified school catalogue for a city, built once per fetched school set."""
+    if amenity_layers is None:
+        amenity_layers = fetch_amenity_layers(city)
+    return get_amenity_store(city).load_schools(amenity_layers["school"], top_primary_schools_dict, top_secondary_schools_dict)
 
-def analyze_location(city, travel_preferences=None):
+def get_layer_indexes(city, amenity_layers):
+    """Spatial indexes for every amenity layer of a city, keyed by layer name."""
+    school_catalogue = get_school_catalogue(city, amenity_layers)
+    amenity_store = get_amenity_store(city)
+    return {
+        "school:primary": school_catalogue.index("primary"),
+        "school:secondary": school_catalogue.index("secondary"),
+        "school:both": school_catalogue.index("both"),
+        "hospital": amenity_store.load_layer("hospital", amenity_layers["hospital"]),
+        "supermarket": amenity_store.load_layer("supermarket", amenity_layers["supermarket"])
+    }
+
+def compute_static_components(lons, lats, amenity_indexes, score_grid=None):
+    """Nearest-amenity distances/positions and transit scores for arbitrary points.
+
+    Transit scores come from the score grid cell holding each point when a grid
+    is ready, and from the GTFS service otherwise."""
+    distances, positions = batch_nearest(lons, lats, amenity_indexes)
+    transit_scores = np.full(len(lons), np.nan)
+    if score_grid is not None:
+        cells = score_grid.cells_at(lons, lats)
+        transit_scores[cells >= 0] = score_grid.transit_scores[cells[cells >= 0]]
+    missing = np.flatnonzero(np.isnan(transit_scores))
+    if len(missing):
+        transit_scores[missing] = candidate_scorer.transit_scores(np.asarray(lats)[missing], np.asarray(lons)[missing])
+    return distances, positions, transit_scores
+
+def weighted_static_scores(distances, transit_scores, amenity_types, amenity_weights):
+    """Amenity + transit part of the location score (no travel times) for every point."""
+    total = np.asarray(transit_scores, dtype=float) / 100 * 20
+    for layer, a_type in enumerate(amenity_types):
+        weight = amenity_weights.get(a_type, 0)
+        if weight > 0:
+            scores = distance_decay_scores(distances[:, layer], AMENITY_REFERENCE_KM.get(a_type, 1))
+            total += np.nan_to_num(scores) * weight
+    return total
+
+def resolve_travel_destinations(travel_preferences, travel_mode):
+    """Geocode each travel preference once per analysis and work out its mode and trip weight."""
+    if not travel_preferences or 'locations' not in travel_preferences:
+        return []
+    print("Processing travel preferences:", travel_preferences['locations'])
+    total_frequency = sum(loc["frequency"] for loc in travel_preferences['locations'])
+
+    # One bulk lookup for every uncached destination postcode
+    coordinates = postcode_service.coordinates_many([pref.get("postcode") for pref in travel_preferences['locations']])
+
+    destinations = []
+    for pref in travel_preferences['locations']:
+        try:
+            coords = coordinates.get(normalize_postcode(pref["postcode"]))
+            if not coords:
+                continue
+            # If a global travel mode is set (not 'auto'), it overrides individual preferences
+            if travel_mode != 'auto':
+                dest_mode = travel_mode
+            else:
+                # Get destination mode if specified, otherwise use global mode
+                dest_mode = pref.get('travelMode', travel_mode)
+            print(f"Using travel mode {dest_mode} for {pref['postcode']}")
+            destinations.append({
+                "pref": pref,
+                "coords": coords,
+                "mode": dest_mode,
+                "weight": pref["frequency"] / total_frequency
+            })
+        except Exception as e:
+            print(f"Error resolving travel destination {pref.get('postcode')}: {str(e)}")
+    return destinations
+
+def calculate_location_travel_score(location_data, destinations, travel_mode, travel_times=None, all_times=False):
+    """Travel score (40% weight) for a candidate; fills in its travel_scores and transport_modes.
+    travel_times holds durations already fetched by the travel time executor; all_times
+    asks for every mode's time in auto mode instead of only the ones needed to pick the fastest."""
+    origin = (location_data["lat"], location_data["lon"])
+    total_penalty = 0
+
+    # Store all transport mode data for each destination
+    transport_modes_data = {}
+
+    for destination in destinations:
+        pref = destination["pref"]
+        coords = destination["coords"]
+        dest_mode = destination["mode"]
+        weight = destination["weight"]
+        # Unroutable trips cost the maximum penalty, keeping the score within its upper bound
+        travel_duration = None
+        try:
+            print(f"🔍 Processing travel preference: {pref}")
+            # Calculate travel times
+            dest_coords = (coords["lat"], coords["lon"])
+            prefetched = None
+            if travel_times is not None:
+                prefetched = {
+                    profile: travel_times[(origin, dest_coords, profile)]
+                    for profile in MODE_PROFILES.get(dest_mode, ["driving-car"])
+                    if (origin, dest_coords, profile) in travel_times
+                }
+            travel_time = calculate_travel_time(
+                origin,
+                dest_coords,
+                mode=dest_mode,
+                prefetched=prefetched,
+                all_times=all_times
+            )
+            
+            if travel_time is not None:
+                print(f"🔍 Travel time calculated for {pref['postcode']}: {travel_time['duration']} mins")
+                
+                # Ensure type is properly set with a default if missing
+                pref_type = pref.get('type', 'Home')
+                
+                # Create a unique key that includes both type and postcode
+                key = f"{pref_type}-{pref['postcode']}"
+                location_data["travel_scores"][key] = {
+                    "travel_time": travel_time['duration'],
+                    "frequency": pref["frequency"],
+                    "transport_mode": travel_time['mode'],
+                    "all_times": travel_time.get('all_times', {}),
+                    "type": pref_type,
+                    "postcode": pref['postcode']
+                }
+                
+                # Store detailed transport mode information
+                transport_modes_data[key] = {
+                    "selected_mode": travel_time['mode'],
+                    "travel_time_minutes": travel_time['duration'],
+                    "alternative_modes": travel_time.get('all_times', {})
+                }
+                
+                # Also ensure the global mode is explicitly marked as selected when it's used
+                if travel_mode != 'auto':
+                    # Map the global mode to its corresponding API mode
+                    selected_mode_map = {
+                        'driving': 'driving-car',
+                        'cycling': 'cycling-regular',
+                        'walking': 'foot-walking',
+                        'bus': 'bus-transit'
+                    }
+                    if travel_mode in selected_mode_map:
+                        transport_modes_data[key]["selected_mode"] = selected_mode_map[travel_mode]
+                        print(f"Explicitly marking {selected_mode_map[travel_mode]} as selected_mode for {key} due to global preference")
+                
+                # Use the configured travel time which would be the bus time for bus mode
+                # or fastest time for auto mode
+                travel_duration = travel_time['duration']
+                print(f"Using travel time for {travel_time['mode']}: {travel_duration:.2f} mins (weight: {weight}, penalty: {trip_penalty(weight, travel_duration):.2f})")
+            else:
+                print(f"⚠️ No travel time for {pref['postcode']}, charging the maximum penalty")
+        except Exception as e:
+            print(f"Error calculating travel score for {pref['postcode']}: {str(e)}")
+
+        total_penalty += trip_penalty(weight, travel_duration)
+
+    # Store transport modes data in location data
+    location_data["transport_modes"] = transport_modes_data
+
+    # Calculate travel score based on weekly travel time (total_penalty is already the weekly total)
+    score = round(travel_score(total_penalty), 1)
+    print(f"Final travel score: {score} (weekly travel time: {total_penalty:.2f} mins)")
+    return score
+
+def analyze_location(city, travel_preferences=None, seed=None, search_mode="random", all_modes=False):
     print(f"🔍 Starting analysis for {city}...")
     print(f"🔄 Travel preferences received: {travel_preferences}")
     
     try:
         # Get city boundary
-        city_gdf = ox.geocode_to_gdf(city)
+        city_gdf = fetch_boundary(city)
         if city_gdf.empty:
             print(f"❌ Could not retrieve boundary for {city}")
             return []
 
-        city_polygon = city_gdf.unary_union
+        city_boundary = boundary_cache.get(city, city_gdf)
         print("✅ City boundary retrieved successfully")
 
         # Get travel mode preference
@@ -369,141 +475,13 @@ def analyze_location(city, travel_preferences=None):
             print(f"⚠️ Invalid school filter value: {school_filter}, using default 'both'")
             school_filter = 'both'
 
-        # Generate points
-        print("🎲 Generating random points...")
-        num_candidates = 20
-        candidate_points = generate_random_points(city_polygon, num_candidates)
-        print(f"✅ Generated {len(candidate_points)} candidate points")
-
         # Get amenities
         print("🏫 Retrieving amenities...")
-        schools = None
-
-        if school_filter == 'secondary' or school_filter == 'both':
-            # Look specifically for secondary schools using ISCED level tags
-            secondary_schools_query = {
-                "amenity": "school",
-                "isced:level": ["2", "3", "2;3"]  # ISCED levels 2-3 correspond to secondary education
-            }
-            
-            # Try to get schools with ISCED level tags first
-            try:
-                schools_isced = ox.features_from_place(city, secondary_schools_query, which_result=None)
-                print(f"Found {len(schools_isced)} schools with ISCED level tags")
-                schools = schools_isced
-            except Exception as e:
-                print(f"Error getting schools with ISCED tags: {e}")
-                schools = gpd.GeoDataFrame()
-            
-            # If no secondary schools found with ISCED tags, fall back to all schools and filter after
-            if schools.empty:
-                print("⚠️ No secondary schools found using ISCED tags. Getting all schools.")
-                try:
-                    all_schools = ox.features_from_place(city, {"amenity": "school"})
-                    
-                    # Try to filter for likely secondary schools by name keywords
-                    if not all_schools.empty:
-                        name_filters = ["secondary", "high", "comprehensive", "academy", "college"]
-                        secondary_schools_mask = all_schools["name"].str.lower().apply(
-                            lambda x: any(keyword in str(x).lower() for keyword in name_filters) if pd.notna(x) else False
-                        )
-                        filtered_schools = all_schools[secondary_schools_mask]
-                        
-                        # If we found some secondary schools by name, use those
-                        if not filtered_schools.empty:
-                            schools = filtered_schools
-                            print(f"Filtered to {len(schools)} secondary schools by name")
-                        
-                        # Also filter for known secondary schools from our list
-                        top_school_names = set(top_secondary_schools_dict.keys())
-                        if top_school_names:
-                            top_schools_mask = all_schools["name"].isin(top_school_names)
-                            top_schools_found = all_schools[top_schools_mask]
-                            
-                            # If we have both filtered schools and top schools, combine them
-                            if not top_schools_found.empty:
-                                if not filtered_schools.empty:
-                                    schools = pd.concat([filtered_schools, top_schools_found]).drop_duplicates()
-                                else:
-                                    schools = top_schools_found
-                                print(f"Added {len(top_schools_found)} top-rated schools from our list")
-                except Exception as e:
-                    print(f"Error getting all schools: {e}")
-                    if schools is None:
-                        schools = gpd.GeoDataFrame()
-            
-            print(f"✅ Secondary schools retrieved: {len(schools) if schools is not None else 0} found")
-        
-        if school_filter == 'primary' or school_filter == 'both':
-            # Get primary schools
-            primary_schools_query = {
-                "amenity": "school",
-                "isced:level": ["0", "1", "0;1"]  # ISCED levels 0-1 correspond to primary education
-            }
-            
-            # Try to get primary schools with ISCED level tags first
-            try:
-                primary_schools_isced = ox.features_from_place(city, primary_schools_query, which_result=None)
-                print(f"Found {len(primary_schools_isced)} primary schools with ISCED level tags")
-                
-                # Combine with existing schools if needed
-                if schools is not None and not schools.empty and school_filter == 'both':
-                    schools = pd.concat([schools, primary_schools_isced]).drop_duplicates()
-                else:
-                    schools = primary_schools_isced
-            except Exception as e:
-                print(f"Error getting primary schools with ISCED tags: {e}")
-                
-                # If failed to get by ISCED, try name-based search
-                try:
-                    all_schools = ox.features_from_place(city, {"amenity": "school"})
-                    
-                    # Filter for likely primary schools by name keywords
-                    if not all_schools.empty:
-                        name_filters = ["primary", "junior", "infant", "elementary"]
-                        primary_schools_mask = all_schools["name"].str.lower().apply(
-                            lambda x: any(keyword in str(x).lower() for keyword in name_filters) if pd.notna(x) else False
-                        )
-                        filtered_primary = all_schools[primary_schools_mask]
-                        
-                        # Also filter for known primary schools from our list
-                        top_primary_names = set(top_primary_schools_dict.keys())
-                        if top_primary_names:
-                            top_primary_mask = all_schools["name"].isin(top_primary_names)
-                            top_primary_found = all_schools[top_primary_mask]
-                            
-                            # Combine filtered and top primary schools
-                            if not filtered_primary.empty or not top_primary_found.empty:
-                                primary_schools = pd.concat([filtered_primary, top_primary_found]).drop_duplicates()
-                                
-                                # Combine with existing schools if needed
-                                if schools is not None and not schools.empty and school_filter == 'both':
-                                    schools = pd.concat([schools, primary_schools]).drop_duplicates()
-                                else:
-                                    schools = primary_schools
-                                    
-                                print(f"Found {len(primary_schools)} primary schools by name/top list")
-                except Exception as e:
-                    print(f"Error getting primary schools by name: {e}")
-        
-        # If we still have no schools, fall back to all schools
-        if schools is None or schools.empty:
-            print("⚠️ No schools found with specific filters. Using all schools as fallback.")
-            try:
-                schools = ox.features_from_place(city, {"amenity": "school"})
-                print(f"✅ Fallback: Found {len(schools)} total schools")
-            except Exception as e:
-                print(f"Error getting all schools: {e}")
-                schools = gpd.GeoDataFrame()
-        
-        hospitals = ox.features_from_place(city, {"amenity": "hospital"})
-        print("✅ Hospitals retrieved")
-        
-        supermarkets = ox.features_from_place(city, {"shop": "supermarket"})
-        print("✅ Supermarkets retrieved")
+        amenity_layers = fetch_amenity_layers(city)
+        print(f"✅ Amenities retrieved: {len(amenity_layers['school'])} schools, {len(amenity_layers['hospital'])} hospitals, {len(amenity_layers['supermarket'])} supermarkets")
 
         # Get area names
-        areas = get_area_names(city_gdf.total_bounds)
+        areas = fetch_area_names(city, city_gdf.total_bounds)
 
         # Get amenity weights from travel preferences or use defaults
         amenity_weights = {
@@ -524,11 +502,77 @@ def analyze_location(city, travel_preferences=None):
         total_amenity_weight = sum(amenity_weights.values())
         print(f"Total amenity weight: {total_amenity_weight}%")
         
-        # Process locations
+        # Project each layer once into the city's amenity store (British National Grid)
+        print("🗂️ Indexing amenity layers...")
+        layer_indexes = get_layer_indexes(city, amenity_layers)
+        amenity_layer_names = {
+            "school": f"school:{school_filter}",
+            "hospital": "hospital",
+            "supermarket": "supermarket"
+        }
+        amenities_data = {
+            "school": (layer_indexes[amenity_layer_names["school"]], 1000),      # 1km threshold
+            "hospital": (layer_indexes["hospital"], 2000),   # 2km threshold
+            "supermarket": (layer_indexes["supermarket"], 1000)  # 1km threshold
+        }
+
+        amenity_indexes = [amenity_index for amenity_index, _ in amenities_data.values()]
+        score_grid = score_grid_builder.ensure(
+            city, city_boundary, layer_indexes, candidate_scorer.transit_scores, areas
+        )
+        # Static scores are cheap with a grid or the adaptive search, so consider a larger
+        # pool; travel times are only computed for the candidates that can reach the top
+        num_candidates = CANDIDATE_POOL_SIZE if score_grid is not None or search_mode == "adaptive" else 20
+        if search_mode == "adaptive":
+            # Coarse-to-fine search on the cheap static score
+            print("🎯 Running adaptive candidate search...")
+            batches = []
+
+            def cheap_scores(lons, lats):
+                components = compute_static_components(lons, lats, amenity_indexes, score_grid)
+                batches.append((lons, lats, *components))
+                return weighted_static_scores(components[0], components[2], list(amenities_data), amenity_weights)
+
+            selected = adaptive_search(city_boundary, cheap_scores, num_candidates)
+            candidate_lons, candidate_lats = (np.concatenate([b[0] for b in batches])[selected],
+                                              np.concatenate([b[1] for b in batches])[selected])
+            nearest_distances = np.concatenate([b[2] for b in batches])[selected]
+            nearest_positions = np.concatenate([b[3] for b in batches])[selected]
+            transit_scores = [round(float(score), 1) for score in np.concatenate([b[4] for b in batches])[selected]]
+            area_names = find_nearest_areas(candidate_lats, candidate_lons, areas)
+        elif score_grid is not None:
+            # Static components (amenity distances, transit score, area) come precomputed from the grid
+            print(f"🗺️ Sampling {num_candidates} candidates from the precomputed score grid...")
+            cells = score_grid.sample_cells(num_candidates, seed=seed)
+            candidate_lons, candidate_lats = score_grid.lons[cells], score_grid.lats[cells]
+            nearest_distances, nearest_positions = score_grid.nearest(
+                cells, [amenity_layer_names[a_type] for a_type in amenities_data]
+            )
+            transit_scores = [round(float(score), 1) for score in score_grid.transit_scores[cells]]
+            area_names = [score_grid.area_name(cell) for cell in cells]
+        else:
+            # Grid not built yet: sample random points and score them directly
+            print("🎲 Generating random points...")
+            candidate_lons, candidate_lats = city_boundary.sample_points(num_candidates, seed=seed)
+
+            # Score every candidate against every amenity layer in one vectorised pass
+            print("📐 Computing nearest amenities for all candidates...")
+            nearest_distances, nearest_positions = batch_nearest(candidate_lons, candidate_lats, amenity_indexes)
+            transit_scores = [float(score) for score in candidate_scorer.transit_scores(candidate_lats, candidate_lons)]
+            area_names = find_nearest_areas(candidate_lats, candidate_lons, areas)
+
+        candidate_points = list(shapely.points(candidate_lons, candidate_lats))
+        print(f"✅ Generated {len(candidate_points)} candidate points")
+        amenity_scores = {
+            a_type: distance_decay_scores(nearest_distances[:, layer], AMENITY_REFERENCE_KM.get(a_type, 1))
+            for layer, a_type in enumerate(amenities_data)
+        }
+
+        # Stage one: amenity and transit scores for every candidate in the pool
         print("📊 Processing amenity data...")
         locations = []
         
-        for pt in candidate_points:
+        for i, pt in enumerate(candidate_points):
             location_data = {
                 "lat": pt.y,
                 "lon": pt.x,
@@ -547,252 +591,43 @@ def analyze_location(city, travel_preferences=None):
             amenity_score = 0
             amenity_breakdown = {}
             
-            # Process amenities
-            amenities_data = {
-                "school": (schools, 1000),      # 1km threshold
-                "hospital": (hospitals, 2000),   # 2km threshold
-                "supermarket": (supermarkets, 1000)  # 1km threshold
-            }
-
             # Only process amenities with non-zero weights
-            for a_type, (gdf, threshold) in amenities_data.items():
+            for layer, (a_type, (amenity_index, threshold)) in enumerate(amenities_data.items()):
                 weight = amenity_weights.get(a_type, 0)
-                if weight > 0 and not gdf.empty:  # Only process if weight > 0
-                    distance, nearest = get_nearest_amenity(pt, gdf)
-                    if distance is not None:
-                        # Calculate normalized score (0-1) for this amenity
-                        distance_km = distance / 1000
-                        if a_type == "school":
-                            score = max(0, 1 - (distance_km / 2))  # 2km reference
-                        elif a_type == "hospital":
-                            score = max(0, 1 - (distance_km / 3))  # 3km reference
-                        else:  # supermarket
-                            score = max(0, 1 - (distance_km / 1))  # 1km reference
+                if weight > 0 and not amenity_index.empty:  # Only process if weight > 0
+                    if nearest_positions[i, layer] >= 0:
+                        distance = float(nearest_distances[i, layer])
+                        nearest = amenity_index.row(nearest_positions[i, layer])
+
+                        # Normalized score (0-1) for this amenity, precomputed for all candidates
+                        score = float(amenity_scores[a_type][i])
                             
                         # Calculate weighted score
                         weighted_score = score * weight
                         amenity_score += weighted_score
                         
                         # Store the amenity data and its score
-                        if nearest is not None and nearest.geometry is not None:
-                            centroid = nearest.geometry.centroid
-                            amenity_data = {
-                                "name": nearest.get("name", "Unnamed"),
-                                "distance": int(distance),
-                                "lat": centroid.y,
-                                "lon": centroid.x,
-                                "weight": weight,
-                                "score": weighted_score
-                            }
-                            
-                            # Check if this is a top-rated school
-                            if a_type == "school" and nearest.get("name") in all_top_schools_dict:
-                                school_info = all_top_schools_dict[nearest.get("name")]
-                                amenity_data["is_top_rated"] = True
-                                amenity_data["rank"] = school_info["rank"]
-                                amenity_data["rating"] = school_info["rating"]
-                                
-                                # Add school type (primary or secondary)
-                                school_type = get_school_type(nearest.get("name"), top_primary_schools_dict, top_secondary_schools_dict)
-                                amenity_data["school_type"] = school_type
-                                
-                                print(f"✨ Found top-rated {amenity_data['school_type']} school: {nearest.get('name')} (Rank: {school_info['rank']})")
-                            
-                            # For schools, check if it matches the school filter preference
-                            if a_type == "school":
-                                # Make sure school type is set
-                                if "school_type" not in amenity_data:
-                                    school_type = get_school_type(nearest.get("name"), top_primary_schools_dict, top_secondary_schools_dict)
-                                    amenity_data["school_type"] = school_type
-                                
-                                # Check if this school should be filtered out based on user preference
-                                if school_filter == 'primary' and amenity_data.get("school_type") == "secondary":
-                                    print(f"⚠️ Filtering out secondary school '{nearest.get('name')}' as user only wants primary schools")
-                                    
-                                    # Find the nearest primary school instead
-                                    primary_distance, primary_school = get_nearest_school_by_type(pt, schools, "primary", top_primary_schools_dict)
-                                    if primary_distance is not None and primary_school is not None:
-                                        print(f"✅ Found alternative primary school: {primary_school.get('name', 'Unnamed')} at {int(primary_distance)}m")
-                                        
-                                        # Calculate new score
-                                        primary_distance_km = primary_distance / 1000
-                                        primary_score = max(0, 1 - (primary_distance_km / 2))
-                                        primary_weighted_score = primary_score * weight
-                                        
-                                        # Update amenity data
-                                        amenity_data = {
-                                            "name": primary_school.get("name", "Unnamed"),
-                                            "distance": int(primary_distance),
-                                            "lat": primary_school.geometry.centroid.y,
-                                            "lon": primary_school.geometry.centroid.x,
-                                            "weight": weight,
-                                            "score": primary_weighted_score,
-                                            "school_type": "primary"
-                                        }
-                                        
-                                        # Check if it's a top-rated primary school
-                                        if primary_school.get("name") in top_primary_schools_dict:
-                                            school_info = top_primary_schools_dict[primary_school.get("name")]
-                                            amenity_data["is_top_rated"] = True
-                                            amenity_data["rank"] = school_info["rank"]
-                                            amenity_data["rating"] = school_info["rating"]
-                                            print(f"✨ Found top-rated primary school: {primary_school.get('name')} (Rank: {school_info['rank']})")
-                                        
-                                        # Update score
-                                        amenity_score = amenity_score - weighted_score + primary_weighted_score
-                                        weighted_score = primary_weighted_score
-                                    else:
-                                        print(f"⚠️ Could not find any primary schools for this location")
-                                        continue  # Skip this amenity
-                                
-                                if school_filter == 'secondary' and amenity_data.get("school_type") == "primary":
-                                    print(f"⚠️ Filtering out primary school '{nearest.get('name')}' as user only wants secondary schools")
-                                    
-                                    # Find the nearest secondary school instead
-                                    secondary_distance, secondary_school = get_nearest_school_by_type(pt, schools, "secondary", top_secondary_schools_dict)
-                                    if secondary_distance is not None and secondary_school is not None:
-                                        print(f"✅ Found alternative secondary school: {secondary_school.get('name', 'Unnamed')} at {int(secondary_distance)}m")
-                                        
-                                        # Calculate new score
-                                        secondary_distance_km = secondary_distance / 1000
-                                        secondary_score = max(0, 1 - (secondary_distance_km / 2))
-                                        secondary_weighted_score = secondary_score * weight
-                                        
-                                        # Update amenity data
-                                        amenity_data = {
-                                            "name": secondary_school.get("name", "Unnamed"),
-                                            "distance": int(secondary_distance),
-                                            "lat": secondary_school.geometry.centroid.y,
-                                            "lon": secondary_school.geometry.centroid.x,
-                                            "weight": weight,
-                                            "score": secondary_weighted_score,
-                                            "school_type": "secondary"
-                                        }
-                                        
-                                        # Check if it's a top-rated secondary school
-                                        if secondary_school.get("name") in top_secondary_schools_dict:
-                                            school_info = top_secondary_schools_dict[secondary_school.get("name")]
-                                            amenity_data["is_top_rated"] = True
-                                            amenity_data["rank"] = school_info["rank"]
-                                            amenity_data["rating"] = school_info["rating"]
-                                            print(f"✨ Found top-rated secondary school: {secondary_school.get('name')} (Rank: {school_info['rank']})")
-                                        
-                                        # Update score
-                                        amenity_score = amenity_score - weighted_score + secondary_weighted_score
-                                        weighted_score = secondary_weighted_score
-                                    else:
-                                        print(f"⚠️ Could not find any secondary schools for this location")
-                                        continue  # Skip this amenity
-                            
-                            location_data["amenities"][a_type] = amenity_data
-                        else:
-                            amenity_data = {
-                                "name": nearest.get("name", "Unnamed"),
-                                "distance": int(distance),
-                                "weight": weight,
-                                "score": weighted_score
-                            }
-                            
-                            # Check if this is a top-rated school
-                            if a_type == "school" and nearest.get("name") in all_top_schools_dict:
-                                school_info = all_top_schools_dict[nearest.get("name")]
+                        centroid_lat, centroid_lon = amenity_index.centroid(nearest_positions[i, layer])
+                        amenity_data = {
+                            "name": nearest.get("name", "Unnamed"),
+                            "distance": int(distance),
+                            "lat": centroid_lat,
+                            "lon": centroid_lon,
+                            "weight": weight,
+                            "score": weighted_score
+                        }
+                        
+                        # Schools come from the catalogue index matching the school filter,
+                        # so they are already classified and of the requested type
+                        if a_type == "school":
+                            amenity_data["school_type"] = nearest["school_type"]
+                            if nearest["is_top_rated"]:
                                 amenity_data["is_top_rated"] = True
-                                amenity_data["rank"] = school_info["rank"]
-                                amenity_data["rating"] = school_info["rating"]
-                                
-                                # Add school type (primary or secondary)
-                                school_type = get_school_type(nearest.get("name"), top_primary_schools_dict, top_secondary_schools_dict)
-                                amenity_data["school_type"] = school_type
-                                
-                                print(f"✨ Found top-rated {amenity_data['school_type']} school: {nearest.get('name')} (Rank: {school_info['rank']})")
-                            
-                            # For schools, check if it matches the school filter preference
-                            if a_type == "school":
-                                # Make sure school type is set
-                                if "school_type" not in amenity_data:
-                                    school_type = get_school_type(nearest.get("name"), top_primary_schools_dict, top_secondary_schools_dict)
-                                    amenity_data["school_type"] = school_type
-                                
-                                # Check if this school should be filtered out based on user preference
-                                if school_filter == 'primary' and amenity_data.get("school_type") == "secondary":
-                                    print(f"⚠️ Filtering out secondary school '{nearest.get('name')}' as user only wants primary schools")
-                                    
-                                    # Find the nearest primary school instead
-                                    primary_distance, primary_school = get_nearest_school_by_type(pt, schools, "primary", top_primary_schools_dict)
-                                    if primary_distance is not None and primary_school is not None:
-                                        print(f"✅ Found alternative primary school: {primary_school.get('name', 'Unnamed')} at {int(primary_distance)}m")
-                                        
-                                        # Calculate new score
-                                        primary_distance_km = primary_distance / 1000
-                                        primary_score = max(0, 1 - (primary_distance_km / 2))
-                                        primary_weighted_score = primary_score * weight
-                                        
-                                        # Update amenity data
-                                        amenity_data = {
-                                            "name": primary_school.get("name", "Unnamed"),
-                                            "distance": int(primary_distance),
-                                            "lat": primary_school.geometry.centroid.y,
-                                            "lon": primary_school.geometry.centroid.x,
-                                            "weight": weight,
-                                            "score": primary_weighted_score,
-                                            "school_type": "primary"
-                                        }
-                                        
-                                        # Check if it's a top-rated primary school
-                                        if primary_school.get("name") in top_primary_schools_dict:
-                                            school_info = top_primary_schools_dict[primary_school.get("name")]
-                                            amenity_data["is_top_rated"] = True
-                                            amenity_data["rank"] = school_info["rank"]
-                                            amenity_data["rating"] = school_info["rating"]
-                                            print(f"✨ Found top-rated primary school: {primary_school.get('name')} (Rank: {school_info['rank']})")
-                                        
-                                        # Update score
-                                        amenity_score = amenity_score - weighted_score + primary_weighted_score
-                                        weighted_score = primary_weighted_score
-                                    else:
-                                        print(f"⚠️ Could not find any primary schools for this location")
-                                        continue  # Skip this amenity
-                                
-                                if school_filter == 'secondary' and amenity_data.get("school_type") == "primary":
-                                    print(f"⚠️ Filtering out primary school '{nearest.get('name')}' as user only wants secondary schools")
-                                    
-                                    # Find the nearest secondary school instead
-                                    secondary_distance, secondary_school = get_nearest_school_by_type(pt, schools, "secondary", top_secondary_schools_dict)
-                                    if secondary_distance is not None and secondary_school is not None:
-                                        print(f"✅ Found alternative secondary school: {secondary_school.get('name', 'Unnamed')} at {int(secondary_distance)}m")
-                                        
-                                        # Calculate new score
-                                        secondary_distance_km = secondary_distance / 1000
-                                        secondary_score = max(0, 1 - (secondary_distance_km / 2))
-                                        secondary_weighted_score = secondary_score * weight
-                                        
-                                        # Update amenity data
-                                        amenity_data = {
-                                            "name": secondary_school.get("name", "Unnamed"),
-                                            "distance": int(secondary_distance),
-                                            "lat": secondary_school.geometry.centroid.y,
-                                            "lon": secondary_school.geometry.centroid.x,
-                                            "weight": weight,
-                                            "score": secondary_weighted_score,
-                                            "school_type": "secondary"
-                                        }
-                                        
-                                        # Check if it's a top-rated secondary school
-                                        if secondary_school.get("name") in top_secondary_schools_dict:
-                                            school_info = top_secondary_schools_dict[secondary_school.get("name")]
-                                            amenity_data["is_top_rated"] = True
-                                            amenity_data["rank"] = school_info["rank"]
-                                            amenity_data["rating"] = school_info["rating"]
-                                            print(f"✨ Found top-rated secondary school: {secondary_school.get('name')} (Rank: {school_info['rank']})")
-                                        
-                                        # Update score
-                                        amenity_score = amenity_score - weighted_score + secondary_weighted_score
-                                        weighted_score = secondary_weighted_score
-                                    else:
-                                        print(f"⚠️ Could not find any secondary schools for this location")
-                                        continue  # Skip this amenity
-                            
-                            location_data["amenities"][a_type] = amenity_data
+                                amenity_data["rank"] = nearest["rank"]
+                                amenity_data["rating"] = nearest["rating"]
+                                print(f"✨ Found top-rated {amenity_data['school_type']} school: {nearest.get('name')} (Rank: {nearest['rank']})")
+                        
+                        location_data["amenities"][a_type] = amenity_data
                         
                         # Store score breakdown
                         amenity_breakdown[a_type] = {
@@ -805,121 +640,17 @@ def analyze_location(city, travel_preferences=None):
             amenity_score = round(amenity_score, 1)
             
             # Transit score (20% weight)
-            transit_score = gtfs_service.calculate_transit_score(pt.y, pt.x)
+            transit_score = transit_scores[i]
             transit_weighted_score = (transit_score / 100) * 20
             # Round transit weighted score to 1 decimal place
             transit_weighted_score = round(transit_weighted_score, 1)
             
-            # Initialize transit data
+            # Initialize transit data (accessible routes are only looked up for the returned locations)
             location_data["transit"] = {
                 "score": transit_score,
-                "accessible_routes": gtfs_service.get_route_accessibility(pt.y, pt.x)
+                "accessible_routes": []
             }
 
-            # Calculate travel score (40% weight) if travel preferences exist
-            travel_score = 0
-            if travel_preferences and 'locations' in travel_preferences:
-                print("Processing travel preferences for location:", travel_preferences['locations'])
-                total_penalty = 0
-                total_frequency = sum(loc["frequency"] for loc in travel_preferences['locations'])
-                
-                # Store all transport mode data for each destination
-                transport_modes_data = {}
-                
-                for pref in travel_preferences['locations']:
-                    try:
-                        print(f"🔍 Processing travel preference: {pref}")
-                        coords = get_coordinates_from_postcode(pref["postcode"])
-                        if coords:
-                            # If a global travel mode is set (not 'auto'), it overrides individual preferences
-                            if travel_mode != 'auto':
-                                dest_mode = travel_mode
-                                print(f"Using global travel mode: {travel_mode} (overriding individual setting)")
-                            else:
-                                # Get destination mode if specified, otherwise use global mode
-                                dest_mode = pref.get('travelMode', travel_mode)
-                                print(f"Using destination-specific travel mode: {dest_mode}")
-                            
-                            # Calculate travel times
-                            travel_time = calculate_travel_time(
-                                (pt.y, pt.x),
-                                (coords["lat"], coords["lon"]),
-                                mode=dest_mode
-                            )
-                            
-                            if travel_time is not None:
-                                print(f"🔍 Travel time calculated for {pref['postcode']}: {travel_time['duration']} mins")
-                                
-                                # Ensure type is properly set with a default if missing
-                                pref_type = pref.get('type', 'Home')
-                                
-                                # Create a unique key that includes both type and postcode
-                                key = f"{pref_type}-{pref['postcode']}"
-                                location_data["travel_scores"][key] = {
-                                    "travel_time": travel_time['duration'],
-                                    "frequency": pref["frequency"],
-                                    "transport_mode": travel_time['mode'],
-                                    "all_times": travel_time.get('all_times', {}),
-                                    "type": pref_type,
-                                    "postcode": pref['postcode']
-                                }
-                                
-                                # Store detailed transport mode information
-                                transport_modes_data[key] = {
-                                    "selected_mode": travel_time['mode'],
-                                    "travel_time_minutes": travel_time['duration'],
-                                    "alternative_modes": travel_time.get('all_times', {})
-                                }
-                                
-                                # Also ensure the global mode is explicitly marked as selected when it's used
-                                if travel_mode != 'auto':
-                                    # Map the global mode to its corresponding API mode
-                                    selected_mode_map = {
-                                        'driving': 'driving-car',
-                                        'cycling': 'cycling-regular',
-                                        'walking': 'foot-walking',
-                                        'bus': 'bus-transit'
-                                    }
-                                    if travel_mode in selected_mode_map:
-                                        transport_modes_data[key]["selected_mode"] = selected_mode_map[travel_mode]
-                                        print(f"Explicitly marking {selected_mode_map[travel_mode]} as selected_mode for {key} due to global preference")
-                                
-                                # Calculate penalty based on the selected travel mode's time
-                                weight = pref["frequency"] / total_frequency
-                                
-                                # Use the configured travel time which would be the bus time for bus mode
-                                # or fastest time for auto mode
-                                travel_duration = travel_time['duration']
-                                trip_penalty = weight * travel_duration
-                                total_penalty += trip_penalty
-                                
-                                print(f"Using travel time for {travel_time['mode']}: {travel_duration:.2f} mins (weight: {weight}, penalty: {trip_penalty:.2f})")
-                    except Exception as e:
-                        print(f"Error calculating travel score for {pref['postcode']}: {str(e)}")
-                        continue
-                
-                # Store transport modes data in location data
-                location_data["transport_modes"] = transport_modes_data
-                
-                # Calculate travel score based on weekly travel time (total_penalty is already the weekly total)
-                max_acceptable_time = 600  # 10 hours per week (was 120 minutes per day)
-                travel_score = max(0, (max_acceptable_time - total_penalty) / max_acceptable_time) * 40
-                # Round to 1 decimal place
-                travel_score = round(travel_score, 1)
-                print(f"Final travel score: {travel_score} (weekly travel time: {total_penalty:.2f} mins)")
-
-            # Calculate final score based on active components
-            active_weight = sum(weight for weight in amenity_weights.values() if weight > 0)
-            if active_weight == 0:
-                # If no amenity weights, distribute score between transit and travel
-                if travel_preferences and 'locations' in travel_preferences:
-                    final_score = travel_score + transit_weighted_score
-                else:
-                    final_score = transit_weighted_score
-            else:
-                # Normal case with amenity weights
-                final_score = amenity_score + transit_weighted_score + travel_score
-
             # Store score breakdown - maintain numerical travel score for backward compatibility
             location_data["score_breakdown"] = {
                 "amenities": {
@@ -931,23 +662,74 @@ def analyze_location(city, travel_preferences=None):
                     "score": transit_weighted_score,
                     "raw_score": transit_score
                 },
-                "travel": travel_score,  # Keep this as a number for backward compatibility
+                "travel": 0,  # Keep this as a number for backward compatibility
                 "travel_details": {  # Add details in a separate field
-                    "score": travel_score,
+                    "score": 0,
                     "mode_preference": travel_mode,
                     "travel_times": location_data["travel_scores"]
                 }
             }
             
-            location_data["score"] = round(final_score, 1)
-            location_data["area_name"] = find_nearest_area(pt.y, pt.x, areas)
+            # Amenity + transit part; the travel score is added in stage two
+            location_data["score"] = round(amenity_score + transit_weighted_score, 1)
+            location_data["area_name"] = area_names[i]
             location_data["google_maps_link"] = f"https://www.google.com/maps?q={pt.y},{pt.x}"
             
             locations.append(location_data)
 
+        # Stage two: route only the candidates whose best possible travel score could
+        # still lift them into the top 5, best upper bound first
+        if travel_preferences and 'locations' in travel_preferences:
+            destinations = resolve_travel_destinations(travel_preferences, travel_mode)
+            static_scores = np.array([loc["score"] for loc in locations])
+            upper_bounds = static_scores + travel_score_upper_bounds(
+                [loc["lat"] for loc in locations], [loc["lon"] for loc in locations],
+                [(d["coords"]["lat"], d["coords"]["lon"], d["weight"], d["mode"]) for d in destinations]
+            )
+
+            def evaluate(indices):
+                # Fetch every (candidate, destination, profile) time in the batch concurrently;
+                # auto destinations only fetch the modes that could still be fastest
+                jobs = []
+                auto_pairs = []
+                for i in indices:
+                    for d in destinations:
+                        pair = ((locations[i]["lat"], locations[i]["lon"]), (d["coords"]["lat"], d["coords"]["lon"]))
+                        if d["mode"] == "auto" and not all_modes:
+                            auto_pairs.append(pair)
+                        else:
+                            jobs += [(*pair, profile) for profile in MODE_PROFILES.get(d["mode"], ["driving-car"])]
+                travel_times = travel_time_executor.run(jobs)
+                if auto_pairs:
+                    auto_pairs = list(dict.fromkeys(auto_pairs))
+                    auto_times = fastest_mode_times(auto_pairs, MODE_PROFILES["auto"], travel_time_executor.run)
+                    print(f"✂️ Routed {len(auto_times)} of {len(auto_pairs) * len(MODE_PROFILES['auto'])} "
+                          f"auto mode travel times, the rest can't be fastest")
+                    travel_times.update(auto_times)
+                scores = []
+                for i in indices:
+                    location_data = locations[i]
+                    travel_score = calculate_location_travel_score(
+                        location_data, destinations, travel_mode, travel_times, all_times=all_modes
+                    )
+                    location_data["score_breakdown"]["travel"] = travel_score
+                    location_data["score_breakdown"]["travel_details"]["score"] = travel_score
+                    location_data["score"] = round(location_data["score"] + travel_score, 1)
+                    scores.append(location_data["score"])
+                return scores
+
+            # Component rounding can put an exact score up to 0.1 above its bound
+            shortlisted = shortlist_by_upper_bound(
+                upper_bounds, evaluate, TOP_LOCATIONS, tolerance=0.1, batch_size=ROUTING_BATCH_SIZE
+            )
+            print(f"✂️ Routed {len(shortlisted)} of {len(locations)} candidates")
+            locations = [locations[i] for i in shortlisted]
+
         # Sort and return top locations
         locations.sort(key=lambda x: x["score"], reverse=True)
-        top_locations = locations[:5]
+        top_locations = locations[:TOP_LOCATIONS]
+        for loc in top_locations:
+            loc["transit"]["accessible_routes"] = gtfs_service.get_route_accessibility(loc["lat"], loc["lon"])
         
         print(f"✅ Analysis complete for {city}")
         print(f"📊 Final results: {len(locations)} locations processed")
@@ -977,49 +759,73 @@ def analyze_location(city, travel_preferences=None):
         
         return top_locations
 
+    except SnapshotUnavailable as e:
+        print(f"❌ Offline mode: {str(e)}\n")
+        return []
     except Exception as e:
         print(f"❌ Error in analyze_location: {str(e)}\n")
         return []
 
-def ors_minutes(origin, destination, profile):
+def ors_minutes(origin, destination, profile, use_store=True):
     """Calculate travel time between two points using ORS."""
+    if use_store:
+        stored = travel_time_store.get(origin, destination, profile)
+        if stored is not None:
+            return stored
+
     try:
         # Format coordinates as lon,lat (ORS expects longitude first)
         start_point = f"{origin[1]},{origin[0]}"
         end_point = f"{destination[1]},{destination[0]}"
         
-        url = f"http://192.168.1.162:8080/ors/v2/directions/{profile}?start={start_point}&end={end_point}"
-        response = requests.get(url)
+        url = f"{ORS_API_URL}/v2/directions/{profile}?start={start_point}&end={end_point}"
+        response = http_client.get("ors", url)
         data = response.json()
         
         if data.get("features") and len(data["features"]) > 0:
             # Convert duration from seconds to minutes
             duration = data["features"][0]["properties"]["segments"][0]["duration"] / 60
+            if use_store:
+                travel_time_store.put(origin, destination, profile, duration)
             return duration
         return None
     except Exception as e:
         print(f"Error calculating ORS travel time: {str(e)}")
         return None
 
-def calculate_travel_time(origin, destination, mode='auto'):
+def calculate_travel_time(origin, destination, mode='auto', prefetched=None, all_times=False):
     """Calculate travel time between two points using ORS or OTP.
-    If mode is 'auto', calculates times for all modes and returns the fastest one."""
+    If mode is 'auto', returns the fastest mode, skipping modes whose straight-line
+    lower bound can't beat the best time found; all_times queries every mode.
+    prefetched maps profile -> minutes already fetched by the travel time executor."""
+    def profile_minutes(profile):
+        if prefetched is not None and profile in prefetched:
+            return prefetched[profile]
+        if not routing_available(profile_service(profile)):
+            return None
+        if profile == 'bus-transit':
+            return transit_minutes(origin, destination)
+        return ors_minutes(origin, destination, profile)
+
     try:
         # Format coordinates as lon,lat (ORS expects longitude first)
         start_point = f"{origin[1]},{origin[0]}"
         end_point = f"{destination[1]},{destination[0]}"
         
         if mode == 'auto':
-            # Calculate times for all modes
+            # Calculate times for the modes that could be fastest
             modes = ['driving-car', 'cycling-regular', 'foot-walking', 'bus-transit']
+            fetched = fastest_mode_times(
+                [(origin, destination)], modes,
+                lambda jobs: {job: profile_minutes(job[2]) for job in jobs},
+                exhaustive=all_times
+            )
             times = {}
             
             for transport_mode in modes:
-                print(f"Calculating travel time for mode: {transport_mode}")
-                if transport_mode == 'bus-transit':
-                    duration = otp_fastest_minutes(origin, destination)
-                else:
-                    duration = ors_minutes(origin, destination, transport_mode)
+                if (origin, destination, transport_mode) not in fetched:
+                    continue
+                duration = fetched[(origin, destination, transport_mode)]
                     
                 if duration:
                     times[transport_mode] = duration
@@ -1043,24 +849,24 @@ def calculate_travel_time(origin, destination, mode='auto'):
             # Use specific mode
             if mode == 'driving':
                 profile = 'driving-car'
-                duration = ors_minutes(origin, destination, profile)
+                duration = profile_minutes(profile)
             elif mode == 'cycling':
                 profile = 'cycling-regular'
-                duration = ors_minutes(origin, destination, profile)
+                duration = profile_minutes(profile)
             elif mode == 'walking':
                 profile = 'foot-walking'
-                duration = ors_minutes(origin, destination, profile)
+                duration = profile_minutes(profile)
             elif mode == 'bus':
                 profile = 'bus-transit'
                 print(f"🚌 Explicitly calculating BUS time between {origin} and {destination}")
-                duration = otp_fastest_minutes(origin, destination)
+                duration = profile_minutes(profile)
                 
                 if duration is None:
                     print(f"⚠️ Warning: No bus route found. Trying to find alternative modes.")
                     # If no bus route is available, try to find an alternative mode
                     other_modes = [('foot-walking', 'walking'), ('cycling-regular', 'cycling'), ('driving-car', 'driving')]
                     for test_mode, name in other_modes:
-                        alt_duration = ors_minutes(origin, destination, test_mode)
+                        alt_duration = profile_minutes(test_mode)
                         if alt_duration:
                             print(f"⚠️ Using {name} as fallback since no bus route exists")
                             profile = test_mode
@@ -1080,7 +886,7 @@ def calculate_travel_time(origin, destination, mode='auto'):
                 other_modes = [('driving-car', 'driving'), ('cycling-regular', 'cycling'), ('foot-walking', 'walking')]
                 for ors_mode, display_name in other_modes:
                     if ors_mode != profile:  # Skip if we already used this as fallback
-                        other_duration = ors_minutes(origin, destination, ors_mode)
+                        other_duration = profile_minutes(ors_mode)
                         if other_duration:
                             times[ors_mode] = other_duration
                 
@@ -1094,7 +900,7 @@ def calculate_travel_time(origin, destination, mode='auto'):
                 }
             else:
                 profile = 'driving-car'  # default to driving
-                duration = ors_minutes(origin, destination, profile)
+                duration = profile_minutes(profile)
                 
             if duration:
                 return {
@@ -1108,22 +914,27 @@ def calculate_travel_time(origin, destination, mode='auto'):
         print(f"Error calculating travel time: {str(e)}")
         return None
 
+# Concurrent ORS/OTP calls for the shortlist, bounded per service; ORS profiles go
+# through one matrix request each and transit pairs through batched OTP plan queries
+ors_matrix_client = OrsMatrixClient(ORS_API_URL)
+travel_time_executor = TravelTimeExecutor(
+    {
+        "ors": lambda origin, destination, profile: ors_minutes(origin, destination, profile, use_store=False),
+        "otp": lambda origin, destination, profile: transit_minutes(origin, destination, use_store=False)
+    },
+    matrix_fetchers={
+        "ors": ors_matrix_client.durations,
+        "otp": lambda origins, destinations, profile: transit_durations(origins, destinations)
+    },
+    store=travel_time_store,
+    departure=OTP_DEPARTURE,
+    is_available=routing_available,
+    should_store=store_routing_results
+)
+
 def get_coordinates_from_postcode(postcode):
-    """Get coordinates from a UK postcode using postcodes.io API."""
-    try:
-        url = f"https://api.postcodes.io/postcodes/{postcode}"
-        response = requests.get(url)
-        data = response.json()
-        
-        if response.status_code == 200 and data["status"] == 200:
-            return {
-                "lat": float(data["result"]["latitude"]),
-                "lon": float(data["result"]["longitude"])
-            }
-        return None
-    except Exception as e:
-        print(f"Error getting coordinates from postcode: {str(e)}")
-        return None
+    """Get coordinates from a UK postcode using postcodes.io API (cached)."""
+    return postcode_service.coordinates(postcode)
 
 @app.route('/amenities', methods=['GET', 'OPTIONS'])
 def get_amenities():
@@ -1136,24 +947,26 @@ def get_amenities():
     
     city = request.args.get('city', "Cardiff, UK")
     travel_preferences_str = request.args.get('travel_preferences')
+    # Optional seed makes candidate sampling reproducible
+    seed = request.args.get('seed', type=int)
+    # 'random' samples candidates uniformly, 'adaptive' refines around the best-scoring areas
+    search_mode = request.args.get('search_mode', 'random')
+    if search_mode not in SEARCH_MODES:
+        print(f"⚠️ Invalid search mode: {search_mode}, using 'random'")
+        search_mode = 'random'
+    # Auto mode only routes the modes that could be fastest unless every mode's time is requested
+    all_modes = request.args.get('all_modes', 'false').lower() in ('1', 'true', 'yes')
     
     print(f"📍 Processing request for city: {city}")
     print(f"🔄 Raw travel preferences received: '{travel_preferences_str}'")
     
     try:
-        # Check if OTP is available for bus transit
+        # Check if OTP is available for bus transit (cached by the health monitor)
         otp_available = True
-        try:
-            # Simple OTP health check
-            if travel_preferences_str and "bus" in travel_preferences_str:
-                print("🚌 Bus mode detected, checking OTP availability...")
-                otp_status = requests.get("http://localhost:8080/otp", timeout=2)
-                if otp_status.status_code != 200:
-                    otp_available = False
-                    print(f"⚠️ OTP server returned status code: {otp_status.status_code}")
-        except requests.exceptions.RequestException:
-            otp_available = False
-            print("⚠️ OTP server is not available")
+        if travel_preferences_str and "bus" in travel_preferences_str:
+            otp_available = routing_available("otp")
+            if not otp_available:
+                print("⚠️ OTP server is not available")
 
         # Parse travel preferences if they exist
         travel_preferences = None
@@ -1201,7 +1014,8 @@ def get_amenities():
         
         print("🔍 Starting location analysis...")
         try:
-            locations = analyze_location(city, travel_preferences)
+            locations = analyze_location(city, travel_preferences, seed=seed, search_mode=search_mode,
+                                         all_modes=all_modes)
             print(f"✅ Analysis complete. Found {len(locations)} locations")
         except Exception as e:
             import traceback
@@ -1235,6 +1049,83 @@ def get_amenities():
         print(f"Stack trace: {traceback.format_exc()}")
         return jsonify({"error": str(e), "locations": []}), 500
 
+@app.route('/score-grid', methods=['GET'])
+def get_score_grid():
+    """Quantized city-wide static score grid for map heatmaps"""
+    try:
+        city = request.args.get('city', "Cardiff, UK")
+        school_filter = request.args.get('school_filter', 'both')
+        if school_filter not in ['primary', 'secondary', 'both']:
+            school_filter = 'both'
+
+        amenity_weights = {"school": 15, "hospital": 15, "supermarket": 10}
+        if request.args.get('amenity_weights'):
+            amenity_weights.update({
+                k: int(str(v).replace('%', ''))
+                for k, v in json.loads(request.args['amenity_weights']).items()
+            })
+
+        score_grid = score_grid_builder.get(city)
+        if score_grid is None:
+            # Build with the same inputs analyze_location uses, fetched on the build thread
+            # so the 202 doesn't wait for the boundary and amenity layers
+            def load_inputs():
+                city_boundary = boundary_cache.get(city, fetch_boundary(city))
+                layer_indexes = get_layer_indexes(city, fetch_amenity_layers(city))
+                areas = fetch_area_names(city, city_boundary.source.total_bounds)
+                return city_boundary, layer_indexes, candidate_scorer.transit_scores, areas
+
+            score_grid_builder.build_in_background(city, load_inputs)
+            return jsonify({"city": city, "status": "building"}), 202
+
+        layer_names = {"school": f"school:{school_filter}", "hospital": "hospital", "supermarket": "supermarket"}
+        data = score_grid.heatmap(amenity_weights, layer_names, AMENITY_REFERENCE_KM)
+        data["status"] = "ready"
+        data["school_filter"] = school_filter
+        return jsonify(data)
+    except Exception as e:
+        print(f"❌ Error building score grid response: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/http-stats', methods=['GET'])
+def get_http_stats():
+    """Request counts, latency and connection reuse for each external service"""
+    return jsonify(http_client.stats())
+
+@app.route('/travel-time-stats', methods=['GET'])
+def get_travel_time_stats():
+    """Hit/miss statistics of the shared travel time store"""
+    return jsonify(travel_time_store.status())
+
+@app.route('/postcode/<postcode>', methods=['GET'])
+@app.route('/api/postcode/<postcode>', methods=['GET'])
+def get_postcode_info(postcode):
+    """A postcode's location in the postcodes.io envelope, {"status": 200, "result": {...}}.
+
+    The result holds only postcode, latitude and longitude whichever source
+    answered: the offline gazetteer has nothing more, so postcodes.io answers
+    are trimmed to the same fields."""
+    try:
+        result = postcode_service.lookup(postcode)
+    except Exception as e:
+        print(f"❌ Postcode lookup unavailable for {postcode}: {str(e)}")
+        return jsonify({"error": f"Postcode lookup unavailable: {str(e)}"}), 502
+    if result is None or result.get("latitude") is None:
+        return jsonify({"error": "Postcode not found"}), 404
+    return jsonify({"status": 200, "result": {
+        "postcode": result["postcode"],
+        "latitude": float(result["latitude"]),
+        "longitude": float(result["longitude"])
+    }})
+
+@app.route('/postcode/<postcode>/amenities', methods=['GET'])
+@app.route('/api/postcode/<postcode>/amenities', methods=['GET'])
+def get_postcode_amenities(postcode):
+    # Placeholder carried over from the root app: checks the postcode, no amenities yet
+    if postcode_service.coordinates(postcode) is None:
+        return jsonify({"error": "Invalid postcode"}), 400
+    return jsonify({"schools": [], "hospitals": [], "supermarkets": []})
+
 @app.route('/bus-routes', methods=['GET'])
 def get_bus_routes():
     try:
@@ -1258,67 +1149,60 @@ def get_route_details(route_id):
 
 @app.route('/otp-status', methods=['GET'])
 def get_otp_status():
-    """Check if OTP is running and available and return transport mode comparison"""
-    try:
-        # Simple query to check if OTP is available
-        query = {
-            "query": "{ plan { modes } }"
-        }
-        response = requests.post(OTP_API_URL, json=query, timeout=5)
-        data = response.json()
-        
-        # Generate sample travel time comparisons
-        sample_points = [
-            # Central Cardiff to Cardiff Bay
-            ((51.481, -3.179), (51.465, -3.165), "City Center to Cardiff Bay"),
-            # Cardiff University to Heath Hospital
-            ((51.488, -3.179), (51.511, -3.175), "Cardiff University to Heath Hospital"),
-            # Llandaff to Central Cardiff
-            ((51.495, -3.215), (51.481, -3.179), "Llandaff to City Center")
-        ]
-        
-        comparisons = []
-        for origin, destination, label in sample_points:
-            try:
-                # Get all transport modes
-                travel_times = calculate_travel_time(origin, destination, 'auto')
-                if travel_times and 'all_times' in travel_times:
-                    # Create a comparison object
-                    comparison = {
-                        "route": label,
-                        "origin": {"lat": origin[0], "lon": origin[1]},
-                        "destination": {"lat": destination[0], "lon": destination[1]},
-                        "fastest_mode": travel_times["mode"],
-                        "fastest_time": travel_times["duration"],
-                        "times_by_mode": travel_times["all_times"]
-                    }
-                    comparisons.append(comparison)
-            except Exception as route_e:
-                print(f"Error calculating route for {label}: {route_e}")
-        
-        if "data" in data and "plan" in data["data"] and "modes" in data["data"]["plan"]:
-            return jsonify({
-                "status": "available",
-                "modes": data["data"]["plan"]["modes"],
-                "transport_comparisons": comparisons,
-                "otp_url": OTP_API_URL,
-                "note": "These sample routes show how different transport modes compare in the same journey. Mode with lowest time is preferred when 'auto' is selected."
-            })
-        else:
-            return jsonify({
-                "status": "unavailable", 
-                "error": "Invalid response format",
-                "transport_comparisons": comparisons
-            }), 503
-    except Exception as e:
-        return jsonify({"status": "unavailable", "error": str(e)}), 503
+    """Report OTP health from the background monitor and return transport mode comparison"""
+    otp_health = health_monitor.status()["otp"]
+    if not otp_health["available"]:
+        return jsonify({"status": "unavailable", "error": otp_health["error"] or "OTP circuit is open",
+                        "health": otp_health, "transport_comparisons": []}), 503
+
+    # Generate sample travel time comparisons
+    sample_points = [
+        # Central Cardiff to Cardiff Bay
+        ((51.481, -3.179), (51.465, -3.165), "City Center to Cardiff Bay"),
+        # Cardiff University to Heath Hospital
+        ((51.488, -3.179), (51.511, -3.175), "Cardiff University to Heath Hospital"),
+        # Llandaff to Central Cardiff
+        ((51.495, -3.215), (51.481, -3.179), "Llandaff to City Center")
+    ]
+
+    comparisons = []
+    for origin, destination, label in sample_points:
+        try:
+            # Get all transport modes
+            travel_times = calculate_travel_time(origin, destination, 'auto', all_times=True)
+            if travel_times and 'all_times' in travel_times:
+                # Create a comparison object
+                comparison = {
+                    "route": label,
+                    "origin": {"lat": origin[0], "lon": origin[1]},
+                    "destination": {"lat": destination[0], "lon": destination[1]},
+                    "fastest_mode": travel_times["mode"],
+                    "fastest_time": travel_times["duration"],
+                    "times_by_mode": travel_times["all_times"]
+                }
+                comparisons.append(comparison)
+        except Exception as route_e:
+            print(f"Error calculating route for {label}: {route_e}")
+
+    return jsonify({
+        "status": "available",
+        "health": otp_health,
+        "transport_comparisons": comparisons,
+        "otp_url": OTP_API_URL,
+        "note": "These sample routes show how different transport modes compare in the same journey. Mode with lowest time is preferred when 'auto' is selected."
+    })
+
+@app.route('/health', methods=['GET'])
+def get_health():
+    """Cached ORS and OTP health and circuit breaker states"""
+    return jsonify(health_monitor.status())
 
 @app.route('/query', methods=['POST'])
 def otp_query():
     """Forward GraphQL queries to OTP"""
     try:
         data = request.json
-        response = requests.post(OTP_API_URL, json=data, timeout=15)
+        response = http_client.post("otp", OTP_API_URL, json=data)
         return response.json()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1394,7 +1278,7 @@ def transport_comparison():
         
         for mode in modes:
             try:
-                result = calculate_travel_time(origin, destination, mode)
+                result = calculate_travel_time(origin, destination, mode, all_times=True)
                 if result:
                     # Format the result
                     formatted_result = {
@@ -1458,111 +1342,18 @@ def debug_schools():
         print(f"🏫 Debugging schools for {city} with filter: {school_filter}")
         
         # Get city boundary
-        city_gdf = ox.geocode_to_gdf(city)
+        city_gdf = fetch_boundary(city)
         if city_gdf.empty:
             return jsonify({"error": f"Could not retrieve boundary for {city}"}), 404
 
-        schools = []
-        primary_schools = []
-        secondary_schools = []
-        
-        # Get secondary schools if needed
-        if school_filter == 'secondary' or school_filter == 'both':
-            try:
-                # Try with ISCED tags first
-                secondary_query = {"amenity": "school", "isced:level": ["2", "3", "2;3"]}
-                secondary_schools_isced = ox.features_from_place(city, secondary_query, which_result=None)
-                
-                # Add these to our results
-                if not secondary_schools_isced.empty:
-                    for idx, row in secondary_schools_isced.iterrows():
-                        school_name = row.get("name", "Unnamed School")
-                        is_top = school_name in top_secondary_schools_dict
-                        secondary_schools.append({
-                            "name": school_name,
-                            "type": "secondary",
-                            "osm_id": row.get("osmid"),
-                            "is_top_rated": is_top,
-                            "rank": top_secondary_schools_dict.get(school_name, {}).get("rank") if is_top else None,
-                            "method": "isced_tag"
-                        })
-                
-                # Also try name-based identification
-                all_schools = ox.features_from_place(city, {"amenity": "school"})
-                if not all_schools.empty:
-                    name_filters = ["secondary", "high", "comprehensive", "academy", "college"]
-                    for idx, row in all_schools.iterrows():
-                        school_name = row.get("name", "Unnamed School")
-                        
-                        # Skip schools we already found
-                        if any(s["name"] == school_name for s in secondary_schools):
-                            continue
-                            
-                        # Check if it matches name keywords
-                        is_secondary = any(keyword in str(school_name).lower() for keyword in name_filters)
-                        is_top = school_name in top_secondary_schools_dict
-                        
-                        # Include if it matches keywords or is in our top list
-                        if is_secondary or is_top:
-                            secondary_schools.append({
-                                "name": school_name,
-                                "type": "secondary",
-                                "osm_id": row.get("osmid"),
-                                "is_top_rated": is_top,
-                                "rank": top_secondary_schools_dict.get(school_name, {}).get("rank") if is_top else None,
-                                "method": "name_keyword" if is_secondary else "top_list_match"
-                            })
-            except Exception as e:
-                return jsonify({"error": f"Error getting secondary schools: {str(e)}"}), 500
+        # Schools are classified once per city by the shared catalogue
+        try:
+            school_catalogue = get_school_catalogue(city)
+        except Exception as e:
+            return jsonify({"error": f"Error getting schools: {str(e)}"}), 500
         
-        # Get primary schools if needed
-        if school_filter == 'primary' or school_filter == 'both':
-            try:
-                # Try with ISCED tags first
-                primary_query = {"amenity": "school", "isced:level": ["0", "1", "0;1"]}
-                primary_schools_isced = ox.features_from_place(city, primary_query, which_result=None)
-                
-                # Add these to our results
-                if not primary_schools_isced.empty:
-                    for idx, row in primary_schools_isced.iterrows():
-                        school_name = row.get("name", "Unnamed School")
-                        is_top = school_name in top_primary_schools_dict
-                        primary_schools.append({
-                            "name": school_name,
-                            "type": "primary",
-                            "osm_id": row.get("osmid"),
-                            "is_top_rated": is_top,
-                            "rank": top_primary_schools_dict.get(school_name, {}).get("rank") if is_top else None,
-                            "method": "isced_tag"
-                        })
-                
-                # Also try name-based identification
-                all_schools = ox.features_from_place(city, {"amenity": "school"})
-                if not all_schools.empty:
-                    name_filters = ["primary", "junior", "infant", "elementary"]
-                    for idx, row in all_schools.iterrows():
-                        school_name = row.get("name", "Unnamed School")
-                        
-                        # Skip schools we already found
-                        if any(s["name"] == school_name for s in primary_schools):
-                            continue
-                            
-                        # Check if it matches name keywords
-                        is_primary = any(keyword in str(school_name).lower() for keyword in name_filters)
-                        is_top = school_name in top_primary_schools_dict
-                        
-                        # Include if it matches keywords or is in our top list
-                        if is_primary or is_top:
-                            primary_schools.append({
-                                "name": school_name,
-                                "type": "primary",
-                                "osm_id": row.get("osmid"),
-                                "is_top_rated": is_top,
-                                "rank": top_primary_schools_dict.get(school_name, {}).get("rank") if is_top else None,
-                                "method": "name_keyword" if is_primary else "top_list_match"
-                            })
-            except Exception as e:
-                return jsonify({"error": f"Error getting primary schools: {str(e)}"}), 500
+        secondary_schools = school_catalogue.records("secondary") if school_filter in ('secondary', 'both') else []
+        primary_schools = school_catalogue.records("primary") if school_filter in ('primary', 'both') else []
         
         # Combine results according to filter
         if school_filter == 'both':
@@ -0,0 +1,85 @@
+import math
+import os
+import threading
+
+import numpy as np
+import shapely
+
+# Simplification tolerance in degrees (~0.0001 deg is ~10 m at Cardiff); 0 disables it
+BOUNDARY_SIMPLIFY_TOLERANCE = float(os.environ.get("BOUNDARY_SIMPLIFY_TOLERANCE", "0.0001"))
+
+
+class CityBoundary:
+    """A city's boundary polygon, simplified and prepared once for fast point tests."""
+
+    def __init__(self, city, boundary_gdf, tolerance=BOUNDARY_SIMPLIFY_TOLERANCE):
+        self.city = city
+        self.source = boundary_gdf
+        polygon = boundary_gdf.union_all()
+        if tolerance:
+            polygon = shapely.simplify(polygon, tolerance, preserve_topology=True)
+        shapely.prepare(polygon)
+        self.polygon = polygon
+        self.bounds = polygon.bounds
+
+        minx, miny, maxx, maxy = self.bounds
+        bbox_area = (maxx - minx) * (maxy - miny)
+        # Fraction of the bounding box inside the city, used to size sampling batches
+        self.fill_ratio = polygon.area / bbox_area if bbox_area > 0 else 0
+
+    def contains(self, lons, lats):
+        """Vectorised point-in-boundary test for arrays of lon/lat"""
+        return shapely.contains_xy(self.polygon, lons, lats)
+
+    def sample_points(self, num_points, seed=None, max_attempts=None):
+        """Uniformly sample up to num_points lon/lat pairs inside the boundary.
+
+        Points are drawn in batches over the bounding box and tested with
+        contains_xy; pass a seed for reproducible samples."""
+        rng = np.random.default_rng(seed)
+        minx, miny, maxx, maxy = self.bounds
+        max_attempts = max_attempts or num_points * 20
+        ratio = max(self.fill_ratio, 0.01)
+
+        lons, lats = [], []
+        found = attempts = 0
+        while found < num_points and attempts < max_attempts:
+            batch = min(math.ceil((num_points - found) / ratio * 1.2) + 16, max_attempts - attempts)
+            xs = rng.uniform(minx, maxx, batch)
+            ys = rng.uniform(miny, maxy, batch)
+            inside = self.contains(xs, ys)
+            lons.append(xs[inside])
+            lats.append(ys[inside])
+            found += int(inside.sum())
+            attempts += batch
+
+        lons = np.concatenate(lons)[:num_points] if lons else np.empty(0)
+        lats = np.concatenate(lats)[:num_points] if lats else np.empty(0)
+        print(f"✅ Generated {len(lons)} points after {attempts} attempts")
+        return lons, lats
+
+
+class BoundaryCache:
+    """Prepared CityBoundary per city, rebuilt only when the boundary changes."""
+
+    def __init__(self, tolerance=BOUNDARY_SIMPLIFY_TOLERANCE):
+        self.tolerance = tolerance
+        self._boundaries = {}
+        self._lock = threading.Lock()
+
+    def get(self, city, boundary_gdf):
+        with self._lock:
+            boundary = self._boundaries.get(city)
+            if boundary is None or not _same_boundary(boundary.source, boundary_gdf):
+                boundary = CityBoundary(city, boundary_gdf, self.tolerance)
+                self._boundaries[city] = boundary
+            return boundary
+
+
+def _same_boundary(old_gdf, new_gdf):
+    if old_gdf is new_gdf:
+        return True
+    try:
+        return len(old_gdf) == len(new_gdf) and old_gdf.geometry.equals(new_gdf.geometry)
+    except Exception:
+        return False
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import shapely
+
+from projection import BRITISH_NATIONAL_GRID, WGS84, project_coords, to_wgs84
+
+SEARCH_MODES = ("random", "adaptive")
+
+# Cheap-score evaluations the adaptive search may spend per analysis
+ADAPTIVE_SEARCH_BUDGET = int(os.environ.get("ADAPTIVE_SEARCH_BUDGET", "240"))
+ADAPTIVE_COARSE_SPACING = float(os.environ.get("ADAPTIVE_COARSE_SPACING", "1000"))  # metres
+ADAPTIVE_MIN_SPACING = float(os.environ.get("ADAPTIVE_MIN_SPACING", "125"))  # metres
+# Best cells subdivided per refinement round
+ADAPTIVE_REFINE_TOP = int(os.environ.get("ADAPTIVE_REFINE_TOP", "8"))
+# Returned candidates are kept at least this far apart so they don't all land in one block
+ADAPTIVE_MIN_SEPARATION = float(os.environ.get("ADAPTIVE_MIN_SEPARATION", "300"))  # metres
+
+# Child cell centres relative to the parent centre, in units of the parent spacing
+_CHILD_OFFSETS = np.array([(-0.25, -0.25), (0.25, -0.25), (-0.25, 0.25), (0.25, 0.25)])
+
+
+def adaptive_search(city_boundary, score_fn, num_candidates, budget=ADAPTIVE_SEARCH_BUDGET,
+                    coarse_spacing=ADAPTIVE_COARSE_SPACING, min_spacing=ADAPTIVE_MIN_SPACING,
+                    refine_top=ADAPTIVE_REFINE_TOP, min_separation=ADAPTIVE_MIN_SEPARATION):
+    """Coarse-to-fine search for the best-scoring points inside a city boundary.
+
+    Scores a coarse British National Grid lattice with score_fn(lons, lats),
+    then repeatedly splits the best unrefined cells into four half-size
+    children until the evaluation budget or min_spacing is reached.
+
+    score_fn is called once per batch; the return value indexes the
+    concatenation of every batch it was given, best first."""
+    projected = shapely.transform(city_boundary.polygon, lambda c: project_coords(c, WGS84, BRITISH_NATIONAL_GRID))
+    minx, miny, maxx, maxy = projected.bounds
+    # Widen the coarse grid for big cities so it never uses more than half the budget
+    area = shapely.area(projected)
+    spacing = max(coarse_spacing, float(np.sqrt(area / max(budget // 2, 1))))
+
+    xs, ys = np.meshgrid(np.arange(minx + spacing / 2, maxx, spacing),
+                         np.arange(miny + spacing / 2, maxy, spacing))
+    xs, ys = xs.ravel(), ys.ravel()
+
+    all_x, all_y, all_spacing, all_scores = [], [], [], []
+    refined = np.zeros(0, dtype=bool)
+
+    def evaluate(x, y, cell_spacing):
+        nonlocal refined
+        lons, lats = to_wgs84(x, y)
+        lons, lats = np.asarray(lons), np.asarray(lats)
+        inside = city_boundary.contains(lons, lats)
+        x, y, lons, lats = x[inside], y[inside], lons[inside], lats[inside]
+        if len(x) == 0:
+            return 0
+        all_x.append(x)
+        all_y.append(y)
+        all_spacing.append(np.full(len(x), cell_spacing))
+        all_scores.append(np.asarray(score_fn(lons, lats), dtype=float))
+        refined = np.concatenate([refined, np.zeros(len(x), dtype=bool)])
+        return len(x)
+
+    evaluated = evaluate(xs, ys, spacing)
+    rounds = 0
+    while evaluated < budget:
+        scores = np.concatenate(all_scores)
+        spacings = np.concatenate(all_spacing)
+        open_cells = np.flatnonzero(~refined & (spacings / 2 >= min_spacing))
+        if len(open_cells) == 0:
+            break
+
+        # Never let the last round overshoot the budget
+        take = min(refine_top, len(open_cells), max((budget - evaluated) // len(_CHILD_OFFSETS), 1))
+        best = open_cells[np.argsort(-scores[open_cells], kind="stable")[:take]]
+        refined[best] = True
+
+        parent_x = np.concatenate(all_x)[best]
+        parent_y = np.concatenate(all_y)[best]
+        parent_spacing = spacings[best]
+        child_x = (parent_x[:, None] + _CHILD_OFFSETS[None, :, 0] * parent_spacing[:, None]).ravel()
+        child_y = (parent_y[:, None] + _CHILD_OFFSETS[None, :, 1] * parent_spacing[:, None]).ravel()
+        evaluated += evaluate(child_x, child_y, (parent_spacing / 2).repeat(len(_CHILD_OFFSETS)))
+        rounds += 1
+
+    if not all_scores:
+        print("⚠️ Adaptive search found no grid points inside the boundary")
+        return np.empty(0, dtype=np.int64)
+
+    selected = _separated_best(np.concatenate(all_x), np.concatenate(all_y),
+                               np.concatenate(all_scores), num_candidates, min_separation)
+    print(f"🎯 Adaptive search: {evaluated} cheap evaluations over {rounds} refinement rounds "
+          f"(coarse spacing {spacing:.0f} m), {len(selected)} candidates kept")
+    return selected
+
+
+def _separated_best(x, y, scores, num_candidates, min_separation):
+    """Greedily take the best-scoring points that are at least min_separation apart"""
+    order = np.argsort(-scores, kind="stable")
+    selected = []
+    for i in order:
+        if len(selected) >= num_candidates:
+            break
+        if selected and np.min(np.hypot(x[selected] - x[i], y[selected] - y[i])) < min_separation:
+            continue
+        selected.append(i)
+
+    # Small cities may not fit num_candidates separated points; top up with the rest
+    if len(selected) < num_candidates:
+        chosen = set(selected)
+        selected += [i for i in order if i not in chosen][:num_candidates - len(selected)]
+    return np.array(selected, dtype=np.int64)
@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+
+import requests
+
+# Consecutive failures that open a service's breaker
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "3"))
+# Seconds an open breaker rejects calls before letting a trial request through
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling a service whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Fails calls to a service fast after repeated failures.
+
+    Closed: calls go through. After failure_threshold consecutive failures
+    the breaker opens and rejects calls for reset_seconds, then half-opens
+    to let a single trial call decide whether it closes or opens again."""
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds=BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return CLOSED
+        if self.clock() - self.opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self):
+        """Whether a call may go ahead now"""
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                print(f"✅ {self.name} circuit closed")
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f"⚠️ {self.name} circuit opened after {self.failures} failures")
+                self.opened_at = self.clock()
+
+    def trip(self):
+        """Open the breaker now, e.g. when a health probe fails"""
+        with self._lock:
+            if self.opened_at is None:
+                print(f"⚠️ {self.name} circuit opened by health check")
+            self.failures = max(self.failures, self.failure_threshold)
+            self._trial_in_flight = False
+            self.opened_at = self.clock()
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open, not calling it")
+
+    def status(self):
+        return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
@@ -0,0 +1,220 @@
+"""Compiled GTFS feed: the CSV tables converted once into a binary .npz artifact.
+
+GTFSService compiles the feed on first start and reuses the artifact while
+the source files are unchanged. To build it ahead of a deploy:
+
+    python gtfs_cache.py --gtfs GTFS --out cache/gtfs.npz
+
+Feed IDs (route, stop, trip, service and shape) are dictionary-encoded to
+int32 codes with one dictionary per kind shared by every table, other text
+columns get a dictionary each, and stop times are stored as integer
+seconds after midnight (-1 where missing). Decoded tables use pandas
+categoricals, so workers hold each distinct string once instead of one
+Python object per row.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from raptor import parse_gtfs_times
+
+GTFS_CACHE_PATH = os.environ.get("GTFS_CACHE_PATH", str(Path(__file__).parent / "cache" / "gtfs.npz"))
+
+# Bump when the encoding changes so existing artifacts are rebuilt
+CACHE_FORMAT = 1
+
+TABLES = {
+    "routes": "routes.txt",
+    "stops": "stops.txt",
+    "stop_times": "stop_times.txt",
+    "trips": "trips.txt",
+    "shapes": "shapes.txt",
+}
+# Service calendars are optional in GTFS
+OPTIONAL_TABLES = {"calendar": "calendar.txt", "calendar_dates": "calendar_dates.txt"}
+ID_COLUMNS = ("route_id", "stop_id", "trip_id", "service_id", "shape_id")
+TIME_COLUMNS = ("arrival_time", "departure_time")
+MISSING = -1
+
+
+def source_files(gtfs_path):
+    """{table: path} for the feed files that exist"""
+    gtfs_path = Path(gtfs_path)
+    files = {table: gtfs_path / name for table, name in TABLES.items()}
+    files.update({table: gtfs_path / name for table, name in OPTIONAL_TABLES.items()
+                  if (gtfs_path / name).exists()})
+    return files
+
+
+def feed_signature(files):
+    """{table: [size, mtime_ns]}, a cheap check that the files are untouched"""
+    signature = {}
+    for table, path in sorted(files.items()):
+        stat = path.stat()
+        signature[table] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def feed_checksum(files):
+    """SHA-256 over the contents of the feed files"""
+    digest = hashlib.sha256()
+    for table, path in sorted(files.items()):
+        digest.update(table.encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def read_feed(files):
+    """{table: DataFrame} parsed from the CSV files"""
+    frames = {}
+    for table, path in files.items():
+        dtype = {"service_id": str} if table in OPTIONAL_TABLES else None
+        frames[table] = pd.read_csv(path, dtype=dtype)
+    return frames
+
+
+def _text_codes(column, categories):
+    codes = np.full(len(column), MISSING, dtype=np.int32)
+    present = column.notna().to_numpy()
+    codes[present] = pd.Index(categories).get_indexer(column[present].astype(str))
+    return codes
+
+
+def encode_feed(frames):
+    """(arrays, layout) for np.savez; layout maps table -> [[column, kind]]"""
+    arrays = {}
+    layout = {}
+    for kind in ID_COLUMNS:
+        values = [frame[kind].dropna().astype(str).to_numpy()
+                  for frame in frames.values() if kind in frame.columns]
+        arrays[f"ids.{kind}"] = np.array(pd.unique(np.concatenate(values)) if values else [], dtype=str)
+
+    for table, frame in frames.items():
+        columns = []
+        for column in frame.columns:
+            key = f"{table}.{column}"
+            if column in ID_COLUMNS:
+                kind = "id"
+                arrays[key] = _text_codes(frame[column], arrays[f"ids.{column}"])
+            elif column in TIME_COLUMNS:
+                kind = "time"
+                # Feeds repeat the same few thousand times, so parse each once
+                codes, uniques = pd.factorize(frame[column])
+                seconds = np.append(parse_gtfs_times(uniques), np.nan)[codes]
+                arrays[key] = np.where(np.isnan(seconds), MISSING, seconds).astype(np.int32)
+            elif frame[column].dtype == object:
+                kind = "text"
+                arrays[f"text.{key}"] = np.array(pd.unique(frame[column].dropna().astype(str)), dtype=str)
+                arrays[key] = _text_codes(frame[column], arrays[f"text.{key}"])
+            else:
+                kind = "raw"
+                arrays[key] = frame[column].to_numpy()
+            columns.append([column, kind])
+        layout[table] = columns
+    return arrays, layout
+
+
+def decode_feed(arrays, layout):
+    """{table: DataFrame} from encode_feed's output"""
+    # One categories index per ID kind so joins between tables compare codes
+    ids = {kind: pd.Index(arrays[f"ids.{kind}"].astype(object)) for kind in ID_COLUMNS if f"ids.{kind}" in arrays}
+    frames = {}
+    for table, columns in layout.items():
+        data = {}
+        for column, kind in columns:
+            values = arrays[f"{table}.{column}"]
+            if kind == "id":
+                data[column] = pd.Categorical.from_codes(values, categories=ids[column])
+            elif kind == "text":
+                categories = pd.Index(arrays[f"text.{table}.{column}"].astype(object))
+                data[column] = pd.Categorical.from_codes(values, categories=categories)
+            else:
+                data[column] = values
+        frames[table] = pd.DataFrame(data, columns=[column for column, _ in columns])
+    return frames
+
+
+def write_cache(out_path, arrays, layout, files, checksum=None):
+    meta = {
+        "format": CACHE_FORMAT,
+        "signature": feed_signature(files),
+        "checksum": checksum or feed_checksum(files),
+        "layout": layout,
+    }
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    # Workers may compile at the same time; each writes its own file and renames it into place
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_path, out_path)
+
+
+def read_cache(cache_path, files):
+    """(arrays, layout) from the artifact, or None if it is missing or stale"""
+    if not cache_path or not os.path.exists(cache_path):
+        return None
+    try:
+        with np.load(cache_path, allow_pickle=False) as npz:
+            meta = json.loads(str(npz["meta"]))
+            if meta.get("format") != CACHE_FORMAT or set(meta["signature"]) != set(files):
+                return None
+            # Files copied or touched keep the artifact if their contents are the same
+            checksum = None
+            if meta["signature"] != feed_signature(files):
+                checksum = feed_checksum(files)
+                if meta["checksum"] != checksum:
+                    return None
+            arrays = {key: npz[key] for key in npz.files if key != "meta"}
+    except Exception as e:
+        print(f"⚠️ Could not read GTFS cache {cache_path}: {e}")
+        return None
+
+    if checksum is not None:
+        # Record the new stat signature so later starts don't hash the feed again
+        try:
+            write_cache(cache_path, arrays, meta["layout"], files, checksum)
+        except Exception as e:
+            print(f"⚠️ Could not update GTFS cache {cache_path}: {e}")
+    return arrays, meta["layout"]
+
+
+def compile_feed(gtfs_path, out_path=GTFS_CACHE_PATH):
+    """Parse the feed's CSVs and write the artifact; returns (arrays, layout)"""
+    started = time.time()
+    files = source_files(gtfs_path)
+    arrays, layout = encode_feed(read_feed(files))
+    if out_path:
+        try:
+            write_cache(out_path, arrays, layout, files)
+            print(f"✅ Compiled GTFS feed to {out_path} in {time.time() - started:.1f}s")
+        except Exception as e:
+            print(f"⚠️ Could not write GTFS cache {out_path}: {e}")
+    return arrays, layout
+
+
+def load_feed(gtfs_path, cache_path=GTFS_CACHE_PATH):
+    """{table: DataFrame} for the feed, from the artifact when it is fresh, otherwise compiled from CSV"""
+    cached = read_cache(cache_path, source_files(gtfs_path))
+    if cached is not None:
+        print(f"✅ Loaded compiled GTFS feed from {cache_path}")
+        return decode_feed(*cached)
+    return decode_feed(*compile_feed(gtfs_path, cache_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a GTFS feed into the binary cache GTFSService loads")
+    parser.add_argument("--gtfs", default=str(Path(__file__).parent / "GTFS"), help="GTFS feed directory")
+    parser.add_argument("--out", default=GTFS_CACHE_PATH, help="Output .npz artifact")
+    args = parser.parse_args()
+    compile_feed(args.gtfs, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,93 @@ import pandas as pd
 from pathlib import Path
 import json
 import math
+import os
+import threading
+from datetime import datetime
+from gtfs_cache import GTFS_CACHE_PATH, load_feed
+from projection import to_bng
+from raptor import RaptorRouter
+from service_calendar import ServiceCalendar
+from stop_index import StopIndex
+
+# Day whose timetable transit scores count; trips not running that day are ignored
+GTFS_SERVICE_DATE = os.environ.get("GTFS_SERVICE_DATE", "2025-05-01")
 
 class GTFSService:
-    def __init__(self):
-        self.gtfs_path = Path(__file__).parent / 'GTFS'
+    def __init__(self, gtfs_path=None, cache_path=GTFS_CACHE_PATH):
+        self.gtfs_path = Path(gtfs_path) if gtfs_path else Path(__file__).parent / 'GTFS'
+        self.cache_path = cache_path
         self.routes_df = None
         self.stops_df = None
         self.stop_times_df = None
         self.trips_df = None
         self.shapes_df = None
+        self.stop_x = None
+        self.stop_y = None
+        self.stop_index = None
+        self.calendar = None
+        self.service_date = GTFS_SERVICE_DATE
+        self.trip_active = None
+        self.route_info = {}
+        self.stop_routes = {}
+        self.router = None
+        self._router_lock = threading.Lock()
+        self._router_service_masks = {}
         self.load_data()
 
     def load_data(self):
         """Load all GTFS data into memory"""
         print("Loading GTFS data...")
-        self.routes_df = pd.read_csv(self.gtfs_path / 'routes.txt')
-        self.stops_df = pd.read_csv(self.gtfs_path / 'stops.txt')
-        self.stop_times_df = pd.read_csv(self.gtfs_path / 'stop_times.txt')
-        self.trips_df = pd.read_csv(self.gtfs_path / 'trips.txt')
-        self.shapes_df = pd.read_csv(self.gtfs_path / 'shapes.txt')
+        feed = load_feed(self.gtfs_path, self.cache_path)
+        self.routes_df = feed['routes']
+        self.stops_df = feed['stops']
+        self.stop_times_df = feed['stop_times']
+        self.trips_df = feed['trips']
+        self.shapes_df = feed['shapes']
+
+        # Service calendars are optional in GTFS; without them every trip counts
+        self.calendar = ServiceCalendar(feed.get('calendar'), feed.get('calendar_dates'))
+        self.route_info = self._build_route_info()
+        self.set_service_date(self.service_date)
+
+        # Project stops once into British National Grid using the shared transformer registry
+        self.stop_x, self.stop_y = to_bng(self.stops_df['stop_lon'].to_numpy(), self.stops_df['stop_lat'].to_numpy())
+        self.stop_index = StopIndex(self.stop_x, self.stop_y)
         print("GTFS data loaded successfully")
 
+    def set_service_date(self, day):
+        """Only count trips running on this date in transit scores and route accessibility"""
+        self.service_date = day
+        self.trip_active = None
+        if self.calendar is not None and len(self.calendar):
+            if self.calendar.covers(day):
+                self.trip_active = self.calendar.active_mask(self.trips_df['service_id'], day)
+                print(f"📅 {int(self.trip_active.sum())} of {len(self.trip_active)} trips run on {day}")
+            else:
+                print(f"⚠️ {day} is outside the GTFS calendar ({self.calendar.start} to {self.calendar.end}), counting every trip")
+        self.stop_routes = self._build_stop_routes()
+
+    def _build_route_info(self):
+        """route_id -> {'name', 'ref'} for every route"""
+        route_info = {}
+        for route_id, long_name, short_name in zip(
+            self.routes_df['route_id'], self.routes_df['route_long_name'], self.routes_df['route_short_name']
+        ):
+            # Use route_short_name as name if route_long_name is not available
+            name = long_name if pd.notna(long_name) else f"Route {short_name}"
+            route_info.setdefault(route_id, {'name': name, 'ref': short_name})
+        return route_info
+
+    def _build_stop_routes(self):
+        """stop_id -> route_ids of the active trips calling there, in trips.txt order"""
+        trips = self.trips_df[['trip_id', 'route_id']]
+        if self.trip_active is not None:
+            trips = trips[self.trip_active]
+        trips = trips.assign(trip_order=range(len(trips)))
+        calls = self.stop_times_df[['stop_id', 'trip_id']].merge(trips, on='trip_id')
+        calls = calls.sort_values('trip_order', kind='stable').drop_duplicates(['stop_id', 'route_id'])
+        return {stop_id: group.tolist() for stop_id, group in calls.groupby('stop_id', sort=False, observed=True)['route_id']}
+
     def haversine_distance(self, lat1, lon1, lat2, lon2):
         """Calculate the great circle distance between two points"""
         R = 6371000  # Earth's radius in meters
@@ -34,112 +100,108 @@ class GTFSService:
         a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
         return 2*R*math.asin(math.sqrt(a))
 
+    def _stop_record(self, position, distance):
+        stop = self.stops_df.iloc[position]
+        return {
+            'stop_id': stop['stop_id'],
+            'name': stop['stop_name'],
+            'distance': distance,
+            'lat': stop['stop_lat'],
+            'lon': stop['stop_lon']
+        }
+
     def get_nearest_bus_stop(self, lat, lon, max_distance=1000):
         """Find the nearest bus stop within max_distance meters"""
-        min_distance = float('inf')
-        nearest_stop = None
-        
-        for _, stop in self.stops_df.iterrows():
-            distance = self.haversine_distance(lat, lon, stop['stop_lat'], stop['stop_lon'])
-            if distance < min_distance and distance <= max_distance:
-                min_distance = distance
-                nearest_stop = stop
-        
-        if nearest_stop is not None:
-            return {
-                'stop_id': nearest_stop['stop_id'],
-                'name': nearest_stop['stop_name'],
-                'distance': min_distance,
-                'lat': nearest_stop['stop_lat'],
-                'lon': nearest_stop['stop_lon']
-            }
-        return None
+        x, y = to_bng(lon, lat)
+        nearest = self.stop_index.nearest(x, y, max_distance)
+        if nearest is None:
+            return None
+        return self._stop_record(*nearest)
+
+    def get_nearest_bus_stops(self, lats, lons, max_distance=1000):
+        """Nearest bus stop (as get_nearest_bus_stop) or None for each of many points"""
+        xs, ys = to_bng(lons, lats)
+        positions, distances = self.stop_index.nearest_many(xs, ys, max_distance)
+        return [self._stop_record(int(p), float(d)) if p >= 0 else None for p, d in zip(positions, distances)]
+
+    def get_bus_stops_within(self, lat, lon, radius):
+        """Bus stops within radius meters, nearest first"""
+        positions, distances = self.stop_index.within(*to_bng(lon, lat), radius)
+        return [self._stop_record(int(p), float(d)) for p, d in zip(positions, distances)]
+
+    def get_k_nearest_bus_stops(self, lat, lon, k, max_distance=None):
+        """The k nearest bus stops, nearest first"""
+        positions, distances = self.stop_index.k_nearest(*to_bng(lon, lat), k, max_distance)
+        return [self._stop_record(int(p), float(d)) for p, d in zip(positions, distances)]
+
+    def _transit_profile(self, position, distance, max_distance):
+        if position < 0:
+            return {'score': 0, 'accessible_routes': []}
+        route_ids = self.stop_routes.get(self.stops_df['stop_id'].iat[position], [])
+        accessible_routes = [
+            {'route_id': route_id, **self.route_info[route_id], 'distance': distance}
+            for route_id in route_ids if route_id in self.route_info
+        ]
+        if not accessible_routes:
+            return {'score': 0, 'accessible_routes': []}
+
+        # Weight the score (70% for number of routes, 30% for distance)
+        route_score = min(len(accessible_routes) * 10, 70)  # Up to 70 points for number of routes
+        distance_score = max(30 * (1 - distance/max_distance), 0)  # Up to 30 points for distance
+        return {'score': round(route_score + distance_score, 1), 'accessible_routes': accessible_routes}
+
+    def transit_profile(self, lat, lon, max_distance=500):
+        """Transit score (0-100) and the routes serving the nearest stop within max_distance meters"""
+        return self.transit_profiles([lat], [lon], max_distance)[0]
+
+    def transit_profiles(self, lats, lons, max_distance=500):
+        """transit_profile for each of many points"""
+        xs, ys = to_bng(lons, lats)
+        positions, distances = self.stop_index.nearest_many(xs, ys, max_distance)
+        return [self._transit_profile(int(p), float(d), max_distance) for p, d in zip(positions, distances)]
 
     def get_route_accessibility(self, lat, lon, max_distance=500):
         """Get all bus routes accessible within max_distance meters"""
-        nearest_stop = self.get_nearest_bus_stop(lat, lon, max_distance)
-        if not nearest_stop:
-            return []
-        
-        # Get all trips that stop at this stop
-        stop_trips = self.stop_times_df[self.stop_times_df['stop_id'] == nearest_stop['stop_id']]
-        route_ids = self.trips_df[self.trips_df['trip_id'].isin(stop_trips['trip_id'])]['route_id'].unique()
-        
-        accessible_routes = []
-        for route_id in route_ids:
-            route = self.routes_df[self.routes_df['route_id'] == route_id].iloc[0]
-            # Use route_short_name as name if route_long_name is not available
-            route_name = route['route_long_name'] if pd.notna(route['route_long_name']) else f"Route {route['route_short_name']}"
-            accessible_routes.append({
-                'route_id': route_id,
-                'name': route_name,
-                'ref': route['route_short_name'],
-                'distance': nearest_stop['distance']
-            })
-        
-        return accessible_routes
+        return self.transit_profile(lat, lon, max_distance)['accessible_routes']
 
     def calculate_transit_score(self, lat, lon, max_distance=500):
         """Calculate a transit accessibility score (0-100)"""
-        accessible_routes = self.get_route_accessibility(lat, lon, max_distance)
-        if not accessible_routes:
-            return 0
-        
-        # Score based on number of routes and distance
-        num_routes = len(accessible_routes)
-        min_distance = min(route['distance'] for route in accessible_routes)
-        
-        # Weight the score (70% for number of routes, 30% for distance)
-        route_score = min(num_routes * 10, 70)  # Up to 70 points for number of routes
-        distance_score = max(30 * (1 - min_distance/max_distance), 0)  # Up to 30 points for distance
-        
-        return round(route_score + distance_score, 1)
+        return self.transit_profile(lat, lon, max_distance)['score']
+
+    def calculate_transit_scores(self, lats, lons, max_distance=500):
+        """calculate_transit_score for each of many points"""
+        return [profile['score'] for profile in self.transit_profiles(lats, lons, max_distance)]
+
+    def get_router(self):
+        """RAPTOR router over the loaded timetable, built on first use"""
+        with self._router_lock:
+            if self.router is None:
+                self.router = RaptorRouter(self.stops_df, self.trips_df, self.stop_times_df, self.stop_index)
+            return self.router
+
+    def router_service_mask(self, day):
+        """Which of the router's services run on a date, or None if the calendar doesn't cover it"""
+        router = self.get_router()
+        if self.calendar is None or not self.calendar.covers(day):
+            return None
+        if day not in self._router_service_masks:
+            self._router_service_masks[day] = self.calendar.active_mask(router.service_ids, day)
+        return self._router_service_masks[day]
+
+    def transit_minutes(self, origin, destination, departure, max_walk_m=None):
+        """Door-to-door minutes by bus and on foot between (lat, lon) points, leaving at an ISO datetime"""
+        dt = datetime.fromisoformat(departure)
+        seconds = dt.hour * 3600 + dt.minute * 60 + dt.second
+        return self.get_router().transit_minutes(origin, destination, seconds, self.router_service_mask(dt.date()),
+                                                 max_walk_m)
 
-    def calculate_transit_time(self, origin_lat, origin_lon, dest_lat, dest_lon, max_walking_distance=500):
+    def calculate_transit_time(self, origin_lat, origin_lon, dest_lat, dest_lon, max_walking_distance=500, *,
+                               departure="2025-05-01T08:00:00"):
         """Calculate transit time between two points using GTFS data."""
         try:
-            # Find nearest stops to origin and destination
-            origin_stop = self.get_nearest_bus_stop(origin_lat, origin_lon, max_walking_distance)
-            dest_stop = self.get_nearest_bus_stop(dest_lat, dest_lon, max_walking_distance)
-            
-            if not origin_stop or not dest_stop:
-                return None
-                
-            # Get walking times to/from stops (assuming 5km/h walking speed)
-            walking_speed = 5000/60  # meters per minute
-            origin_walk_time = origin_stop['distance'] / walking_speed
-            dest_walk_time = dest_stop['distance'] / walking_speed
-            
-            # Find trips that serve both stops
-            origin_stop_times = self.stop_times_df[self.stop_times_df['stop_id'] == origin_stop['stop_id']]
-            dest_stop_times = self.stop_times_df[self.stop_times_df['stop_id'] == dest_stop['stop_id']]
-            
-            common_trips = pd.merge(
-                origin_stop_times[['trip_id', 'arrival_time']],
-                dest_stop_times[['trip_id', 'arrival_time']],
-                on='trip_id',
-                suffixes=('_origin', '_dest')
-            )
-            
-            if common_trips.empty:
-                return None
-                
-            # Calculate transit time for each trip
-            common_trips['transit_time'] = pd.to_datetime(common_trips['arrival_time_dest']) - pd.to_datetime(common_trips['arrival_time_origin'])
-            min_transit_time = common_trips['transit_time'].min()
-            
-            if pd.isna(min_transit_time):
-                return None
-                
-            # Convert timedelta to minutes and add walking times
-            total_time = min_transit_time.total_seconds() / 60 + origin_walk_time + dest_walk_time
-            
-            # Add average wait time (half the typical bus frequency)
-            avg_wait_time = 10  # minutes
-            total_time += avg_wait_time
-            
-            return round(total_time, 1)
-            
+            minutes = self.transit_minutes((origin_lat, origin_lon), (dest_lat, dest_lon), departure,
+                                           max_walking_distance)
+            return round(minutes, 1) if minutes is not None else None
         except Exception as e:
             print(f"Error calculating transit time: {str(e)}")
             return None
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from circuit_breaker import OPEN, CircuitBreaker
+
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", "0.3"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3.05"))
+
+# Default read timeout (seconds) per external service
+SERVICE_READ_TIMEOUTS = {
+    "ors": float(os.environ.get("ORS_READ_TIMEOUT", "15")),
+    "otp": float(os.environ.get("OTP_READ_TIMEOUT", "15")),
+    "otp-local": float(os.environ.get("OTP_READ_TIMEOUT", "15")),
+    "postcodes": float(os.environ.get("POSTCODES_READ_TIMEOUT", "10")),
+    "overpass": float(os.environ.get("OVERPASS_READ_TIMEOUT", "100")),
+}
+
+# Gateway errors worth retrying; every call we make is a read, so POSTs are retried too.
+# Read timeouts are not retried: a hung upstream should fail after one read timeout
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class HttpClient:
+    """One keep-alive connection pool per external service.
+
+    Each service gets its own requests.Session with a bounded pool, retries
+    with exponential backoff on connect errors and gateway responses, a
+    (connect, read) timeout applied when the caller doesn't pass one, and a
+    circuit breaker that fails calls fast while the service keeps failing."""
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES,
+                 backoff_factor=HTTP_BACKOFF_FACTOR, connect_timeout=HTTP_CONNECT_TIMEOUT,
+                 read_timeouts=SERVICE_READ_TIMEOUTS):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.connect_timeout = connect_timeout
+        self.read_timeouts = read_timeouts
+        self._sessions = {}
+        self._breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def session(self, service):
+        with self._lock:
+            if service not in self._sessions:
+                retry = Retry(
+                    total=self.max_retries,
+                    connect=self.max_retries,
+                    read=0,
+                    other=0,
+                    status=self.max_retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=None,
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size,
+                                      max_retries=retry, pool_block=False)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[service] = session
+                self._breakers[service] = CircuitBreaker(service)
+                self._stats[service] = {"requests": 0, "errors": 0, "in_flight": 0,
+                                        "max_in_flight": 0, "total_seconds": 0.0}
+            return self._sessions[service]
+
+    def breaker(self, service):
+        self.session(service)
+        return self._breakers[service]
+
+    def timeout(self, service):
+        return (self.connect_timeout, self.read_timeouts.get(service, 30))
+
+    def request(self, service, method, url, use_breaker=True, **kwargs):
+        """Send a request; raises CircuitOpenError without sending if the service's breaker is open.
+
+        Health probes pass use_breaker=False so they can reach a service the breaker shuts out."""
+        session = self.session(service)
+        breaker = self._breakers[service] if use_breaker else None
+        if breaker is not None:
+            breaker.check()
+        kwargs.setdefault("timeout", self.timeout(service))
+        stats = self._stats[service]
+        with self._lock:
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        started = time.time()
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception:
+            # Any exception ends the call, so it must also end a half-open breaker's trial
+            with self._lock:
+                stats["errors"] += 1
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        finally:
+            with self._lock:
+                stats["in_flight"] -= 1
+                stats["total_seconds"] += time.time() - started
+        if breaker is not None:
+            # Client errors (e.g. ORS 404 for an unroutable point) mean the service is up
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return response
+
+    def get(self, service, url, **kwargs):
+        return self.request(service, "GET", url, **kwargs)
+
+    def post(self, service, url, **kwargs):
+        return self.request(service, "POST", url, **kwargs)
+
+    def is_open(self, service):
+        """Whether calls to a service are currently being rejected"""
+        return service in self._breakers and self._breakers[service].state == OPEN
+
+    def stats(self):
+        """Request counts, latency and connection-pool usage per service"""
+        with self._lock:
+            services = {}
+            for service, stats in self._stats.items():
+                entry = dict(stats)
+                entry["avg_ms"] = round(stats["total_seconds"] / stats["requests"] * 1000, 1) if stats["requests"] else 0
+                entry["total_seconds"] = round(stats["total_seconds"], 3)
+                entry["timeout"] = list(self.timeout(service))
+                entry["pools"] = _pool_stats(self._sessions[service])
+                entry["breaker"] = self._breakers[service].status()
+                services[service] = entry
+            return {"pool_size": self.pool_size, "max_retries": self.max_retries, "services": services}
+
+
+def _pool_stats(session):
+    """Connections opened vs requests served per host; requests >> connections means keep-alive works"""
+    pools = []
+    for adapter in dict.fromkeys(session.adapters.values()):
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": pool.pool.qsize() if pool.pool is not None else 0
+            })
+    return pools
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Process-wide shared HttpClient"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,64 @@
+import os
+
+from http_client import get_http_client
+
+# openrouteservice matrix limits (matrix.maximum_routes / request size in ors-config)
+ORS_MATRIX_MAX_ROUTES = int(os.environ.get("ORS_MATRIX_MAX_ROUTES", "2500"))
+ORS_MATRIX_MAX_LOCATIONS = int(os.environ.get("ORS_MATRIX_MAX_LOCATIONS", "1000"))
+
+
+class OrsMatrixClient:
+    """Durations from many origins to a few destinations via /v2/matrix/{profile}.
+
+    Origins and destinations are (lat, lon) tuples. Requests are chunked so
+    each stays within the server's route (sources x destinations) and
+    location limits."""
+
+    def __init__(self, base_url, max_routes=ORS_MATRIX_MAX_ROUTES,
+                 max_locations=ORS_MATRIX_MAX_LOCATIONS, http=None):
+        self.base_url = base_url.rstrip("/")
+        self.http = http or get_http_client()
+        self.max_routes = max_routes
+        self.max_locations = max_locations
+        self.requests_made = 0
+
+    def chunks(self, num_origins, num_destinations):
+        """(origin slice, destination slice) pairs covering the full matrix within the limits"""
+        dest_size = max(1, min(num_destinations, self.max_routes, self.max_locations // 2))
+        origin_size = max(1, min(self.max_routes // dest_size, self.max_locations - dest_size))
+        return [
+            (slice(o, o + origin_size), slice(d, d + dest_size))
+            for o in range(0, num_origins, origin_size)
+            for d in range(0, num_destinations, dest_size)
+        ]
+
+    def durations(self, origins, destinations, profile):
+        """{(origin, destination): minutes or None} for every origin/destination pair"""
+        origins = list(dict.fromkeys(origins))
+        destinations = list(dict.fromkeys(destinations))
+        results = {}
+        for origin_slice, dest_slice in self.chunks(len(origins), len(destinations)):
+            chunk_origins = origins[origin_slice]
+            chunk_destinations = destinations[dest_slice]
+            matrix = self._request(chunk_origins, chunk_destinations, profile)
+            for row, origin in zip(matrix, chunk_origins):
+                for seconds, destination in zip(row, chunk_destinations):
+                    results[(origin, destination)] = seconds / 60 if seconds is not None else None
+        return results
+
+    def _request(self, origins, destinations, profile):
+        locations = [[lon, lat] for lat, lon in origins + destinations]
+        body = {
+            "locations": locations,
+            "sources": list(range(len(origins))),
+            "destinations": list(range(len(origins), len(locations))),
+            "metrics": ["duration"]
+        }
+        response = self.http.post("ors", f"{self.base_url}/v2/matrix/{profile}", json=body)
+        self.requests_made += 1
+        response.raise_for_status()
+        durations = response.json().get("durations")
+        if durations is None or len(durations) != len(origins):
+            raise ValueError(f"ORS matrix returned no durations for {profile}")
+        return durations
+
@@ -1,10 +1,15 @@
 import requests
 import sys
 
+from http_client import get_http_client
+
+# The local development OTP server; its own breaker, separate from the app's OTP_API_URL ("otp")
+OTP_LOCAL_SERVICE = "otp-local"
+
 def check_otp_server():
     try:
         # Try to connect to the OTP server
-        response = requests.get("http://localhost:8080/otp", timeout=5)
+        response = get_http_client().get(OTP_LOCAL_SERVICE, "http://localhost:8080/otp", timeout=5)
         if response.status_code == 200:
             print("OTP server is running!")
             return True
@@ -43,7 +48,7 @@ def run_otp_query(query_string, variables=None):
             payload["variables"] = variables
             
         # Make the request
-        response = requests.post(url, json=payload, timeout=15)
+        response = get_http_client().post(OTP_LOCAL_SERVICE, url, json=payload)
         
         # Check if the request was successful
         if response.status_code != 200:
@@ -66,7 +71,7 @@ def run_otp_query(query_string, variables=None):
 
 def list_available_routers():
     try:
-        response = requests.get("http://localhost:8080/otp/routers", timeout=5)
+        response = get_http_client().get(OTP_LOCAL_SERVICE, "http://localhost:8080/otp/routers", timeout=5)
         if response.status_code == 200:
             try:
                 routers = response.json()
@@ -88,7 +93,7 @@ def list_available_routers():
 
 def get_route(from_place, to_place, router="default", mode="TRANSIT,WALK", max_walk_distance=1000, num_itineraries=3):
     try:
-        res = requests.get(f"http://localhost:8080/otp/routers/{router}/plan", params={
+        res = get_http_client().get(OTP_LOCAL_SERVICE, f"http://localhost:8080/otp/routers/{router}/plan", params={
             "fromPlace": from_place,
             "toPlace": to_place,
             "mode": mode,
@@ -0,0 +1,91 @@
+import os
+from functools import lru_cache
+
+from http_client import get_http_client
+
+# Plans packed into one GraphQL document; OTP resolves aliased fields one after another,
+# so larger batches save round trips but make each request slower
+OTP_BATCH_SIZE = int(os.environ.get("OTP_BATCH_SIZE", "25"))
+
+
+@lru_cache(maxsize=32)
+def build_plan_query(count):
+    """GraphQL document planning count trips at once, aliased p0..p{count-1}.
+
+    Places are passed as $from{i}/$to{i} variables and all plans share
+    $date and $time, so the document only depends on the batch size."""
+    params = ["$date: String!", "$time: String!"]
+    fields = []
+    for i in range(count):
+        params += [f"$from{i}: String!", f"$to{i}: String!"]
+        fields.append(
+            f"  p{i}: plan(fromPlace: $from{i}, toPlace: $to{i}, date: $date, time: $time) "
+            "{ itineraries { duration } }"
+        )
+    return f"query BatchPlan({', '.join(params)}) {{\n" + "\n".join(fields) + "\n}"
+
+
+class OtpBatchPlanner:
+    """Fastest TRANSIT+WALK durations for many origin/destination pairs from OTP.
+
+    Pairs are (lat, lon) tuples planned batch_size at a time, each batch
+    in one aliased GraphQL request. A failed batch, or a plan OTP reported
+    an error for, is left unanswered rather than treated as unreachable."""
+
+    def __init__(self, api_url, batch_size=OTP_BATCH_SIZE, http=None):
+        self.api_url = api_url
+        self.batch_size = max(1, batch_size)
+        self.http = http or get_http_client()
+        self.requests_made = 0
+
+    def _request(self, pairs, dt_iso):
+        """{index in pairs: minutes or None} for the plans OTP answered; raises if the request failed"""
+        variables = {"date": dt_iso[:10], "time": dt_iso[11:19]}
+        for i, ((lat1, lon1), (lat2, lon2)) in enumerate(pairs):
+            variables[f"from{i}"] = f"{lat1},{lon1}"
+            variables[f"to{i}"] = f"{lat2},{lon2}"
+        response = self.http.post("otp", self.api_url,
+                                  json={"query": build_plan_query(len(pairs)), "variables": variables})
+        self.requests_made += 1
+        response.raise_for_status()
+        body = response.json()
+        data = body.get("data")
+        errors = body.get("errors") or []
+        if not data:
+            message = errors[0].get("message") if errors else "no data"
+            raise ValueError(f"OTP GraphQL error: {message}")
+
+        # Errors carry the alias of the plan they belong to in their path
+        failed = {error["path"][0] for error in errors if error.get("path")}
+        results = {}
+        for i in range(len(pairs)):
+            alias = f"p{i}"
+            if alias in failed or alias not in data:
+                continue
+            durations = [itinerary["duration"] for itinerary in (data[alias] or {}).get("itineraries") or []
+                         if itinerary.get("duration")]
+            results[i] = min(durations) / 60 if durations else None
+        return results
+
+    def _plan(self, pairs, dt_iso):
+        answered = {}
+        for start in range(0, len(pairs), self.batch_size):
+            batch = pairs[start:start + self.batch_size]
+            try:
+                results = self._request(batch, dt_iso)
+            except Exception as e:
+                print(f"⚠️ OTP batch of {len(batch)} plans failed: {str(e)}")
+                continue
+            answered.update({start + i: minutes for i, minutes in results.items()})
+        return answered
+
+    def plan_many(self, pairs, dt_iso):
+        """Minutes for each (origin, destination) pair in input order; None if unanswered or no itinerary"""
+        pairs = list(pairs)
+        answered = self._plan(pairs, dt_iso)
+        return [answered.get(i) for i in range(len(pairs))]
+
+    def durations(self, origins, destinations, dt_iso):
+        """{(origin, destination): minutes or None} for origins[i] -> destinations[i], answered pairs only"""
+        pairs = list(dict.fromkeys(zip(origins, destinations)))
+        return {pairs[i]: minutes for i, minutes in self._plan(pairs, dt_iso).items()}
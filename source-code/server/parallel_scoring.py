@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Worker processes for per-candidate scoring; 0 or 1 scores in-process
+SCORING_WORKERS = int(os.environ.get("SCORING_WORKERS", "0"))
+# forkserver or spawn: workers never fork the threaded Flask process
+SCORING_START_METHOD = os.environ.get("SCORING_START_METHOD", "forkserver")
+# Smallest batch worth shipping to the pool; below this it runs in-process
+MIN_PARALLEL_POINTS = int(os.environ.get("SCORING_MIN_PARALLEL_POINTS", "32"))
+
+# Each worker's own GTFS service, loaded once by the pool initializer
+_worker_gtfs = None
+
+
+def _init_worker(load_gtfs):
+    global _worker_gtfs
+    _worker_gtfs = load_gtfs()
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def _transit_scores_chunk(lats, lons):
+    return _worker_gtfs.calculate_transit_scores(lats, lons)
+
+
+class CandidateScorer:
+    """Per-candidate transit scoring, spread over a process pool when configured.
+
+    Amenity distances are already vectorised in the parent; the GTFS transit
+    score is the per-point cost left, so that is what the pool parallelises.
+    Workers are started with forkserver or spawn and load their own GTFS
+    service through load_gtfs, a picklable callable such as the GTFSService
+    class. Results come back in input order."""
+
+    def __init__(self, gtfs_service, load_gtfs, workers=SCORING_WORKERS, start_method=SCORING_START_METHOD):
+        self.gtfs_service = gtfs_service
+        self.load_gtfs = load_gtfs
+        self.workers = workers if workers > 1 else 0
+        if start_method not in ("forkserver", "spawn") or start_method not in multiprocessing.get_all_start_methods():
+            start_method = "spawn"
+        self.start_method = start_method
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker pool; call at startup, before the app starts any threads"""
+        with self._lock:
+            if not self.workers or self._pool is not None:
+                return
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(self.load_gtfs,),
+            )
+            # Bring every worker up now so GTFS loading isn't paid by the first request
+            for _ in range(self.workers):
+                self._pool.submit(_worker_ready)
+            print(f"⚙️ Started candidate scoring pool with {self.workers} {self.start_method} workers")
+
+    def _score_in_process(self, lats, lons):
+        return np.array(self.gtfs_service.calculate_transit_scores(lats, lons), dtype=float)
+
+    def transit_scores(self, lats, lons):
+        """GTFS transit score (0-100) for every point"""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        pool = self._pool
+        if pool is None or len(lats) < MIN_PARALLEL_POINTS:
+            return self._score_in_process(lats, lons)
+
+        chunks = np.array_split(np.arange(len(lats)), self.workers * 4)
+        try:
+            futures = [pool.submit(_transit_scores_chunk, lats[c], lons[c]) for c in chunks if len(c)]
+            return np.array([score for future in futures for score in future.result()], dtype=float)
+        except Exception as e:
+            print(f"⚠️ Scoring pool failed, scoring in-process: {e}")
+            self.shutdown()
+            return self._score_in_process(lats, lons)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
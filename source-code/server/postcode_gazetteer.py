@@ -0,0 +1,166 @@
+"""Offline postcode -> coordinates table built from the ONS Postcode Directory.
+
+Build a table for a region from the ONSPD CSV, e.g. for Wales:
+
+    python postcode_gazetteer.py ONSPD_FEB_2025_UK.csv --filter ctry=W92000004
+
+or just Cardiff with --filter oslaua=W06000015.
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+POSTCODE_GAZETTEER_PATH = os.environ.get(
+    "POSTCODE_GAZETTEER_PATH", str(Path(__file__).parent / "data" / "postcodes.npy")
+)
+
+# Coordinates are stored as int32 micro-degrees (~0.1 m resolution)
+COORD_SCALE = 1_000_000
+# Normalized UK postcodes are at most 7 characters (e.g. SW1A1AA)
+KEY_LENGTH = 7
+GAZETTEER_DTYPE = np.dtype([("key", f"S{KEY_LENGTH}"), ("lat", "<i4"), ("lon", "<i4")])
+
+# ONSPD uses this latitude for postcodes without a grid reference
+ONSPD_NO_LOCATION_LAT = 99.999999
+
+
+def normalize_postcode(postcode):
+    """Lookup key for a postcode: uppercase with all whitespace removed"""
+    return "".join(str(postcode or "").split()).upper()
+
+
+def format_postcode(key):
+    """Display form of a normalized postcode ("CF101AA" -> "CF10 1AA")"""
+    return f"{key[:-3]} {key[-3:]}" if len(key) > 3 else key
+
+
+class PostcodeGazetteer:
+    """Sorted postcode table, memory-mapped and binary-searched.
+
+    The file is a structured .npy array opened with mmap_mode="r", so
+    workers share the OS page cache instead of each loading a copy."""
+
+    def __init__(self, path=POSTCODE_GAZETTEER_PATH):
+        self.path = str(path)
+        self.table = np.load(self.path, mmap_mode="r")
+        if self.table.dtype != GAZETTEER_DTYPE:
+            raise ValueError(f"{self.path} is not a postcode gazetteer table")
+        self.keys = self.table["key"]
+
+    def __len__(self):
+        return len(self.table)
+
+    def _find(self, key):
+        encoded = key.encode("ascii", "ignore")
+        if not encoded or len(encoded) > KEY_LENGTH:
+            return None
+        i = int(np.searchsorted(self.keys, encoded))
+        if i < len(self.keys) and self.keys[i] == encoded:
+            return i
+        return None
+
+    def lookup(self, postcode):
+        """(lat, lon) for a postcode, or None if it isn't in the table"""
+        i = self._find(normalize_postcode(postcode))
+        if i is None:
+            return None
+        row = self.table[i]
+        return int(row["lat"]) / COORD_SCALE, int(row["lon"]) / COORD_SCALE
+
+    def lookup_many(self, postcodes):
+        """{normalized postcode: (lat, lon)} for the postcodes found in the table"""
+        found = {}
+        for postcode in postcodes:
+            key = normalize_postcode(postcode)
+            coords = self.lookup(key)
+            if coords is not None:
+                found[key] = coords
+        return found
+
+
+def load_gazetteer(path=POSTCODE_GAZETTEER_PATH):
+    """The gazetteer at path, or None if no table has been built"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        gazetteer = PostcodeGazetteer(path)
+        print(f"✅ Loaded postcode gazetteer with {len(gazetteer)} postcodes")
+        return gazetteer
+    except Exception as e:
+        print(f"⚠️ Could not open postcode gazetteer {path}: {e}")
+        return None
+
+
+def build_gazetteer(csv_path, out_path=POSTCODE_GAZETTEER_PATH, filters=None,
+                    include_terminated=False, chunksize=500_000):
+    """Write a sorted gazetteer table from an ONSPD CSV, keeping rows matching filters.
+
+    filters maps ONSPD column names (ctry, rgn, oslaua, pcon, ...) to sets
+    of accepted codes. Returns the number of postcodes written."""
+    filters = filters or {}
+    usecols = ["pcds", "lat", "long", "doterm", *filters]
+    started = time.time()
+    parts = []
+    for chunk in pd.read_csv(csv_path, usecols=lambda c: c in usecols, dtype=str, chunksize=chunksize):
+        mask = pd.Series(True, index=chunk.index)
+        for column, values in filters.items():
+            mask &= chunk[column].isin(values)
+        if not include_terminated and "doterm" in chunk:
+            mask &= chunk["doterm"].isna() | (chunk["doterm"].str.strip() == "")
+        chunk = chunk[mask]
+
+        lats = pd.to_numeric(chunk["lat"], errors="coerce")
+        lons = pd.to_numeric(chunk["long"], errors="coerce")
+        located = lats.notna() & lons.notna() & (lats < ONSPD_NO_LOCATION_LAT - 1e-6)
+        keys = chunk["pcds"].str.replace(r"\s+", "", regex=True).str.upper()
+        located &= keys.str.len().between(1, KEY_LENGTH)
+
+        part = np.empty(int(located.sum()), dtype=GAZETTEER_DTYPE)
+        part["key"] = keys[located].to_numpy(dtype=f"S{KEY_LENGTH}")
+        part["lat"] = np.rint(lats[located].to_numpy() * COORD_SCALE).astype(np.int32)
+        part["lon"] = np.rint(lons[located].to_numpy() * COORD_SCALE).astype(np.int32)
+        parts.append(part)
+
+    table = np.concatenate(parts) if parts else np.empty(0, dtype=GAZETTEER_DTYPE)
+    table = table[np.argsort(table["key"], kind="stable")]
+    # Keep one row per postcode so the binary search is unambiguous
+    if len(table):
+        keep = np.ones(len(table), dtype=bool)
+        keep[1:] = table["key"][1:] != table["key"][:-1]
+        table = table[keep]
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{out_path}.tmp.npy"
+    np.save(tmp_path, table)
+    os.replace(tmp_path, out_path)
+    print(f"✅ Wrote {len(table)} postcodes to {out_path} in {time.time() - started:.1f}s")
+    return len(table)
+
+
+def _parse_filters(specs):
+    filters = {}
+    for spec in specs or []:
+        column, _, values = spec.partition("=")
+        if not column or not values:
+            raise argparse.ArgumentTypeError(f"Invalid filter '{spec}', expected COLUMN=CODE[,CODE...]")
+        filters.setdefault(column.strip(), set()).update(v.strip() for v in values.split(","))
+    return filters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline postcode gazetteer from an ONSPD CSV")
+    parser.add_argument("csv", help="ONS Postcode Directory CSV (e.g. ONSPD_FEB_2025_UK.csv)")
+    parser.add_argument("--out", default=POSTCODE_GAZETTEER_PATH, help="Output .npy table")
+    parser.add_argument("--filter", action="append", metavar="COLUMN=CODE[,CODE...]",
+                        help="Keep rows whose ONSPD column has one of these codes (repeatable)")
+    parser.add_argument("--include-terminated", action="store_true", help="Keep terminated postcodes")
+    args = parser.parse_args()
+    build_gazetteer(args.csv, args.out, _parse_filters(args.filter), args.include_terminated)
+
+
+if __name__ == "__main__":
+    main()
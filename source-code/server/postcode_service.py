@@ -0,0 +1,157 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from http_client import get_http_client
+from postcode_gazetteer import POSTCODE_GAZETTEER_PATH, format_postcode, load_gazetteer, normalize_postcode
+
+POSTCODES_API_URL = "https://api.postcodes.io/postcodes"
+POSTCODE_CACHE_PATH = os.environ.get(
+    "POSTCODE_CACHE_PATH", str(Path(__file__).parent / "cache" / "postcodes.sqlite")
+)
+POSTCODE_CACHE_TTL_DAYS = float(os.environ.get("POSTCODE_CACHE_TTL_DAYS", "30"))
+# Unknown postcodes are remembered for a shorter time in case they are newly issued
+POSTCODE_NEGATIVE_TTL_HOURS = float(os.environ.get("POSTCODE_NEGATIVE_TTL_HOURS", "24"))
+# Set to false on hosts without outbound internet to rely on the local gazetteer only
+POSTCODE_API_FALLBACK = os.environ.get("POSTCODE_API_FALLBACK", "true").lower() in ("1", "true", "yes")
+# postcodes.io accepts at most 100 postcodes per bulk request
+BULK_LOOKUP_LIMIT = 100
+
+
+class PostcodeService:
+    """Postcode lookups from the local gazetteer, then postcodes.io behind a persistent SQLite cache.
+
+    Postcodes in the offline gazetteer never touch the network. Others are
+    cached by normalized postcode for ttl_days; postcodes the API doesn't know
+    are cached as misses for negative_ttl_hours. Uncached postcodes are
+    resolved together through the bulk POST /postcodes endpoint, unless
+    api_fallback is off. Network failures are never cached."""
+
+    def __init__(self, db_path=POSTCODE_CACHE_PATH, ttl_days=POSTCODE_CACHE_TTL_DAYS,
+                 negative_ttl_hours=POSTCODE_NEGATIVE_TTL_HOURS, api_url=POSTCODES_API_URL, http=None,
+                 gazetteer=None, api_fallback=True):
+        self.gazetteer = gazetteer
+        self.api_fallback = api_fallback
+        self.db_path = str(db_path)
+        self.ttl_seconds = ttl_days * 86400
+        self.negative_ttl_seconds = negative_ttl_hours * 3600
+        self.api_url = api_url
+        self.http = http or get_http_client()
+        self._lock = threading.Lock()
+        self.stats = {"gazetteer_hits": 0, "hits": 0, "negative_hits": 0, "misses": 0, "api_requests": 0, "errors": 0}
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postcodes ("
+                "key TEXT PRIMARY KEY, result TEXT, fetched_at REAL NOT NULL)"
+            )
+
+    def _cached(self, keys):
+        """{key: result or None} for keys with an unexpired cache entry"""
+        now = time.time()
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, result, fetched_at FROM postcodes WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, result, fetched_at in rows:
+                    ttl = self.ttl_seconds if result is not None else self.negative_ttl_seconds
+                    if now - fetched_at < ttl:
+                        found[key] = json.loads(result) if result is not None else None
+        return found
+
+    def _store(self, results):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO postcodes (key, result, fetched_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(result) if result is not None else None, now) for key, result in results.items()]
+            )
+
+    def _fetch_bulk(self, keys):
+        """Resolve keys with bulk POST /postcodes; raises on network or API failure"""
+        results = {}
+        for start in range(0, len(keys), BULK_LOOKUP_LIMIT):
+            chunk = keys[start:start + BULK_LOOKUP_LIMIT]
+            self.stats["api_requests"] += 1
+            response = self.http.post("postcodes", self.api_url, json={"postcodes": chunk})
+            response.raise_for_status()
+            for item in response.json().get("result", []):
+                results[normalize_postcode(item.get("query"))] = item.get("result")
+        # Anything the API didn't echo back is unknown to it
+        return {key: results.get(key) for key in keys}
+
+    def lookup_many(self, postcodes):
+        """{normalized postcode: postcodes.io result dict or None}.
+
+        Raises requests exceptions if uncached postcodes couldn't be fetched."""
+        keys = list(dict.fromkeys(normalize_postcode(p) for p in postcodes if normalize_postcode(p)))
+        results = {}
+        if self.gazetteer is not None:
+            for key, (lat, lon) in self.gazetteer.lookup_many(keys).items():
+                results[key] = {"postcode": format_postcode(key), "latitude": lat, "longitude": lon,
+                                "source": "gazetteer"}
+            self.stats["gazetteer_hits"] += len(results)
+            keys = [key for key in keys if key not in results]
+        if not self.api_fallback:
+            results.update({key: None for key in keys})
+            return results
+
+        cached = self._cached(keys)
+        for result in cached.values():
+            self.stats["hits" if result is not None else "negative_hits"] += 1
+        results.update(cached)
+
+        missing = [key for key in keys if key not in results]
+        if missing:
+            self.stats["misses"] += len(missing)
+            try:
+                fetched = self._fetch_bulk(missing)
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            self._store(fetched)
+            results.update(fetched)
+        return results
+
+    def lookup(self, postcode):
+        """postcodes.io result dict for one postcode, or None if it doesn't exist"""
+        return self.lookup_many([postcode]).get(normalize_postcode(postcode))
+
+    def coordinates_many(self, postcodes):
+        """{normalized postcode: {"lat", "lon"} or None}; lookup failures resolve to None"""
+        try:
+            results = self.lookup_many(postcodes)
+        except Exception as e:
+            print(f"Error getting coordinates from postcodes: {str(e)}")
+            return {normalize_postcode(p): None for p in postcodes}
+        return {
+            key: {"lat": float(result["latitude"]), "lon": float(result["longitude"])}
+            if result and result.get("latitude") is not None else None
+            for key, result in results.items()
+        }
+
+    def coordinates(self, postcode):
+        return self.coordinates_many([postcode]).get(normalize_postcode(postcode))
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_postcode_service():
+    """Process-wide shared PostcodeService"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PostcodeService(gazetteer=load_gazetteer(POSTCODE_GAZETTEER_PATH),
+                                       api_fallback=POSTCODE_API_FALLBACK)
+        return _service
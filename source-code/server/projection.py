@@ -0,0 +1,43 @@
+import threading
+
+import numpy as np
+import pyproj
+
+WGS84 = "EPSG:4326"
+# British National Grid: metric, low-distortion CRS for distances in Wales/England
+BRITISH_NATIONAL_GRID = "EPSG:27700"
+
+_transformers = {}
+_transformers_lock = threading.Lock()
+
+
+def get_transformer(src_crs, dst_crs):
+    """Return the shared always_xy Transformer between two CRSs, creating it once.
+
+    pyproj Transformers are thread-safe, so a single instance per CRS pair is
+    shared by the request handlers, the amenity indexes and GTFSService."""
+    key = (src_crs, dst_crs)
+    transformer = _transformers.get(key)
+    if transformer is None:
+        with _transformers_lock:
+            transformer = _transformers.get(key)
+            if transformer is None:
+                transformer = pyproj.Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+                _transformers[key] = transformer
+    return transformer
+
+
+def to_bng(lons, lats):
+    """Project WGS84 lon/lat (scalars or arrays) to British National Grid x/y metres"""
+    return get_transformer(WGS84, BRITISH_NATIONAL_GRID).transform(lons, lats)
+
+
+def to_wgs84(x, y):
+    """Project British National Grid x/y metres back to WGS84 lon/lat"""
+    return get_transformer(BRITISH_NATIONAL_GRID, WGS84).transform(x, y)
+
+
+def project_coords(coords, src_crs=WGS84, dst_crs=BRITISH_NATIONAL_GRID):
+    """Coordinate function for shapely.transform: projects an (N, 2) array"""
+    x, y = get_transformer(src_crs, dst_crs).transform(coords[:, 0], coords[:, 1])
+    return np.column_stack([x, y])
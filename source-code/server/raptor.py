@@ -0,0 +1,218 @@
+import bisect
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from projection import to_bng
+from stop_index import StopIndex
+
+# Walking legs: straight-line distance times a detour factor at walking speed
+WALK_SPEED_MPS = 5000 / 3600
+WALK_DETOUR_FACTOR = 1.3
+# Furthest walk to the first stop or from the last one
+RAPTOR_MAX_WALK_METRES = float(os.environ.get("RAPTOR_MAX_WALK_METRES", "800"))
+# Stops this close are linked by footpaths for transfers
+RAPTOR_TRANSFER_METRES = float(os.environ.get("RAPTOR_TRANSFER_METRES", "250"))
+RAPTOR_MAX_TRANSFERS = int(os.environ.get("RAPTOR_MAX_TRANSFERS", "3"))
+
+INFINITY = float("inf")
+
+
+def parse_gtfs_times(values):
+    """Seconds after midnight for GTFS HH:MM:SS strings (hours may exceed 24); NaN if missing"""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        # Already seconds, as compiled by gtfs_cache (-1 where missing)
+        seconds = values.to_numpy(dtype=float)
+        return np.where(seconds < 0, np.nan, seconds)
+    parts = values.astype("string").str.strip().str.split(":", expand=True)
+    if parts.shape[1] < 3:
+        return np.full(len(values), np.nan)
+    hours, minutes, seconds = (pd.to_numeric(parts[i], errors="coerce").to_numpy(dtype=float) for i in range(3))
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def walk_seconds(distance_m):
+    return distance_m * WALK_DETOUR_FACTOR / WALK_SPEED_MPS
+
+
+class Pattern:
+    """Trips calling at exactly the same stop sequence, sorted by departure"""
+
+    __slots__ = ("stops", "trip_ids", "services", "arrivals", "departures")
+
+    def __init__(self, stops, trips):
+        trips.sort(key=lambda trip: trip[3][0])
+        self.stops = stops
+        self.trip_ids = [trip[0] for trip in trips]
+        # Index into RaptorRouter.service_ids, for checking a per-day active mask
+        self.services = [trip[1] for trip in trips]
+        # arrivals[trip][position]; departures[position][trip] for bisecting
+        self.arrivals = [trip[2] for trip in trips]
+        self.departures = [list(column) for column in zip(*(trip[3] for trip in trips))]
+
+
+class RaptorRouter:
+    """Earliest-arrival transit queries over a GTFS timetable with RAPTOR.
+
+    Trips are grouped into patterns (identical stop sequences); each round
+    of a query rides every pattern through the stops improved in the
+    previous round, then relaxes footpaths between nearby stops, so round k
+    holds the best arrivals using k vehicles. Trips within a pattern are
+    assumed not to overtake each other. Times are seconds after midnight
+    of the service day."""
+
+    def __init__(self, stops_df, trips_df, stop_times_df, stop_index=None,
+                 max_walk_m=RAPTOR_MAX_WALK_METRES, transfer_m=RAPTOR_TRANSFER_METRES,
+                 max_transfers=RAPTOR_MAX_TRANSFERS):
+        started = time.time()
+        self.max_walk_m = max_walk_m
+        self.transfer_m = transfer_m
+        self.max_transfers = max_transfers
+        self.stop_ids = stops_df["stop_id"].astype(str).tolist()
+        self.stop_positions = {stop_id: i for i, stop_id in enumerate(self.stop_ids)}
+        if stop_index is None:
+            stop_index = StopIndex(*to_bng(stops_df["stop_lon"].to_numpy(), stops_df["stop_lat"].to_numpy()))
+        self.stop_index = stop_index
+
+        self.patterns = self._build_patterns(trips_df, stop_times_df)
+        # stop -> [(pattern index, position in pattern)]
+        self.stop_patterns = [[] for _ in self.stop_ids]
+        for p, pattern in enumerate(self.patterns):
+            for position, stop in enumerate(pattern.stops):
+                self.stop_patterns[stop].append((p, position))
+        self.footpaths = self._build_footpaths()
+        print(f"✅ RAPTOR router ready: {len(self.patterns)} patterns, "
+              f"{sum(len(p.trip_ids) for p in self.patterns)} trips, "
+              f"{sum(len(f) for f in self.footpaths)} footpaths in {time.time() - started:.1f}s")
+
+    def _build_patterns(self, trips_df, stop_times_df):
+        stop_times = stop_times_df[["trip_id", "stop_sequence", "stop_id", "arrival_time", "departure_time"]].copy()
+        stop_times["stop"] = stop_times["stop_id"].astype(str).map(self.stop_positions)
+        arrivals = parse_gtfs_times(stop_times["arrival_time"])
+        departures = parse_gtfs_times(stop_times["departure_time"])
+        stop_times["arr"] = np.where(np.isnan(arrivals), departures, arrivals)
+        stop_times["dep"] = np.where(np.isnan(departures), arrivals, departures)
+        # Untimed or unknown stops can't be boarded or alighted at
+        stop_times = stop_times.dropna(subset=["stop", "arr", "dep"])
+        stop_times = stop_times.sort_values(["trip_id", "stop_sequence"], kind="stable")
+
+        service_of = dict(zip(trips_df["trip_id"].astype(str), trips_df["service_id"].astype(str)))
+        self.service_ids = list(dict.fromkeys(service_of.values()))
+        service_index = {service_id: i for i, service_id in enumerate(self.service_ids)}
+        service_of = {trip_id: service_index[service_id] for trip_id, service_id in service_of.items()}
+        trip_col = stop_times["trip_id"].astype(str).to_numpy()
+        stop_col = stop_times["stop"].to_numpy(dtype=np.int64)
+        arr_col = stop_times["arr"].to_numpy(dtype=np.int64)
+        dep_col = stop_times["dep"].to_numpy(dtype=np.int64)
+        bounds = np.flatnonzero(trip_col[1:] != trip_col[:-1]) + 1
+        starts = np.concatenate([[0], bounds]) if len(trip_col) else np.array([], dtype=np.int64)
+        ends = np.concatenate([bounds, [len(trip_col)]]) if len(trip_col) else np.array([], dtype=np.int64)
+
+        grouped = {}
+        for start, end in zip(starts, ends):
+            if end - start < 2:
+                continue
+            key = tuple(stop_col[start:end].tolist())
+            trip_id = trip_col[start]
+            grouped.setdefault(key, []).append(
+                (trip_id, service_of.get(trip_id, -1), arr_col[start:end].tolist(), dep_col[start:end].tolist())
+            )
+        return [Pattern(list(stops), trips) for stops, trips in grouped.items()]
+
+    def _build_footpaths(self):
+        """stop -> [(other stop, walking seconds)] for stops within transfer_m"""
+        footpaths = [[] for _ in self.stop_ids]
+        src, dst, distances = self.stop_index.pairs_within(self.transfer_m)
+        for a, b, s in zip(src.tolist(), dst.tolist(), walk_seconds(distances).tolist()):
+            footpaths[a].append((b, s))
+        return footpaths
+
+    def stops_within(self, x, y, radius_m):
+        """{stop: walking seconds} for stops within radius_m of a BNG point"""
+        found, distances = self.stop_index.within(x, y, radius_m)
+        return dict(zip(found.tolist(), walk_seconds(distances).tolist()))
+
+    def earliest_arrival(self, origin, destination, departure_seconds, active_services=None, max_walk_m=None):
+        """Earliest arrival (seconds after midnight) at destination leaving origin at departure_seconds.
+
+        origin and destination are (lat, lon). Walking the whole way counts
+        when it is faster. active_services, if given, is a boolean array over
+        service_ids telling which run that day (see ServiceCalendar.active_mask).
+        max_walk_m overrides the router's walk limit to and from stops.
+        Returns None if nothing arrives."""
+        max_walk_m = max_walk_m or self.max_walk_m
+        (ox, dx), (oy, dy) = to_bng([origin[1], destination[1]], [origin[0], destination[0]])
+        access = self.stops_within(ox, oy, max_walk_m)
+        egress = self.stops_within(dx, dy, max_walk_m)
+        # Short trips may be quicker on foot than waiting for a bus
+        distance = float(np.hypot(dx - ox, dy - oy))
+        best_target = departure_seconds + walk_seconds(distance) if distance <= 2 * max_walk_m else INFINITY
+        if not access or not egress:
+            return best_target if best_target < INFINITY else None
+
+        best = [INFINITY] * len(self.stop_ids)
+        previous = [INFINITY] * len(self.stop_ids)
+        for stop, seconds in access.items():
+            best[stop] = previous[stop] = departure_seconds + seconds
+        marked = set(access)
+
+        for _ in range(self.max_transfers + 1):
+            # Earliest marked position in each pattern serving a marked stop
+            queue = {}
+            for stop in marked:
+                for p, position in self.stop_patterns[stop]:
+                    if position < queue.get(p, INFINITY):
+                        queue[p] = position
+            current = list(previous)
+            marked = set()
+
+            for p, start in queue.items():
+                pattern = self.patterns[p]
+                trip = None
+                for position in range(start, len(pattern.stops)):
+                    stop = pattern.stops[position]
+                    if trip is not None:
+                        arrival = pattern.arrivals[trip][position]
+                        if arrival < best[stop] and arrival < best_target:
+                            best[stop] = current[stop] = arrival
+                            marked.add(stop)
+                            if stop in egress:
+                                best_target = min(best_target, arrival + egress[stop])
+                    # Catch an earlier trip if we can be here before it leaves
+                    ready = previous[stop]
+                    if ready < INFINITY and (trip is None or ready <= pattern.departures[position][trip]):
+                        earlier = self._board(pattern, position, ready, active_services)
+                        if earlier is not None and (trip is None or earlier < trip):
+                            trip = earlier
+
+            # Transfers: walk from stops reached by vehicle this round
+            for stop in list(marked):
+                for other, seconds in self.footpaths[stop]:
+                    arrival = current[stop] + seconds
+                    if arrival < best[other] and arrival < best_target:
+                        best[other] = current[other] = arrival
+                        marked.add(other)
+                        if other in egress:
+                            best_target = min(best_target, arrival + egress[other])
+            if not marked:
+                break
+            previous = current
+
+        return best_target if best_target < INFINITY else None
+
+    def _board(self, pattern, position, ready, active_services):
+        """First trip of the pattern leaving position at or after ready, or None"""
+        departures = pattern.departures[position]
+        trip = bisect.bisect_left(departures, ready)
+        if active_services is not None:
+            services = pattern.services
+            while trip < len(departures) and (services[trip] < 0 or not active_services[services[trip]]):
+                trip += 1
+        return trip if trip < len(departures) else None
+
+    def transit_minutes(self, origin, destination, departure_seconds, active_services=None, max_walk_m=None):
+        """Door-to-door minutes for earliest_arrival, or None"""
+        arrival = self.earliest_arrival(origin, destination, departure_seconds, active_services, max_walk_m)
+        return (arrival - departure_seconds) / 60 if arrival is not None else None
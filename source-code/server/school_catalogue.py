@@ -0,0 +1,130 @@
+import pandas as pd
+
+from amenity_index import AmenityIndex
+
+PRIMARY_KEYWORDS = ["primary", "junior", "infant", "elementary"]
+SECONDARY_KEYWORDS = ["secondary", "high", "comprehensive", "academy", "college"]
+
+# ISCED levels 0-1 correspond to primary education, 2-3 to secondary
+PRIMARY_ISCED_LEVELS = {"0", "1", "0;1"}
+SECONDARY_ISCED_LEVELS = {"2", "3", "2;3"}
+
+SCHOOL_TYPES = ("primary", "secondary", "unknown")
+
+
+def classify_school(school_name, top_primary_dict, top_secondary_dict, isced_level=None):
+    """Determine a school's type and how it was decided.
+
+    Returns a (school_type, method) tuple where school_type is 'primary',
+    'secondary' or 'unknown' and method is 'top_list_match', 'name_keyword',
+    'isced_tag' or None."""
+    name_str = str(school_name) if school_name is not None and not pd.isna(school_name) else ""
+
+    # First check if it's in our top schools lists
+    if name_str in top_secondary_dict:
+        return "secondary", "top_list_match"
+    if name_str in top_primary_dict:
+        return "primary", "top_list_match"
+
+    # Otherwise guess from name
+    name_lower = name_str.lower()
+    if any(keyword in name_lower for keyword in PRIMARY_KEYWORDS):
+        return "primary", "name_keyword"
+    if any(keyword in name_lower for keyword in SECONDARY_KEYWORDS):
+        return "secondary", "name_keyword"
+
+    # Fall back to the OSM isced:level tag when the name gives nothing away
+    isced = str(isced_level).strip() if isced_level is not None and not pd.isna(isced_level) else ""
+    if isced in PRIMARY_ISCED_LEVELS:
+        return "primary", "isced_tag"
+    if isced in SECONDARY_ISCED_LEVELS:
+        return "secondary", "isced_tag"
+
+    return "unknown", None
+
+
+class SchoolCatalogue:
+    """Every school in a city, classified once, with one spatial index per type.
+
+    A filtered query ('primary', 'secondary' or 'both') becomes a direct
+    nearest lookup on the matching index instead of a rescan of all schools."""
+
+    def __init__(self, city, schools_gdf, top_primary_dict, top_secondary_dict):
+        self.city = city
+        self.top_primary_dict = top_primary_dict
+        self.top_secondary_dict = top_secondary_dict
+        self.source = schools_gdf
+        self.schools = self._classify(schools_gdf)
+
+        self.indexes = {
+            school_type: AmenityIndex(self.schools[self.schools["school_type"] == school_type])
+            for school_type in SCHOOL_TYPES
+        }
+        typed = self.schools[self.schools["school_type"] != "unknown"]
+        # 'both' covers every typed school, falling back to all schools if none could be typed
+        self.indexes["both"] = AmenityIndex(typed if not typed.empty else self.schools)
+
+        counts = {school_type: len(self.indexes[school_type]) for school_type in SCHOOL_TYPES}
+        print(f"🏫 School catalogue for {city}: {counts}")
+
+    def _classify(self, schools_gdf):
+        schools = schools_gdf.copy() if schools_gdf is not None else pd.DataFrame()
+        if schools.empty or "geometry" not in schools:
+            return pd.DataFrame(columns=["name", "school_type", "classification_method",
+                                         "is_top_rated", "rank", "rating", "geometry"])
+
+        if "name" not in schools:
+            schools["name"] = None
+        isced_levels = schools["isced:level"] if "isced:level" in schools else [None] * len(schools)
+        top_schools = {**self.top_secondary_dict, **self.top_primary_dict}
+
+        types, methods, is_top, ranks, ratings = [], [], [], [], []
+        for name, isced in zip(schools["name"], isced_levels):
+            school_type, method = classify_school(name, self.top_primary_dict, self.top_secondary_dict, isced)
+            top_info = top_schools.get(name) if isinstance(name, str) else None
+            types.append(school_type)
+            methods.append(method)
+            is_top.append(top_info is not None)
+            ranks.append(top_info["rank"] if top_info else None)
+            ratings.append(top_info["rating"] if top_info else None)
+
+        schools["school_type"] = types
+        schools["classification_method"] = methods
+        schools["is_top_rated"] = is_top
+        # Object columns keep missing ranks as None rather than NaN, so they serialise to JSON
+        schools["rank"] = pd.Series(ranks, index=schools.index, dtype=object)
+        schools["rating"] = pd.Series(ratings, index=schools.index, dtype=object)
+        return schools
+
+    def index(self, school_filter):
+        """Return the AmenityIndex for 'primary', 'secondary', 'unknown' or 'both'"""
+        return self.indexes.get(school_filter, self.indexes["both"])
+
+    def records(self, school_type):
+        """Named schools of one type as plain dicts, deduplicated by name"""
+        records = []
+        seen = set()
+        subset = self.schools[self.schools["school_type"] == school_type]
+        for osm_key, row in subset.iterrows():
+            school_name = row["name"] if isinstance(row["name"], str) else "Unnamed School"
+            if school_name in seen:
+                continue
+            seen.add(school_name)
+            records.append({
+                "name": school_name,
+                "type": school_type,
+                "osm_id": _osm_id(osm_key),
+                "is_top_rated": bool(row["is_top_rated"]),
+                "rank": row["rank"],
+                "method": row["classification_method"]
+            })
+        return records
+
+
+def _osm_id(osm_key):
+    # osmnx indexes features by (element, id); plain frames just use the id
+    osm_id = osm_key[-1] if isinstance(osm_key, tuple) else osm_key
+    try:
+        return int(osm_id)
+    except (TypeError, ValueError):
+        return None
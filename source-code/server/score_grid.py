@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+
+import numpy as np
+import shapely
+
+from amenity_index import distance_decay_scores
+from projection import BRITISH_NATIONAL_GRID, WGS84, project_coords, to_bng, to_wgs84
+
+SCORE_GRID_CELL_SIZE = float(os.environ.get("SCORE_GRID_CELL_SIZE", "250"))  # metres
+SCORE_GRID_ENABLED = os.environ.get("SCORE_GRID_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Quantized heatmap values run 0..HEATMAP_LEVELS
+HEATMAP_LEVELS = 255
+
+
+class ScoreGrid:
+    """User-independent score components evaluated once on a regular grid over a city.
+
+    Cells are laid out in British National Grid; only cells whose centre lies
+    inside the city boundary are kept. Per cell it stores the nearest-amenity
+    distance and row position for every layer, the GTFS transit score and
+    the nearest area name, all as compact typed arrays."""
+
+    def __init__(self, city, cell_size, origin, shape, rows, cols, lons, lats,
+                 layers, transit_scores, area_codes, area_names, layer_indexes):
+        self.city = city
+        self.cell_size = cell_size
+        self.origin = origin
+        self.shape = shape
+        self.rows = rows
+        self.cols = cols
+        self.lons = lons
+        self.lats = lats
+        self.layers = layers
+        self.transit_scores = transit_scores
+        self.area_codes = area_codes
+        self.area_names = area_names
+        # Indexes the grid was built from; positions are only valid for these
+        self.layer_indexes = layer_indexes
+        self.built_at = time.time()
+        self._cell_lookup = None
+
+    def __len__(self):
+        return len(self.lons)
+
+    def is_current(self, layer_indexes):
+        """True if the grid was built from exactly these amenity indexes"""
+        return (self.layer_indexes.keys() == layer_indexes.keys() and
+                all(self.layer_indexes[name] is index for name, index in layer_indexes.items()))
+
+    def sample_cells(self, num_cells, seed=None):
+        """Random distinct cell ids (all cells if the grid is smaller than num_cells)"""
+        rng = np.random.default_rng(seed)
+        return rng.choice(len(self), size=min(num_cells, len(self)), replace=False)
+
+    def nearest(self, cells, layer_names):
+        """(distances, positions) matrices for cells x layers, like batch_nearest"""
+        distances = np.column_stack([self.layers[name][0][cells] for name in layer_names]).astype(float)
+        positions = np.column_stack([self.layers[name][1][cells] for name in layer_names]).astype(np.int64)
+        return distances, positions
+
+    def cells_at(self, lons, lats):
+        """Cell id containing each lon/lat point, -1 for points outside the kept cells"""
+        if self._cell_lookup is None:
+            lookup = np.full(self.shape, -1, dtype=np.int32)
+            lookup[self.rows, self.cols] = np.arange(len(self), dtype=np.int32)
+            self._cell_lookup = lookup
+        x, y = to_bng(lons, lats)
+        cols = np.floor((np.asarray(x) - self.origin[0]) / self.cell_size).astype(np.int64)
+        rows = np.floor((np.asarray(y) - self.origin[1]) / self.cell_size).astype(np.int64)
+        valid = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+        cells = np.full(len(rows), -1, dtype=np.int64)
+        cells[valid] = self._cell_lookup[rows[valid], cols[valid]]
+        return cells
+
+    def area_name(self, cell):
+        code = self.area_codes[cell]
+        return self.area_names[code] if code >= 0 else "Unknown Area"
+
+    def static_scores(self, amenity_weights, layer_names, reference_km, transit_weight=20):
+        """Weighted amenity + transit score for every cell"""
+        total = (self.transit_scores.astype(float) / 100) * transit_weight
+        for a_type, weight in amenity_weights.items():
+            name = layer_names.get(a_type)
+            if weight <= 0 or name not in self.layers:
+                continue
+            scores = distance_decay_scores(self.layers[name][0], reference_km.get(a_type, 1))
+            total += np.nan_to_num(scores) * weight
+        return total
+
+    def heatmap(self, amenity_weights, layer_names, reference_km, transit_weight=20):
+        """Quantized static scores for in-boundary cells, ready for a map heatmap layer"""
+        scores = self.static_scores(amenity_weights, layer_names, reference_km, transit_weight)
+        max_score = sum(w for w in amenity_weights.values() if w > 0) + transit_weight
+        scale = max_score / HEATMAP_LEVELS if max_score > 0 else 1
+        values = np.clip(np.rint(scores / scale), 0, HEATMAP_LEVELS).astype(np.uint8)
+        return {
+            "city": self.city,
+            "cell_size": self.cell_size,
+            "crs": BRITISH_NATIONAL_GRID,
+            "origin": self.origin,
+            "shape": self.shape,
+            "cells": len(self),
+            "scale": scale,
+            "max_score": max_score,
+            "rows": self.rows.tolist(),
+            "cols": self.cols.tolist(),
+            "lons": np.round(self.lons, 5).tolist(),
+            "lats": np.round(self.lats, 5).tolist(),
+            "values": values.tolist(),
+            "built_at": self.built_at
+        }
+
+
+def build_score_grid(city, city_boundary, layer_indexes, transit_scores_fn, areas, cell_size=SCORE_GRID_CELL_SIZE):
+    """Evaluate the static score components on a cell_size grid over the city boundary"""
+    started = time.time()
+    projected = shapely.transform(city_boundary.polygon, lambda c: project_coords(c, WGS84, BRITISH_NATIONAL_GRID))
+    minx, miny, maxx, maxy = projected.bounds
+    xs = np.arange(minx + cell_size / 2, maxx, cell_size)
+    ys = np.arange(miny + cell_size / 2, maxy, cell_size)
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    grid_lons, grid_lats = to_wgs84(grid_x.ravel(), grid_y.ravel())
+    inside = city_boundary.contains(grid_lons, grid_lats)
+
+    lons = np.asarray(grid_lons)[inside]
+    lats = np.asarray(grid_lats)[inside]
+    rows, cols = np.divmod(np.flatnonzero(inside), len(xs))
+    print(f"🗺️ Building {cell_size:.0f} m score grid for {city}: {len(lons)} cells")
+
+    layers = {}
+    for name, index in layer_indexes.items():
+        distances, positions = index.nearest_many(lons, lats)
+        layers[name] = (distances.astype(np.float32), positions.astype(np.int32))
+
+    transit_scores = np.asarray(transit_scores_fn(lats, lons), dtype=np.float32)
+    area_codes = nearest_area_codes(lats, lons, areas)
+
+    grid = ScoreGrid(
+        city, cell_size, (float(minx), float(miny)), (len(ys), len(xs)),
+        rows.astype(np.int32), cols.astype(np.int32), lons, lats,
+        layers, transit_scores, area_codes, [area["name"] for area in areas], dict(layer_indexes)
+    )
+    print(f"✅ Score grid for {city} built in {time.time() - started:.1f}s")
+    return grid
+
+
+def nearest_area_codes(lats, lons, areas):
+    """Index of the nearest named area for every point (-1 if there are no areas)"""
+    if not areas:
+        return np.full(len(lats), -1, dtype=np.int16)
+    area_lats = np.radians([area["lat"] for area in areas])
+    area_lons = np.radians([area["lon"] for area in areas])
+    phi = np.radians(lats)[:, None]
+    dphi = area_lats[None, :] - phi
+    dlambda = area_lons[None, :] - np.radians(lons)[:, None]
+    # Haversine without the constant factors, which don't change the argmin
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi) * np.cos(area_lats[None, :]) * np.sin(dlambda / 2) ** 2
+    return np.argmin(a, axis=1).astype(np.int16)
+
+
+class ScoreGridBuilder:
+    """Builds score grids in background threads and hands out the finished ones."""
+
+    def __init__(self, cell_size=SCORE_GRID_CELL_SIZE, enabled=SCORE_GRID_ENABLED):
+        self.cell_size = cell_size
+        self.enabled = enabled
+        self._grids = {}
+        self._building = set()
+        self._lock = threading.Lock()
+
+    def get(self, city):
+        """The last finished grid for a city, or None"""
+        return self._grids.get(city)
+
+    def ensure(self, city, city_boundary, layer_indexes, transit_scores_fn, areas):
+        """Return a grid built from these indexes, starting a background build if there isn't one"""
+        if not self.enabled:
+            return None
+
+        grid = self._grids.get(city)
+        if grid is not None and grid.is_current(layer_indexes):
+            return grid
+
+        self._start(city, lambda: (city_boundary, layer_indexes, transit_scores_fn, areas))
+        return None
+
+    def build_in_background(self, city, load_inputs):
+        """Start a build whose inputs are fetched on the build thread.
+
+        load_inputs() returns (city_boundary, layer_indexes, transit_scores_fn, areas),
+        so a caller can start a build without waiting for the boundary and amenity fetches."""
+        if self.enabled:
+            self._start(city, load_inputs)
+
+    def _start(self, city, load_inputs):
+        with self._lock:
+            if city in self._building:
+                return
+            self._building.add(city)
+
+        def build():
+            try:
+                city_boundary, layer_indexes, transit_scores_fn, areas = load_inputs()
+                self._grids[city] = build_score_grid(
+                    city, city_boundary, layer_indexes, transit_scores_fn, areas, self.cell_size
+                )
+            except Exception as e:
+                print(f"⚠️ Score grid build for {city} failed: {e}")
+            finally:
+                with self._lock:
+                    self._building.discard(city)
+
+        threading.Thread(target=build, daemon=True).start()
+
+    def is_building(self, city):
+        return city in self._building
@@ -0,0 +1,103 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+ADDED, REMOVED = 1, 2
+
+
+def parse_gtfs_date(value):
+    """date for a GTFS YYYYMMDD value, or an ISO date/datetime string, or a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    if len(text) == 8 and text.isdigit():
+        return datetime.strptime(text, "%Y%m%d").date()
+    return datetime.fromisoformat(text).date()
+
+
+class ServiceCalendar:
+    """Which service_ids run on which day, compiled from calendar.txt and calendar_dates.txt.
+
+    Every service gets a bitset with one bit per day of the feed's date
+    range: the weekly pattern between its start and end dates, then the
+    calendar_dates exceptions added (type 1) or removed (type 2). Checking
+    whether a trip runs on a date is a single bit lookup."""
+
+    def __init__(self, calendar_df=None, calendar_dates_df=None):
+        calendar_df = calendar_df if calendar_df is not None else pd.DataFrame(columns=["service_id"])
+        calendar_dates_df = calendar_dates_df if calendar_dates_df is not None else pd.DataFrame(columns=["service_id"])
+        calendar_ids = calendar_df["service_id"].astype(str).to_numpy()
+        exception_ids = calendar_dates_df["service_id"].astype(str).to_numpy()
+        self.service_ids = list(dict.fromkeys([*calendar_ids, *exception_ids]))
+        self.service_index = {service_id: i for i, service_id in enumerate(self.service_ids)}
+
+        starts = [parse_gtfs_date(d) for d in calendar_df.get("start_date", [])]
+        ends = [parse_gtfs_date(d) for d in calendar_df.get("end_date", [])]
+        exception_dates = [parse_gtfs_date(d) for d in calendar_dates_df.get("date", [])]
+        all_dates = starts + ends + exception_dates
+        if not all_dates:
+            self.start, self.end, self.num_days = None, None, 0
+            self.bits = np.zeros((0, 0), dtype=np.uint8)
+            return
+        self.start, self.end = min(all_dates), max(all_dates)
+        self.num_days = (self.end - self.start).days + 1
+
+        active = np.zeros((len(self.service_ids), self.num_days), dtype=bool)
+        if len(calendar_ids):
+            days = np.arange(self.num_days)
+            weekday_of_day = (self.start.weekday() + days) % 7
+            runs_on = calendar_df[WEEKDAYS].to_numpy(dtype=int).astype(bool)[:, weekday_of_day]
+            first = np.array([(d - self.start).days for d in starts])[:, None]
+            last = np.array([(d - self.start).days for d in ends])[:, None]
+            rows = np.array([self.service_index[s] for s in calendar_ids])
+            active[rows] |= runs_on & (days >= first) & (days <= last)
+        if len(exception_ids):
+            rows = np.array([self.service_index[s] for s in exception_ids])
+            offsets = np.array([(d - self.start).days for d in exception_dates])
+            types = calendar_dates_df["exception_type"].to_numpy(dtype=int)
+            active[rows[types == ADDED], offsets[types == ADDED]] = True
+            active[rows[types == REMOVED], offsets[types == REMOVED]] = False
+        self.bits = np.packbits(active, axis=1)
+
+    def __len__(self):
+        return len(self.service_ids)
+
+    def day_offset(self, day):
+        """Index of a date in the bitsets, or None outside the feed's date range"""
+        if self.start is None:
+            return None
+        offset = (parse_gtfs_date(day) - self.start).days
+        return offset if 0 <= offset < self.num_days else None
+
+    def covers(self, day):
+        return self.day_offset(day) is not None
+
+    def is_active(self, service_id, day):
+        index = self.service_index.get(str(service_id))
+        offset = self.day_offset(day)
+        if index is None or offset is None:
+            return False
+        return bool(self.bits[index, offset >> 3] >> (7 - (offset & 7)) & 1)
+
+    def active_mask(self, service_ids, day):
+        """Boolean array: whether each of service_ids (e.g. one per trip) runs on a date.
+
+        Unknown services and dates outside the feed never run."""
+        indices = np.array([self.service_index.get(str(s), -1) for s in service_ids], dtype=np.int64)
+        offset = self.day_offset(day)
+        if offset is None or not len(indices):
+            return np.zeros(len(indices), dtype=bool)
+        known = indices >= 0
+        mask = np.zeros(len(indices), dtype=bool)
+        mask[known] = ((self.bits[indices[known], offset >> 3] >> (7 - (offset & 7))) & 1).astype(bool)
+        return mask
+
+    def active_service_count(self, day):
+        offset = self.day_offset(day)
+        if offset is None:
+            return 0
+        return int(((self.bits[:, offset >> 3] >> (7 - (offset & 7))) & 1).sum())
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+from http_client import HTTP_CONNECT_TIMEOUT, get_http_client
+
+HEALTH_MONITOR_ENABLED = os.environ.get("HEALTH_MONITOR_ENABLED", "true").lower() in ("1", "true", "yes")
+HEALTH_CHECK_INTERVAL = float(os.environ.get("HEALTH_CHECK_INTERVAL", "30"))
+HEALTH_CHECK_TIMEOUT = float(os.environ.get("HEALTH_CHECK_TIMEOUT", "3"))
+
+
+def ors_probe(base_url, http=None, timeout=HEALTH_CHECK_TIMEOUT):
+    """Probe raising unless ORS reports itself ready on /v2/health"""
+    def probe():
+        client = http or get_http_client()
+        response = client.get("ors", f"{base_url.rstrip('/')}/v2/health", use_breaker=False,
+                              timeout=(HTTP_CONNECT_TIMEOUT, timeout))
+        response.raise_for_status()
+        status = response.json().get("status")
+        if status != "ready":
+            raise ValueError(f"ORS status is {status}")
+    return probe
+
+
+def otp_probe(graphql_url, http=None, timeout=HEALTH_CHECK_TIMEOUT):
+    """Probe raising unless OTP answers a trivial GraphQL query"""
+    def probe():
+        client = http or get_http_client()
+        response = client.post("otp", graphql_url, json={"query": "{ __typename }"}, use_breaker=False,
+                               timeout=(HTTP_CONNECT_TIMEOUT, timeout))
+        response.raise_for_status()
+        if not response.json().get("data"):
+            raise ValueError("OTP GraphQL endpoint returned no data")
+    return probe
+
+
+class HealthMonitor:
+    """Probes backend services in a background thread and caches their health.
+
+    probes maps a service name to fn() that raises if the service is down.
+    A failed probe opens the service's circuit breaker in the HTTP client so
+    calls fail fast until a later probe succeeds and closes it again.
+    Request handlers read the cached state and never probe themselves."""
+
+    def __init__(self, probes, http=None, interval=HEALTH_CHECK_INTERVAL, enabled=HEALTH_MONITOR_ENABLED):
+        self.probes = probes
+        self.http = http or get_http_client()
+        self.interval = interval
+        self.enabled = enabled
+        self._health = {service: {"healthy": None, "checked_at": None, "latency_ms": None, "error": None}
+                        for service in probes}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self, service):
+        """Probe one service now and update its cached health"""
+        started = time.time()
+        try:
+            self.probes[service]()
+            healthy, error = True, None
+        except Exception as e:
+            healthy, error = False, str(e)
+
+        was_healthy = self._health[service]["healthy"]
+        self._health[service] = {
+            "healthy": healthy,
+            "checked_at": time.time(),
+            "latency_ms": round((time.time() - started) * 1000, 1),
+            "error": error
+        }
+        if healthy:
+            self.http.breaker(service).record_success()
+        else:
+            self.http.breaker(service).trip()
+        if healthy != was_healthy:
+            print(f"{'✅' if healthy else '⚠️'} {service} is {'up' if healthy else f'down: {error}'}")
+        return healthy
+
+    def check_all(self):
+        return {service: self.check(service) for service in self.probes}
+
+    def start(self):
+        """Start probing every interval seconds in a daemon thread"""
+        if not self.enabled or self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.is_set():
+                self.check_all()
+                self._stop.wait(self.interval)
+
+        self._thread = threading.Thread(target=run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_available(self, service):
+        """False if the last probe failed or the service's breaker is open; unprobed services count as up"""
+        return self._health.get(service, {}).get("healthy") is not False and not self.http.is_open(service)
+
+    def status(self):
+        return {
+            service: {**health, "available": self.is_available(service),
+                      "breaker": self.http.breaker(service).status()}
+            for service, health in self._health.items()
+        }
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+# Bump when the shape of stored frames changes so old snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", str(Path(__file__).parent / "cache" / "snapshots"))
+SNAPSHOT_TTL_HOURS = float(os.environ.get("SNAPSHOT_TTL_HOURS", "168"))
+OFFLINE_MODE = os.environ.get("OFFLINE_MODE", "false").lower() in ("1", "true", "yes")
+
+
+class SnapshotUnavailable(Exception):
+    """Raised in offline mode when no snapshot exists for a query"""
+
+
+class SnapshotStore:
+    """Versioned on-disk snapshots of OSMnx fetches, keyed by place and tag query.
+
+    Fresh snapshots are served directly. Stale ones are still served while a
+    background thread refetches them (stale-while-revalidate). In offline mode
+    only snapshots are served and the network is never touched."""
+
+    def __init__(self, root=SNAPSHOT_DIR, ttl_hours=SNAPSHOT_TTL_HOURS, offline=OFFLINE_MODE):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_hours * 3600
+        self.offline = offline
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+    def key(self, kind, place, query=None):
+        """Stable key for a (kind, place, query) triple"""
+        raw = json.dumps([SNAPSHOT_VERSION, kind, place, query], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.root / f"v{SNAPSHOT_VERSION}" / f"{key}.pkl"
+
+    def _read(self, key):
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable snapshot {path.name}: {e}")
+            return None
+
+    def _write(self, key, kind, place, query, data):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        snapshot = {
+            "kind": kind,
+            "place": place,
+            "query": query,
+            "fetched_at": time.time(),
+            "data": data
+        }
+        # Write to a temp file and rename so readers never see a partial snapshot
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return snapshot
+
+    def fetch(self, kind, place, query, loader):
+        """Return the data for a query, loading it with loader() when needed.
+
+        Raises SnapshotUnavailable in offline mode when there is no snapshot."""
+        key = self.key(kind, place, query)
+        snapshot = self._read(key)
+
+        if snapshot is not None:
+            age = time.time() - snapshot["fetched_at"]
+            if age <= self.ttl_seconds:
+                self.stats["hits"] += 1
+                return snapshot["data"]
+
+            self.stats["stale_hits"] += 1
+            if not self.offline:
+                self._refresh_in_background(key, kind, place, query, loader)
+            return snapshot["data"]
+
+        self.stats["misses"] += 1
+        if self.offline:
+            raise SnapshotUnavailable(f"No {kind} snapshot for {place} (offline mode)")
+
+        data = loader()
+        self._store(key, kind, place, query, data)
+        return data
+
+    def _store(self, key, kind, place, query, data):
+        try:
+            self._write(key, kind, place, query, data)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"⚠️ Could not write {kind} snapshot for {place}: {e}")
+
+    def _refresh_in_background(self, key, kind, place, query, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                print(f"🔄 Refreshing stale {kind} snapshot for {place}")
+                self._store(key, kind, place, query, loader())
+                self.stats["refreshes"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Background refresh of {kind} snapshot for {place} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def status(self):
+        """Configuration and hit/miss counters, for diagnostics"""
+        return {
+            "root": str(self.root),
+            "version": SNAPSHOT_VERSION,
+            "ttl_hours": self.ttl_seconds / 3600,
+            "offline": self.offline,
+            **self.stats
+        }
@@ -0,0 +1,96 @@
+import numpy as np
+from shapely import STRtree, points
+
+
+class StopIndex:
+    """Nearest, k-nearest and radius queries over stops in projected metres.
+
+    Wraps a shapely STRtree over British National Grid stop coordinates,
+    so distances are plain Euclidean metres. Query points are BNG x/y;
+    results are positions into the arrays the index was built from."""
+
+    def __init__(self, x, y):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.tree = STRtree(points(self.x, self.y))
+
+    def __len__(self):
+        return len(self.x)
+
+    def _distances(self, stops, x, y):
+        return np.hypot(self.x[stops] - x, self.y[stops] - y)
+
+    def nearest_many(self, xs, ys, max_distance=None):
+        """(stops, distances) arrays for the nearest stop to each point; -1 and inf where none is in range"""
+        xs = np.atleast_1d(np.asarray(xs, dtype=float))
+        ys = np.atleast_1d(np.asarray(ys, dtype=float))
+        stops = np.full(len(xs), -1, dtype=np.int64)
+        distances = np.full(len(xs), np.inf)
+        if not len(self) or not len(xs):
+            return stops, distances
+        (inputs, found), found_distances = self.tree.query_nearest(
+            points(xs, ys), max_distance=max_distance, return_distance=True, all_matches=False
+        )
+        stops[inputs] = found
+        distances[inputs] = found_distances
+        return stops, distances
+
+    def nearest(self, x, y, max_distance=None):
+        """(stop, distance) of the nearest stop, or None if none is within max_distance"""
+        stops, distances = self.nearest_many([x], [y], max_distance)
+        return (int(stops[0]), float(distances[0])) if stops[0] >= 0 else None
+
+    def within_many(self, xs, ys, radius):
+        """[(stops, distances)] per point for the stops within radius metres, nearest first"""
+        xs = np.atleast_1d(np.asarray(xs, dtype=float))
+        ys = np.atleast_1d(np.asarray(ys, dtype=float))
+        results = [(np.empty(0, dtype=np.int64), np.empty(0)) for _ in range(len(xs))]
+        if not len(self) or not len(xs):
+            return results
+        inputs, found = self.tree.query(points(xs, ys), predicate="dwithin", distance=radius)
+        distances = self._distances(found, xs[inputs], ys[inputs])
+        order = np.lexsort((distances, inputs))
+        inputs, found, distances = inputs[order], found[order], distances[order]
+        bounds = np.searchsorted(inputs, np.arange(len(xs) + 1))
+        for i in range(len(xs)):
+            results[i] = (found[bounds[i]:bounds[i + 1]], distances[bounds[i]:bounds[i + 1]])
+        return results
+
+    def within(self, x, y, radius):
+        """(stops, distances) within radius metres of a point, nearest first"""
+        return self.within_many([x], [y], radius)[0]
+
+    def k_nearest_many(self, xs, ys, k, max_distance=None):
+        """[(stops, distances)] per point for its k nearest stops, nearest first"""
+        xs = np.atleast_1d(np.asarray(xs, dtype=float))
+        ys = np.atleast_1d(np.asarray(ys, dtype=float))
+        if max_distance is not None:
+            return [(stops[:k], distances[:k]) for stops, distances in self.within_many(xs, ys, max_distance)]
+
+        results = []
+        _, nearest = self.nearest_many(xs, ys)
+        for x, y, radius in zip(xs, ys, nearest):
+            if not np.isfinite(radius):
+                results.append((np.empty(0, dtype=np.int64), np.empty(0)))
+                continue
+            # Grow the search radius until it holds k stops (or every stop)
+            radius = max(radius, 100.0)
+            while True:
+                stops, distances = self.within(x, y, radius)
+                if len(stops) >= min(k, len(self)):
+                    results.append((stops[:k], distances[:k]))
+                    break
+                radius *= 2
+        return results
+
+    def k_nearest(self, x, y, k, max_distance=None):
+        return self.k_nearest_many([x], [y], k, max_distance)[0]
+
+    def pairs_within(self, radius):
+        """(stops, others, distances) for every pair of distinct stops within radius metres"""
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        stops, others = self.tree.query(points(self.x, self.y), predicate="dwithin", distance=radius)
+        keep = stops != others
+        stops, others = stops[keep], others[keep]
+        return stops, others, np.hypot(self.x[stops] - self.x[others], self.y[stops] - self.y[others])
@@ -0,0 +1,71 @@
+import geopandas as gpd
+from shapely.geometry import box
+
+import amenity_fetcher
+from amenity_fetcher import AmenityFetcher
+
+ELEMENTS = [
+    {"type": "node", "id": 1, "lat": 51.48, "lon": -3.18,
+     "tags": {"amenity": "school", "name": "Cardiff High School", "isced:level": "2", "operator": "Council"}},
+    {"type": "way", "id": 2, "center": {"lat": 51.50, "lon": -3.19}, "tags": {"amenity": "hospital", "name": "UHW"}},
+    # Returned twice by the query, and tagged for two layers
+    {"type": "way", "id": 3, "center": {"lat": 51.49, "lon": -3.17},
+     "tags": {"amenity": "school", "shop": "supermarket", "name": "Shop School"}},
+    {"type": "way", "id": 3, "center": {"lat": 51.49, "lon": -3.17},
+     "tags": {"amenity": "school", "shop": "supermarket", "name": "Shop School"}},
+    # Outside the test bounding box
+    {"type": "node", "id": 4, "lat": 51.60, "lon": -3.18, "tags": {"shop": "supermarket", "name": "Far Away"}},
+    # No coordinates at all
+    {"type": "relation", "id": 5, "tags": {"amenity": "hospital", "name": "Nowhere"}},
+    {"type": "node", "id": 6, "lat": 51.48, "lon": -3.18, "tags": {"amenity": "cafe", "name": "Cafe"}},
+]
+
+
+def boundary(**columns):
+    return gpd.GeoDataFrame(columns, geometry=[box(-3.25, 51.44, -3.10, 51.54)], crs="EPSG:4326")
+
+
+def test_query_uses_the_overpass_area_when_the_boundary_has_an_osm_id():
+    query = AmenityFetcher(timeout=60).build_query(boundary(osm_type=["relation"], osm_id=[88078]))
+
+    assert "area(3600088078)->.searchArea;" in query
+    assert 'nwr["shop"="supermarket"](area.searchArea);' in query
+    assert query.startswith("[out:json][timeout:60];") and query.endswith("out tags center qt;")
+
+
+def test_query_falls_back_to_the_bounding_box():
+    query = AmenityFetcher().build_query(boundary())
+
+    assert "searchArea" not in query
+    assert 'nwr["amenity"="school"](51.44,-3.25,51.54,-3.1);' in query
+
+
+def test_split_layers_reads_nodes_and_way_centres_and_keeps_only_known_tags():
+    layers = AmenityFetcher().split_layers(ELEMENTS)
+
+    schools = layers["school"]
+    assert list(schools.index) == [("node", 1), ("way", 3)]
+    assert list(schools.columns) == ["name", "isced:level", "geometry"]
+    assert schools.loc[("node", 1), "isced:level"] == "2"
+    assert (schools.geometry.x.tolist(), schools.geometry.y.tolist()) == ([-3.18, -3.17], [51.48, 51.49])
+    assert list(layers["hospital"]["name"]) == ["UHW"]
+    assert list(layers["supermarket"]["name"]) == ["Shop School", "Far Away"]
+
+
+def test_bounding_box_results_are_clipped_to_the_boundary(monkeypatch):
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"elements": ELEMENTS}
+
+    class Client:
+        def post(self, service, url, **kwargs):
+            return Response()
+
+    monkeypatch.setattr(amenity_fetcher, "get_http_client", lambda: Client())
+    layers = AmenityFetcher().fetch(boundary())
+
+    assert list(layers["supermarket"]["name"]) == ["Shop School"]
+    assert len(layers["school"]) == 2
@@ -0,0 +1,66 @@
+import geopandas as gpd
+from shapely.geometry import Point, Polygon
+
+from amenity_index import AmenityIndex, batch_nearest, distance_decay_scores
+
+
+def make_layer():
+    return gpd.GeoDataFrame(
+        {"name": ["Roath Park Primary", "Heath Hospital", None]},
+        geometry=[
+            Point(-3.170, 51.500),
+            Polygon([(-3.190, 51.505), (-3.185, 51.505), (-3.185, 51.510), (-3.190, 51.510)]),
+            None,
+        ],
+        crs="EPSG:4326",
+    )
+
+
+def test_nearest_returns_closest_row():
+    index = AmenityIndex(make_layer())
+    assert len(index) == 2
+
+    distance, row = index.nearest(Point(-3.171, 51.500))
+    assert row["name"] == "Roath Park Primary"
+    assert 0 < distance < 200
+
+
+def test_point_inside_polygon_has_zero_distance():
+    index = AmenityIndex(make_layer())
+
+    distance, row = index.nearest(Point(-3.187, 51.507))
+    assert row["name"] == "Heath Hospital"
+    assert distance == 0
+
+
+def test_empty_layer():
+    index = AmenityIndex(gpd.GeoDataFrame())
+    assert index.empty
+    assert index.nearest(Point(-3.17, 51.5)) == (None, None)
+
+
+def test_batch_nearest_matches_single_lookups():
+    indexes = [AmenityIndex(make_layer()), AmenityIndex(gpd.GeoDataFrame())]
+    lons = [-3.171, -3.187]
+    lats = [51.500, 51.507]
+
+    distances, positions = batch_nearest(lons, lats, indexes)
+    assert distances.shape == (2, 2)
+    for i, (lon, lat) in enumerate(zip(lons, lats)):
+        distance, row = indexes[0].nearest(Point(lon, lat))
+        assert distances[i, 0] == distance
+        assert indexes[0].row(positions[i, 0])["name"] == row["name"]
+    assert (positions[:, 1] == -1).all()
+
+
+def test_distance_decay_scores():
+    scores = distance_decay_scores([0, 1000, 5000], reference_km=2)
+    assert list(scores) == [1.0, 0.5, 0.0]
+
+
+def test_centroid_round_trips_to_wgs84():
+    index = AmenityIndex(make_layer())
+
+    lat, lon = index.centroid(0)
+    assert abs(lat - 51.500) < 1e-6
+    assert abs(lon + 3.170) < 1e-6
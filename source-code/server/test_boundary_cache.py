@@ -0,0 +1,41 @@
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import Polygon, box
+
+from boundary_cache import CityBoundary
+
+
+def make_boundary(geometry):
+    return CityBoundary("Test City", gpd.GeoDataFrame(geometry=[geometry], crs="EPSG:4326"), tolerance=0)
+
+
+def test_samples_are_inside_and_reproducible_with_a_seed():
+    # Triangle filling half its bounding box
+    boundary = make_boundary(Polygon([(-3.25, 51.44), (-3.10, 51.44), (-3.10, 51.54)]))
+
+    lons, lats = boundary.sample_points(200, seed=7)
+    assert len(lons) == len(lats) == 200
+    assert boundary.contains(lons, lats).all()
+    again = boundary.sample_points(200, seed=7)
+    np.testing.assert_array_equal(lons, again[0])
+    np.testing.assert_array_equal(lats, again[1])
+    assert not np.array_equal(lons, boundary.sample_points(200, seed=8)[0])
+
+
+def test_batch_is_sized_from_the_fill_ratio(capsys):
+    boundary = make_boundary(box(-3.25, 51.44, -3.10, 51.54))
+
+    lons, _ = boundary.sample_points(100, seed=1)
+    # A full box needs one batch: 100 points with 20% headroom plus 16
+    assert len(lons) == 100
+    assert "after 136 attempts" in capsys.readouterr().out
+
+
+def test_thin_boundaries_stop_at_max_attempts(capsys):
+    sliver = make_boundary(Polygon([(-3.25, 51.44), (-3.10, 51.54), (-3.10, 51.540001)]))
+    assert sliver.fill_ratio < 0.01
+
+    lons, lats = sliver.sample_points(50, seed=1, max_attempts=500)
+    assert len(lons) < 50
+    assert sliver.contains(lons, lats).all()
+    assert "after 500 attempts" in capsys.readouterr().out
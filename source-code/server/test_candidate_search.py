@@ -0,0 +1,45 @@
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import box
+
+from boundary_cache import CityBoundary
+from candidate_search import adaptive_search
+
+PEAK_LON, PEAK_LAT = -3.1637, 51.4712
+
+
+def make_boundary():
+    gdf = gpd.GeoDataFrame(geometry=[box(-3.25, 51.44, -3.10, 51.54)], crs="EPSG:4326")
+    return CityBoundary("Test City", gdf)
+
+
+def run_search(**kwargs):
+    batches = []
+
+    def score_fn(lons, lats):
+        batches.append((lons, lats))
+        return -np.hypot(lons - PEAK_LON, lats - PEAK_LAT)
+
+    selected = adaptive_search(make_boundary(), score_fn, 5, budget=200, coarse_spacing=1000,
+                               min_spacing=100, **kwargs)
+    lons = np.concatenate([b[0] for b in batches])
+    lats = np.concatenate([b[1] for b in batches])
+    return lons[selected], lats[selected]
+
+
+def test_adaptive_search_refines_towards_the_best_area_within_budget():
+    lons, lats = run_search(min_separation=0)
+
+    assert len(lons) == 5
+    assert len(set(zip(lons, lats))) == 5
+    # ~1 km coarse cells alone leave the best point up to ~700 m from the peak
+    assert np.hypot(lons[0] - PEAK_LON, lats[0] - PEAK_LAT) < 0.002
+
+
+def test_adaptive_search_keeps_candidates_apart():
+    lons, lats = run_search(min_separation=500)
+
+    x = lons * 111000 * np.cos(np.radians(PEAK_LAT))
+    y = lats * 111000
+    gaps = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    assert gaps[~np.eye(5, dtype=bool)].min() >= 450
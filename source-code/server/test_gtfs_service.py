@@ -0,0 +1,91 @@
+import os
+
+import pandas as pd
+import pytest
+
+import gtfs_cache
+
+from gtfs_service import GTFSService
+from projection import to_wgs84
+
+# Two stops 2 km apart in British National Grid metres
+STOPS = {"S1": (318000, 176000), "S2": (320000, 176000)}
+
+
+def latlon(x, y):
+    lon, lat = to_wgs84(x, y)
+    return float(lat), float(lon)
+
+
+def write_feed(path):
+    pd.DataFrame([
+        {"stop_id": stop_id, "stop_name": stop_id, "stop_lat": latlon(*xy)[0], "stop_lon": latlon(*xy)[1]}
+        for stop_id, xy in STOPS.items()
+    ]).to_csv(path / "stops.txt", index=False)
+    pd.DataFrame([
+        {"route_id": "R1", "route_short_name": "1", "route_long_name": "Centre - Bay"},
+        {"route_id": "R2", "route_short_name": "2", "route_long_name": None},
+        {"route_id": "R3", "route_short_name": "3", "route_long_name": "Weekend Only"},
+    ]).to_csv(path / "routes.txt", index=False)
+    pd.DataFrame([
+        {"trip_id": "t1", "route_id": "R2", "service_id": "WEEKDAY", "shape_id": "x"},
+        {"trip_id": "t2", "route_id": "R1", "service_id": "WEEKDAY", "shape_id": "x"},
+        {"trip_id": "t3", "route_id": "R2", "service_id": "WEEKDAY", "shape_id": "x"},
+        {"trip_id": "t4", "route_id": "R3", "service_id": "WEEKEND", "shape_id": "x"},
+    ]).to_csv(path / "trips.txt", index=False)
+    pd.DataFrame([
+        {"trip_id": trip_id, "stop_sequence": seq, "stop_id": stop_id,
+         "arrival_time": "08:00:00", "departure_time": "08:00:00"}
+        for trip_id in ["t1", "t2", "t3", "t4"] for seq, stop_id in enumerate(STOPS, start=1)
+    ]).to_csv(path / "stop_times.txt", index=False)
+    pd.DataFrame(columns=["shape_id", "shape_pt_lat", "shape_pt_lon", "shape_pt_sequence"]).to_csv(
+        path / "shapes.txt", index=False)
+    weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+    pd.DataFrame([
+        {"service_id": "WEEKDAY", **{d: int(d in weekdays) for d in weekdays + ["saturday", "sunday"]},
+         "start_date": 20250101, "end_date": 20251231},
+        {"service_id": "WEEKEND", **{d: int(d not in weekdays) for d in weekdays + ["saturday", "sunday"]},
+         "start_date": 20250101, "end_date": 20251231},
+    ]).to_csv(path / "calendar.txt", index=False)
+
+
+def test_transit_profile_uses_routes_running_that_day(tmp_path):
+    write_feed(tmp_path)
+    service = GTFSService(tmp_path, cache_path=None)
+    lat, lon = latlon(STOPS["S1"][0] + 100, STOPS["S1"][1])
+
+    # Thursday: R2 then R1 in trips.txt order, the weekend route is left out
+    profile = service.transit_profile(lat, lon)
+    assert [r["route_id"] for r in profile["accessible_routes"]] == ["R2", "R1"]
+    assert profile["accessible_routes"][0]["name"] == "Route 2"
+    assert profile["score"] == round(20 + 30 * (1 - profile["accessible_routes"][0]["distance"] / 500), 1)
+    assert service.calculate_transit_score(lat, lon) == profile["score"]
+
+    service.set_service_date("2025-05-03")
+    assert [r["route_id"] for r in service.get_route_accessibility(lat, lon)] == ["R3"]
+
+    far = latlon(STOPS["S1"][0], STOPS["S1"][1] + 5000)
+    assert service.calculate_transit_scores([lat, far[0]], [lon, far[1]]) == [service.transit_profile(lat, lon)["score"], 0]
+
+
+def test_compiled_feed_is_reused_until_the_source_changes(tmp_path, monkeypatch):
+    feed_dir = tmp_path / "feed"
+    feed_dir.mkdir()
+    write_feed(feed_dir)
+    cache_path = str(tmp_path / "gtfs.npz")
+    frames = gtfs_cache.load_feed(feed_dir, cache_path)
+    assert frames["stop_times"]["arrival_time"].tolist() == [8 * 3600] * 8
+    assert frames["trips"]["trip_id"].cat.categories.equals(frames["stop_times"]["trip_id"].cat.categories)
+
+    cached = gtfs_cache.read_cache(cache_path, gtfs_cache.source_files(feed_dir))
+    assert gtfs_cache.decode_feed(*cached)["routes"].equals(frames["routes"])
+
+    # Touching a file keeps the artifact and records the new signature, changing its contents does not
+    os.utime(feed_dir / "stops.txt", ns=(0, 0))
+    assert gtfs_cache.read_cache(cache_path, gtfs_cache.source_files(feed_dir)) is not None
+    with monkeypatch.context() as patch:
+        patch.setattr(gtfs_cache, "feed_checksum", lambda files: pytest.fail("feed hashed again"))
+        assert gtfs_cache.read_cache(cache_path, gtfs_cache.source_files(feed_dir)) is not None
+    with open(feed_dir / "routes.txt", "a") as f:
+        f.write("R4,4,Night Bus\n")
+    assert gtfs_cache.read_cache(cache_path, gtfs_cache.source_files(feed_dir)) is None
@@ -0,0 +1,101 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from circuit_breaker import OPEN, CircuitOpenError
+from http_client import HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    failures_left = 0
+    slow_requests = 0
+
+    def do_POST(self):
+        Handler.slow_requests += 1
+        time.sleep(0.5)
+        self.do_GET()
+
+    def do_GET(self):
+        status = 200
+        if self.path == "/flaky" and Handler.failures_left > 0:
+            Handler.failures_left -= 1
+            status = 503
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connections_are_reused_and_counted(server):
+    client = HttpClient()
+    for _ in range(5):
+        assert client.get("ors", f"{server}/ok").json() == {"ok": True}
+
+    stats = client.stats()["services"]["ors"]
+    assert stats["requests"] == 5
+    assert stats["pools"][0]["connections_opened"] == 1
+    assert stats["pools"][0]["requests"] == 5
+
+
+def test_gateway_errors_are_retried_with_backoff(server):
+    Handler.failures_left = 2
+    client = HttpClient(max_retries=2, backoff_factor=0)
+
+    assert client.get("otp", f"{server}/flaky").status_code == 200
+    assert Handler.failures_left == 0
+
+
+def test_read_timeouts_are_not_retried(server):
+    Handler.slow_requests = 0
+    client = HttpClient(max_retries=2, backoff_factor=0, read_timeouts={"otp": 0.1})
+
+    with pytest.raises(requests.exceptions.RequestException):
+        client.post("otp", f"{server}/slow", json={})
+    assert Handler.slow_requests == 1
+
+
+def test_open_breaker_fails_fast_without_sending(server):
+    Handler.failures_left = 100
+    client = HttpClient(max_retries=0)
+    for _ in range(3):
+        assert client.get("ors", f"{server}/flaky").status_code == 503
+
+    with pytest.raises(CircuitOpenError):
+        client.get("ors", f"{server}/ok")
+    assert client.stats()["services"]["ors"]["requests"] == 3
+    # Probes bypass the breaker
+    assert client.get("ors", f"{server}/ok", use_breaker=False).status_code == 200
+    Handler.failures_left = 0
+
+
+def test_trial_call_that_raises_ends_the_half_open_trial(server):
+    client = HttpClient(max_retries=0)
+    breaker = client.breaker("ors")
+    breaker.trip()
+    breaker.opened_at -= breaker.reset_seconds
+
+    # Not a RequestException: the bad keyword fails inside requests itself
+    with pytest.raises(TypeError):
+        client.get("ors", f"{server}/ok", unexpected=True)
+    assert breaker.state == OPEN
+    breaker.opened_at -= breaker.reset_seconds
+    assert client.get("ors", f"{server}/ok").status_code == 200
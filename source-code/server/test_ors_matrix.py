@@ -0,0 +1,48 @@
+from ors_matrix import OrsMatrixClient
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeHttp:
+    def __init__(self, handler):
+        self.handler = handler
+
+    def post(self, service, url, json):
+        return self.handler(json)
+
+
+def test_matrix_requests_stay_within_limits_and_cover_every_pair():
+    bodies = []
+
+    def fake_post(json):
+        bodies.append(json)
+        locations = json["locations"]
+        # Duration in seconds encodes origin lat + destination lat
+        return FakeResponse({"durations": [
+            [None if locations[s][1] == locations[d][1] else (locations[s][1] + locations[d][1]) * 60
+             for d in json["destinations"]]
+            for s in json["sources"]
+        ]})
+
+    client = OrsMatrixClient("http://ors", max_routes=12, max_locations=8, http=FakeHttp(fake_post))
+    origins = [(float(i), 0.0) for i in range(10)]
+    destinations = [(100.0, 0.0), (200.0, 0.0), (5.0, 0.0)]
+
+    results = client.durations(origins, destinations, "driving-car")
+
+    assert len(results) == 30
+    assert results[((3.0, 0.0), (200.0, 0.0))] == 203
+    assert results[((5.0, 0.0), (5.0, 0.0))] is None
+    for body in bodies:
+        assert len(body["sources"]) * len(body["destinations"]) <= 12
+        assert len(body["locations"]) <= 8
+    assert len(bodies) == client.requests_made == 3
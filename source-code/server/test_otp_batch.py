@@ -0,0 +1,73 @@
+import re
+
+import requests
+
+from otp_batch import OtpBatchPlanner, build_plan_query
+
+DEPARTURE = "2025-05-01T08:00:00+01:00"
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeHttp:
+    """Answers aliased plan queries with a duration of (destination lat * 1000) seconds"""
+
+    def __init__(self, unreachable=(), failing_batches=()):
+        self.bodies = []
+        self.unreachable = set(unreachable)
+        self.failing_batches = set(failing_batches)
+
+    def post(self, service, url, json):
+        self.bodies.append(json)
+        if len(self.bodies) - 1 in self.failing_batches:
+            raise requests.exceptions.ConnectionError("down")
+        variables = json["variables"]
+        data = {}
+        for alias in re.findall(r"(p\d+): plan", json["query"]):
+            to = variables[f"to{alias[1:]}"]
+            lat = float(to.split(",")[0])
+            itineraries = [] if lat in self.unreachable else [{"duration": lat * 1000}, {"duration": lat * 2000}]
+            data[alias] = {"itineraries": itineraries}
+        return FakeResponse({"data": data})
+
+
+def test_query_uses_aliases_and_variables():
+    query = build_plan_query(2)
+
+    assert "p0: plan(fromPlace: $from0, toPlace: $to0, date: $date, time: $time)" in query
+    assert "$to1: String!" in query
+    assert "51." not in query
+
+
+def test_plans_are_batched_and_returned_in_input_order():
+    http = FakeHttp(unreachable={3.0})
+    planner = OtpBatchPlanner("http://otp/graphql", batch_size=4, http=http)
+    pairs = [((0.0, 0.0), (float(lat), 0.0)) for lat in range(1, 11)]
+
+    minutes = planner.plan_many(pairs, DEPARTURE)
+
+    assert len(http.bodies) == 3
+    assert http.bodies[0]["variables"]["date"] == "2025-05-01"
+    assert http.bodies[0]["variables"]["time"] == "08:00:00"
+    assert minutes == [None if lat == 3 else lat * 1000 / 60 for lat in range(1, 11)]
+
+
+def test_failed_batches_are_left_unanswered():
+    planner = OtpBatchPlanner("http://otp/graphql", batch_size=2, http=FakeHttp(failing_batches={1}))
+    origins = [(0.0, 0.0)] * 4
+    destinations = [(1.0, 0.0), (2.0, 0.0), (3.0, 0.0), (4.0, 0.0)]
+
+    durations = planner.durations(origins, destinations, DEPARTURE)
+
+    assert set(durations) == {(origins[0], destinations[0]), (origins[0], destinations[1])}
+    planner.http = FakeHttp(failing_batches={1})
+    assert planner.plan_many(list(zip(origins, destinations)), DEPARTURE) == [1000 / 60, 2000 / 60, None, None]
@@ -0,0 +1,37 @@
+import numpy as np
+
+import parallel_scoring
+from parallel_scoring import CandidateScorer
+
+
+class FakeGTFS:
+    def calculate_transit_score(self, lat, lon):
+        return round(lat * 10 + lon, 3)
+
+    def calculate_transit_scores(self, lats, lons):
+        return [self.calculate_transit_score(lat, lon) for lat, lon in zip(lats, lons)]
+
+
+def test_pool_scores_match_serial_scores_in_order(monkeypatch):
+    monkeypatch.setattr(parallel_scoring, "MIN_PARALLEL_POINTS", 1)
+    lats = np.linspace(51.4, 51.6, 50)
+    lons = np.linspace(-3.3, -3.1, 50)
+    serial = CandidateScorer(FakeGTFS(), FakeGTFS, workers=0).transit_scores(lats, lons)
+
+    scorer = CandidateScorer(FakeGTFS(), FakeGTFS, workers=2, start_method="spawn")
+    scorer.start()
+    try:
+        parallel = scorer.transit_scores(lats, lons)
+    finally:
+        scorer.shutdown()
+
+    np.testing.assert_array_equal(parallel, serial)
+
+
+def test_scores_in_process_until_started_or_when_disabled():
+    lats, lons = np.array([51.5]), np.array([-3.2])
+    assert CandidateScorer(FakeGTFS(), FakeGTFS, workers=4)._pool is None
+    disabled = CandidateScorer(FakeGTFS(), FakeGTFS, workers=0)
+    disabled.start()
+    assert disabled._pool is None
+    assert disabled.transit_scores(lats, lons).tolist() == [round(51.5 * 10 - 3.2, 3)]
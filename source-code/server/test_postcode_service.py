@@ -0,0 +1,98 @@
+import pytest
+import requests
+
+from postcode_gazetteer import PostcodeGazetteer, build_gazetteer
+from postcode_service import PostcodeService, normalize_postcode
+
+KNOWN = {"CF101AA": {"postcode": "CF10 1AA", "latitude": 51.4761, "longitude": -3.1762}}
+
+
+class FakeHttp:
+    def __init__(self):
+        self.bodies = []
+        self.fail = False
+
+    def post(self, service, url, json):
+        if self.fail:
+            raise requests.exceptions.ConnectionError("down")
+        self.bodies.append(json)
+        return FakeResponse({"status": 200, "result": [
+            {"query": q, "result": KNOWN.get(normalize_postcode(q))} for q in json["postcodes"]
+        ]})
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+@pytest.fixture
+def service(tmp_path):
+    return PostcodeService(db_path=tmp_path / "postcodes.sqlite", http=FakeHttp())
+
+
+def test_postcodes_are_resolved_in_one_bulk_request_and_cached(service):
+    coords = service.coordinates_many(["cf10 1aa", "CF10 1AA", "ZZ99 9ZZ"])
+
+    assert coords == {"CF101AA": {"lat": 51.4761, "lon": -3.1762}, "ZZ999ZZ": None}
+    assert service.http.bodies == [{"postcodes": ["CF101AA", "ZZ999ZZ"]}]
+
+    # Known and unknown postcodes are both answered from the cache now
+    assert service.coordinates(" cf101aa ") == {"lat": 51.4761, "lon": -3.1762}
+    assert service.coordinates("zz99 9zz") is None
+    assert len(service.http.bodies) == 1
+    assert service.stats["negative_hits"] == 1
+
+
+def test_cache_persists_and_expires(tmp_path):
+    db_path = tmp_path / "postcodes.sqlite"
+    PostcodeService(db_path=db_path, http=FakeHttp()).lookup("CF10 1AA")
+
+    reopened = PostcodeService(db_path=db_path, http=FakeHttp())
+    assert reopened.lookup("CF10 1AA")["postcode"] == "CF10 1AA"
+    assert reopened.http.bodies == []
+
+    expired = PostcodeService(db_path=db_path, ttl_days=0, http=FakeHttp())
+    expired.lookup("CF10 1AA")
+    assert len(expired.http.bodies) == 1
+
+
+def test_network_failures_are_not_cached(service):
+    service.http.fail = True
+    assert service.coordinates("CF10 1AA") is None
+
+    service.http.fail = False
+    assert service.coordinates("CF10 1AA") == {"lat": 51.4761, "lon": -3.1762}
+
+
+def test_gazetteer_answers_without_network(tmp_path):
+    csv_path = tmp_path / "onspd.csv"
+    csv_path.write_text(
+        "pcds,lat,long,ctry,doterm\n"
+        "CF10 1AA,51.476100,-3.176200,W92000004,\n"
+        "CF24 4HQ,51.487300,-3.164900,W92000004,\n"
+        "CF99 9ZZ,51.400000,-3.100000,W92000004,200101\n"
+        "BS1 4DJ,51.451300,-2.597000,E92000001,\n"
+        "CF3 0ZZ,99.999999,0.000000,W92000004,\n"
+    )
+    table_path = tmp_path / "postcodes.npy"
+    assert build_gazetteer(csv_path, table_path, {"ctry": {"W92000004"}}) == 2
+
+    gazetteer = PostcodeGazetteer(table_path)
+    assert gazetteer.lookup("cf24 4hq") == (51.4873, -3.1649)
+    assert gazetteer.lookup("CF99 9ZZ") is None
+    assert gazetteer.lookup("BS1 4DJ") is None
+
+    offline = PostcodeService(db_path=tmp_path / "postcodes.sqlite", http=FakeHttp(),
+                              gazetteer=gazetteer, api_fallback=False)
+    offline.http.fail = True
+    assert offline.coordinates_many(["CF10 1AA", "BS1 4DJ"]) == {
+        "CF101AA": {"lat": 51.4761, "lon": -3.1762}, "BS14DJ": None
+    }
+    assert offline.lookup("CF101AA")["postcode"] == "CF10 1AA"
@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from projection import to_wgs84
+from raptor import RaptorRouter, parse_gtfs_times, walk_seconds
+from service_calendar import ServiceCalendar
+
+# Stops along an east-west line in British National Grid metres; C2 is a 100 m walk from C
+STOPS = {"A": (318000, 176000), "B": (320000, 176000), "C": (322000, 176000),
+         "C2": (322100, 176000), "D": (324000, 176000)}
+TRIPS = {
+    # trip: (route, service, [(stop, time)])
+    "r1-early": ("R1", "WEEKDAY", [("A", "08:05:00"), ("B", "08:10:00"), ("C", "08:15:00")]),
+    "r1-late": ("R1", "DAILY", [("A", "08:35:00"), ("B", "08:40:00"), ("C", "08:45:00")]),
+    "r2-0816": ("R2", "DAILY", [("C2", "08:16:00"), ("D", "08:21:00")]),
+    "r2-0820": ("R2", "DAILY", [("C2", "08:20:00"), ("D", "08:25:00")]),
+    "r2-0850": ("R2", "DAILY", [("C2", "08:50:00"), ("D", "08:55:00")]),
+}
+
+
+def latlon(x, y):
+    lon, lat = to_wgs84(x, y)
+    return float(lat), float(lon)
+
+
+@pytest.fixture(scope="module")
+def router():
+    stops = pd.DataFrame([
+        {"stop_id": stop_id, "stop_lat": latlon(*xy)[0], "stop_lon": latlon(*xy)[1]} for stop_id, xy in STOPS.items()
+    ])
+    trips = pd.DataFrame([
+        {"trip_id": trip_id, "route_id": route, "service_id": service} for trip_id, (route, service, _) in TRIPS.items()
+    ])
+    stop_times = pd.DataFrame([
+        {"trip_id": trip_id, "stop_sequence": seq, "stop_id": stop, "arrival_time": t, "departure_time": t}
+        for trip_id, (_, _, calls) in TRIPS.items() for seq, (stop, t) in enumerate(calls, start=1)
+    ])
+    return RaptorRouter(stops, trips, stop_times, max_walk_m=500, transfer_m=250)
+
+
+def test_gtfs_times_allow_hours_past_midnight():
+    assert parse_gtfs_times(["08:05:00", "25:30:00"]).tolist() == [29100, 91800]
+
+
+def test_journey_with_footpath_transfer(router):
+    origin, destination = latlon(*STOPS["A"]), latlon(*STOPS["D"])
+
+    # r1-early reaches C at 08:15, a 100 m walk makes the 08:20 but not the 08:16
+    assert router.earliest_arrival(origin, destination, 8 * 3600) == 8 * 3600 + 25 * 60
+    assert router.transit_minutes(origin, destination, 8 * 3600 + 6 * 60) == 49
+
+
+def test_inactive_services_are_not_boarded(router):
+    origin, destination = latlon(*STOPS["A"]), latlon(*STOPS["D"])
+    calendar = ServiceCalendar(pd.DataFrame([
+        {"service_id": "WEEKDAY", "monday": 1, "tuesday": 1, "wednesday": 1, "thursday": 1, "friday": 1,
+         "saturday": 0, "sunday": 0, "start_date": 20250101, "end_date": 20251231},
+        {"service_id": "DAILY", "monday": 1, "tuesday": 1, "wednesday": 1, "thursday": 1, "friday": 1,
+         "saturday": 1, "sunday": 1, "start_date": 20250101, "end_date": 20251231},
+    ]))
+    saturday = calendar.active_mask(router.service_ids, "2025-05-03")
+
+    assert router.transit_minutes(origin, destination, 8 * 3600, active_services=saturday) == 55
+    nothing_runs = calendar.active_mask(router.service_ids, "2026-05-03")
+    assert router.transit_minutes(origin, destination, 8 * 3600, active_services=nothing_runs) is None
+
+
+def test_short_trips_can_be_walked(router):
+    origin = latlon(*STOPS["A"])
+    nearby = latlon(STOPS["A"][0] + 300, STOPS["A"][1])
+
+    assert router.transit_minutes(origin, nearby, 8 * 3600) == pytest.approx(walk_seconds(300) / 60, abs=0.1)
+    # A tighter walk limit rules out both the walk and the stops near the destination
+    assert router.transit_minutes(origin, nearby, 8 * 3600, max_walk_m=100) is None
@@ -0,0 +1,53 @@
+import geopandas as gpd
+from shapely.geometry import Point
+
+from school_catalogue import SchoolCatalogue, classify_school
+
+TOP_PRIMARY = {"Roath Park Primary School": {"rank": 3, "rating": "Green"}}
+TOP_SECONDARY = {"Cardiff High School": {"rank": 1, "rating": "Green"}}
+
+
+def make_schools():
+    return gpd.GeoDataFrame(
+        {
+            "name": ["Cardiff High School", "Roath Park Primary School", "Llanishen Junior",
+                     "St Mary's", "Fitzalan", "Cardiff High School"],
+            "isced:level": [None, None, None, "1", None, None],
+        },
+        geometry=[Point(-3.17, 51.52), Point(-3.17, 51.50), Point(-3.19, 51.53),
+                  Point(-3.20, 51.48), Point(-3.21, 51.47), Point(-3.171, 51.521)],
+        crs="EPSG:4326",
+    )
+
+
+def test_classify_school():
+    assert classify_school("Cardiff High School", TOP_PRIMARY, TOP_SECONDARY) == ("secondary", "top_list_match")
+    assert classify_school("Llanishen Junior", {}, {}) == ("primary", "name_keyword")
+    assert classify_school("St Mary's", {}, {}, "1") == ("primary", "isced_tag")
+    assert classify_school(None, {}, {}) == ("unknown", None)
+
+
+def test_indexes_split_by_type():
+    catalogue = SchoolCatalogue("Cardiff, UK", make_schools(), TOP_PRIMARY, TOP_SECONDARY)
+
+    assert len(catalogue.index("primary")) == 3
+    assert len(catalogue.index("secondary")) == 2
+    assert len(catalogue.index("unknown")) == 1
+    assert len(catalogue.index("both")) == 5
+
+    # The nearest primary school is returned even when a secondary school is closer
+    distance, row = catalogue.index("primary").nearest(Point(-3.17, 51.514))
+    assert row["name"] == "Roath Park Primary School"
+    assert row["is_top_rated"] and row["rank"] == 3
+
+
+def test_records_are_deduplicated_by_name():
+    catalogue = SchoolCatalogue("Cardiff, UK", make_schools(), TOP_PRIMARY, TOP_SECONDARY)
+
+    secondary = catalogue.records("secondary")
+    assert [s["name"] for s in secondary] == ["Cardiff High School"]
+    assert secondary[0]["rank"] == 1
+
+    primary = {s["name"]: s for s in catalogue.records("primary")}
+    assert primary["St Mary's"]["method"] == "isced_tag"
+    assert primary["Llanishen Junior"]["rank"] is None
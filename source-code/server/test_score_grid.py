@@ -0,0 +1,122 @@
+import threading
+
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import Point, Polygon
+
+from amenity_index import AmenityIndex
+from boundary_cache import CityBoundary
+from projection import to_bng
+from score_grid import HEATMAP_LEVELS, ScoreGridBuilder, build_score_grid, nearest_area_codes
+
+# An L-shaped city so some cells of the bounding grid fall outside it
+L_SHAPE = Polygon([(-3.20, 51.46), (-3.14, 51.46), (-3.14, 51.48), (-3.17, 51.48), (-3.17, 51.50), (-3.20, 51.50)])
+AREAS = [{"name": "Riverside", "lat": 51.465, "lon": -3.19}, {"name": "Cathays", "lat": 51.495, "lon": -3.18}]
+
+
+def make_boundary():
+    return CityBoundary("Test City", gpd.GeoDataFrame(geometry=[L_SHAPE], crs="EPSG:4326"), tolerance=0)
+
+
+def make_indexes():
+    layer = gpd.GeoDataFrame({"name": ["Tesco"]}, geometry=[Point(-3.18, 51.47)], crs="EPSG:4326")
+    return {"supermarket": AmenityIndex(layer)}
+
+
+def full_transit(lats, lons):
+    return np.full(len(lats), 100.0)
+
+
+def test_cells_sit_at_their_row_and_col():
+    grid = build_score_grid("Test City", make_boundary(), make_indexes(), full_transit, AREAS, cell_size=500)
+    x, y = to_bng(grid.lons, grid.lats)
+
+    assert 0 < len(grid) < grid.shape[0] * grid.shape[1]
+    np.testing.assert_allclose(x, grid.origin[0] + (grid.cols + 0.5) * 500, atol=1e-3)
+    np.testing.assert_allclose(y, grid.origin[1] + (grid.rows + 0.5) * 500, atol=1e-3)
+
+
+def test_cells_at_finds_each_cell_again():
+    grid = build_score_grid("Test City", make_boundary(), make_indexes(), full_transit, AREAS, cell_size=500)
+
+    np.testing.assert_array_equal(grid.cells_at(grid.lons, grid.lats), np.arange(len(grid)))
+    # The missing corner of the L and points off the grid have no cell
+    assert grid.cells_at([-3.15, -3.30], [51.49, 51.47]).tolist() == [-1, -1]
+
+
+def testnearest_area_codes():
+    codes = nearest_area_codes(np.array([51.466, 51.494]), np.array([-3.191, -3.179]), AREAS)
+    assert codes.tolist() == [0, 1]
+    assert nearest_area_codes(np.array([51.47]), np.array([-3.18]), []).tolist() == [-1]
+
+
+def test_heatmap_is_quantised_against_the_maximum_score():
+    grid = build_score_grid("Test City", make_boundary(), make_indexes(), full_transit, AREAS, cell_size=500)
+    layer_names = {"supermarket": "supermarket"}
+
+    # Transit only: every cell has the maximum score
+    transit_only = grid.heatmap({"supermarket": 0}, layer_names, {"supermarket": 1})
+    assert set(transit_only["values"]) == {HEATMAP_LEVELS}
+
+    heatmap = grid.heatmap({"supermarket": 10}, layer_names, {"supermarket": 1})
+    scores = grid.static_scores({"supermarket": 10}, layer_names, {"supermarket": 1})
+    assert heatmap["max_score"] == 30
+    assert heatmap["values"] == np.rint(scores / (30 / HEATMAP_LEVELS)).astype(int).tolist()
+    assert min(heatmap["values"]) < max(heatmap["values"]) <= HEATMAP_LEVELS
+
+
+def test_builder_builds_in_the_background_and_rebuilds_for_new_indexes():
+    builder = ScoreGridBuilder(cell_size=500)
+    boundary, indexes = make_boundary(), make_indexes()
+    release = threading.Event()
+
+    def slow_transit(lats, lons):
+        release.wait(5)
+        return full_transit(lats, lons)
+
+    # /score-grid answers 202 while building, 200 once get() has a grid
+    assert builder.ensure("Test City", boundary, indexes, slow_transit, AREAS) is None
+    assert builder.is_building("Test City") and builder.get("Test City") is None
+    assert builder.ensure("Test City", boundary, indexes, slow_transit, AREAS) is None
+    release.set()
+    while builder.is_building("Test City"):
+        threading.Event().wait(0.01)
+
+    grid = builder.get("Test City")
+    assert grid is not None
+    assert builder.ensure("Test City", boundary, indexes, slow_transit, AREAS) is grid
+    # Fresh amenity indexes make the old grid stale: it stays served while a new one builds
+    assert builder.ensure("Test City", boundary, make_indexes(), slow_transit, AREAS) is None
+    assert builder.get("Test City") is grid
+
+    assert ScoreGridBuilder(enabled=False).ensure("Test City", boundary, indexes, slow_transit, AREAS) is None
+
+
+def test_build_in_background_fetches_its_inputs_on_the_build_thread():
+    builder = ScoreGridBuilder(cell_size=500)
+    release = threading.Event()
+    fetched = []
+
+    def load_inputs():
+        release.wait(5)
+        fetched.append(threading.current_thread())
+        return make_boundary(), make_indexes(), full_transit, AREAS
+
+    # Returns straight away while the inputs are still being fetched
+    builder.build_in_background("Test City", load_inputs)
+    assert builder.is_building("Test City") and not fetched
+    release.set()
+    while builder.is_building("Test City"):
+        threading.Event().wait(0.01)
+
+    assert builder.get("Test City") is not None
+    assert fetched[0] is not threading.current_thread()
+
+    def failing_inputs():
+        raise ConnectionError("boundary unavailable")
+
+    # A failed fetch ends the build so a later request can try again
+    builder.build_in_background("Other City", failing_inputs)
+    while builder.is_building("Other City"):
+        threading.Event().wait(0.01)
+    assert builder.get("Other City") is None
@@ -0,0 +1,46 @@
+from datetime import date
+
+import pandas as pd
+
+from service_calendar import ServiceCalendar
+
+WEEKDAYS_ONLY = {"monday": 1, "tuesday": 1, "wednesday": 1, "thursday": 1, "friday": 1, "saturday": 0, "sunday": 0}
+
+
+def make_calendar():
+    calendar = pd.DataFrame([
+        {"service_id": "weekday", **WEEKDAYS_ONLY, "start_date": 20250401, "end_date": 20250430},
+        {"service_id": "sunday", **{d: 0 for d in WEEKDAYS_ONLY}, "sunday": 1,
+         "start_date": 20250401, "end_date": 20250430},
+    ])
+    calendar_dates = pd.DataFrame([
+        # Easter Monday runs the Sunday service instead of the weekday one
+        {"service_id": "weekday", "date": 20250421, "exception_type": 2},
+        {"service_id": "sunday", "date": 20250421, "exception_type": 1},
+        # A service that only exists as an exception
+        {"service_id": "special", "date": 20250502, "exception_type": 1},
+    ])
+    return ServiceCalendar(calendar, calendar_dates)
+
+
+def test_weekly_patterns_and_exceptions():
+    calendar = make_calendar()
+
+    assert calendar.is_active("weekday", "2025-04-22")
+    assert not calendar.is_active("weekday", "2025-04-26")
+    assert calendar.is_active("sunday", date(2025, 4, 27))
+    assert not calendar.is_active("weekday", "20250421")
+    assert calendar.is_active("sunday", "2025-04-21T08:00:00+01:00")
+    assert calendar.is_active("special", "2025-05-02")
+    assert not calendar.is_active("weekday", "2025-05-01")
+
+
+def test_active_mask_per_trip():
+    calendar = make_calendar()
+    trip_services = ["weekday", "sunday", "weekday", "unknown"]
+
+    assert calendar.active_mask(trip_services, "2025-04-22").tolist() == [True, False, True, False]
+    assert calendar.active_mask(trip_services, "2025-04-21").tolist() == [False, True, False, False]
+    # Outside the feed's date range nothing runs
+    assert not calendar.covers("2026-01-01")
+    assert not calendar.active_mask(trip_services, "2026-01-01").any()
@@ -0,0 +1,55 @@
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from http_client import HttpClient
+from service_health import HealthMonitor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_repeated_failures_and_half_opens_after_reset():
+    clock = FakeClock()
+    breaker = CircuitBreaker("otp", failure_threshold=2, reset_seconds=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now = 31
+    assert breaker.state == HALF_OPEN
+    # Only one trial call at a time
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.rejected == 2
+
+
+def test_monitor_caches_health_and_drives_the_breaker():
+    otp_up = {"value": False}
+
+    def otp_probe():
+        if not otp_up["value"]:
+            raise ConnectionError("refused")
+
+    http = HttpClient()
+    monitor = HealthMonitor({"ors": lambda: None, "otp": otp_probe}, http=http, enabled=False)
+    assert monitor.is_available("otp")
+
+    monitor.check_all()
+    assert monitor.is_available("ors")
+    assert not monitor.is_available("otp")
+    assert http.breaker("otp").state == OPEN
+    assert monitor.status()["otp"]["error"] == "refused"
+
+    otp_up["value"] = True
+    monitor.check("otp")
+    assert monitor.is_available("otp")
+    assert http.breaker("otp").state == CLOSED
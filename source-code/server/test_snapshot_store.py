@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from snapshot_store import SnapshotStore, SnapshotUnavailable
+
+
+def test_fresh_snapshot_skips_loader(tmp_path):
+    store = SnapshotStore(root=tmp_path, ttl_hours=1)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"rows": 3}
+
+    assert store.fetch("features", "Cardiff, UK", {"amenity": "school"}, loader) == {"rows": 3}
+    assert store.fetch("features", "Cardiff, UK", {"amenity": "school"}, loader) == {"rows": 3}
+    assert len(calls) == 1
+    assert store.stats["hits"] == 1
+
+
+def test_stale_snapshot_is_served_while_refreshing(tmp_path):
+    store = SnapshotStore(root=tmp_path, ttl_hours=0)
+    store.fetch("boundary", "Cardiff, UK", None, lambda: "old")
+
+    assert store.fetch("boundary", "Cardiff, UK", None, lambda: "new") == "old"
+    for _ in range(50):
+        if store.stats["refreshes"]:
+            break
+        time.sleep(0.01)
+    assert store.fetch("boundary", "Cardiff, UK", None, lambda: "newer") in ("new", "newer")
+
+
+def test_offline_mode_only_serves_snapshots(tmp_path):
+    SnapshotStore(root=tmp_path).fetch("boundary", "Cardiff, UK", None, lambda: "boundary")
+    offline = SnapshotStore(root=tmp_path, offline=True)
+
+    assert offline.fetch("boundary", "Cardiff, UK", None, lambda: pytest.fail("network used")) == "boundary"
+    with pytest.raises(SnapshotUnavailable):
+        offline.fetch("boundary", "Newport, UK", None, lambda: pytest.fail("network used"))
@@ -0,0 +1,36 @@
+import numpy as np
+
+from stop_index import StopIndex
+
+
+def make_index(seed=0, n=500):
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(310000, 330000, n)
+    y = rng.uniform(170000, 185000, n)
+    return StopIndex(x, y), rng
+
+
+def test_queries_match_brute_force():
+    index, rng = make_index()
+    qx = rng.uniform(310000, 330000, 50)
+    qy = rng.uniform(170000, 185000, 50)
+
+    stops, distances = index.nearest_many(qx, qy)
+    radius = index.within_many(qx, qy, 800)
+    for i in range(50):
+        brute = np.hypot(index.x - qx[i], index.y - qy[i])
+        order = np.argsort(brute)
+        assert stops[i] == order[0] and np.isclose(distances[i], brute[order[0]])
+        assert set(radius[i][0].tolist()) == set(np.flatnonzero(brute <= 800).tolist())
+        assert np.all(np.diff(radius[i][1]) >= 0)
+        k_stops, k_distances = index.k_nearest(qx[i], qy[i], 5)
+        assert np.allclose(k_distances, brute[order[:5]])
+
+
+def test_nothing_in_range():
+    index, _ = make_index()
+
+    assert index.nearest(0, 0, max_distance=1000) is None
+    stops, distances = index.nearest_many([0, 320000], [0, 177000], max_distance=1000)
+    assert stops[0] == -1 and np.isinf(distances[0])
+    assert len(index.within(0, 0, 1000)[0]) == 0
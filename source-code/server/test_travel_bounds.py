@@ -0,0 +1,94 @@
+import numpy as np
+
+from travel_bounds import (
+    MODE_PROFILES, fastest_mode_times, haversine_m, min_travel_minutes, shortlist_by_upper_bound, travel_score,
+    travel_score_upper_bounds, trip_penalty
+)
+
+
+def test_min_travel_minutes_is_below_realistic_durations():
+    # Cardiff Central to Cardiff Gate is ~9 km in a straight line
+    walking = min_travel_minutes(np.array([51.4757]), np.array([-3.1794]), 51.5375, -3.1156, "walking")
+    driving = min_travel_minutes(np.array([51.4757]), np.array([-3.1794]), 51.5375, -3.1156, "driving")
+    assert 60 < walking[0] < 100
+    assert 3 < driving[0] < 6
+    assert min_travel_minutes(np.array([51.4757]), np.array([-3.1794]), 51.5375, -3.1156, "auto")[0] == driving[0]
+
+
+def test_upper_bound_never_below_exact_score():
+    lats = np.array([51.48, 51.50])
+    lons = np.array([-3.18, -3.20])
+    bounds = travel_score_upper_bounds(lats, lons, [(51.47, -3.17, 1.0, "cycling")])
+    exact = [travel_score(min_travel_minutes(lats[i:i + 1], lons[i:i + 1], 51.47, -3.17, "cycling")[0] * 1.4)
+             for i in range(2)]
+    assert np.all(bounds >= exact)
+
+
+def test_shortlist_matches_full_ranking_with_fewer_evaluations():
+    rng = np.random.default_rng(0)
+    static = rng.uniform(20, 60, 200)
+    bounds = static + 40
+    exact = static + rng.uniform(0, 40, 200)
+    calls = []
+
+    def evaluate(indices):
+        calls.append(len(indices))
+        return exact[indices]
+
+    for batch_size in (1, 8):
+        calls.clear()
+        evaluated = shortlist_by_upper_bound(bounds, evaluate, 5, batch_size=batch_size)
+
+        assert sorted(exact[evaluated], reverse=True)[:5] == sorted(exact, reverse=True)[:5]
+        assert sum(calls) < 200
+        assert max(calls) <= batch_size
+
+
+def test_unroutable_candidate_cannot_beat_its_bound_or_enter_the_shortlist():
+    rng = np.random.default_rng(1)
+    lats = rng.uniform(51.44, 51.54, 50)
+    lons = rng.uniform(-3.25, -3.10, 50)
+    bounds = travel_score_upper_bounds(lats, lons, [(51.47, -3.17, 1.0, "driving")])
+    lower = min_travel_minutes(lats, lons, 51.47, -3.17, "driving")
+    # Routing fails for the candidate with the best bound
+    failed = int(np.argmax(bounds))
+    minutes = [None if i == failed else lower[i] * 1.4 for i in range(50)]
+    exact = np.array([travel_score(trip_penalty(1.0, m)) for m in minutes])
+
+    evaluated = shortlist_by_upper_bound(bounds, lambda indices: exact[indices], 5)
+
+    assert exact[failed] == 0 and np.all(exact <= bounds)
+    assert failed in evaluated
+    assert sorted(exact[evaluated], reverse=True)[:5] == sorted(exact, reverse=True)[:5]
+
+
+def test_mode_pruning_finds_the_same_fastest_mode_with_fewer_queries():
+    origin = (51.4757, -3.1794)
+    # ~2 km (cycling can win), ~9 km and ~20 km away
+    destinations = [(51.4900, -3.1600), (51.5375, -3.1156), (51.6500, -3.2000)]
+    pairs = [(origin, destination) for destination in destinations]
+    # Realistic urban speeds (km/h); OTP finds nothing for the first pair
+    speeds = {"driving-car": 30, "cycling-regular": 16, "foot-walking": 5, "bus-transit": 18}
+    queried = []
+
+    def fetch(jobs):
+        queried.extend(jobs)
+        results = {}
+        for o, d, profile in jobs:
+            km = float(haversine_m(o[0], o[1], d[0], d[1])) / 1000 * 1.3
+            results[(o, d, profile)] = None if (profile == "bus-transit" and d == destinations[0]) else km / speeds[profile] * 60
+        return results
+
+    def fastest(times, pair):
+        found = {p: times[(*pair, p)] for p in MODE_PROFILES["auto"] if times.get((*pair, p))}
+        return min(found, key=found.get)
+
+    full = fastest_mode_times(pairs, MODE_PROFILES["auto"], fetch, exhaustive=True)
+    queried.clear()
+    pruned = fastest_mode_times(pairs, MODE_PROFILES["auto"], fetch)
+
+    assert len(queried) < len(full)
+    assert (*pairs[2], "foot-walking") not in pruned
+    for pair in pairs:
+        assert fastest(pruned, pair) == fastest(full, pair)
+
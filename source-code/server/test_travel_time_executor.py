@@ -0,0 +1,33 @@
+import threading
+import time
+
+from travel_time_executor import TravelTimeExecutor
+
+
+def test_jobs_run_concurrently_within_service_limits():
+    in_flight = {"ors": 0, "otp": 0}
+    peak = {"ors": 0, "otp": 0}
+    lock = threading.Lock()
+
+    def fetcher(service):
+        def fetch(origin, destination, profile):
+            with lock:
+                in_flight[service] += 1
+                peak[service] = max(peak[service], in_flight[service])
+            time.sleep(0.02)
+            with lock:
+                in_flight[service] -= 1
+            return origin[0] + destination[0]
+        return fetch
+
+    executor = TravelTimeExecutor({"ors": fetcher("ors"), "otp": fetcher("otp")}, {"ors": 3, "otp": 2})
+    jobs = [((i, 0), (1, 0), profile) for i in range(6) for profile in ("driving-car", "foot-walking", "bus-transit")]
+
+    started = time.time()
+    results = executor.run(jobs + jobs[:3])
+
+    assert len(results) == 18
+    assert results[((4, 0), (1, 0), "bus-transit")] == 5
+    assert peak == {"ors": 3, "otp": 2}
+    # 12 ORS jobs / 3 slots and 6 OTP jobs / 2 slots, run side by side
+    assert time.time() - started < 0.3
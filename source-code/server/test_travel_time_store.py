@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from projection import to_wgs84
+from travel_time_executor import TravelTimeExecutor
+from travel_time_store import TravelTimeStore
+
+CITY_HALL = (51.4850, -3.1790)
+CENTRAL_STATION = (51.4760, -3.1790)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TravelTimeStore(db_path=tmp_path / "travel_times.sqlite", snap_metres=50, bucket_minutes=60)
+
+
+def cell_point(x, y):
+    lon, lat = to_wgs84(x, y)
+    return float(lat), float(lon)
+
+
+def test_nearby_points_share_a_stored_duration(store):
+    # Two points 20 m apart inside the same 50 m grid cell
+    store.put(cell_point(318010, 176010), CENTRAL_STATION, "driving-car", 6.5)
+
+    assert store.get(cell_point(318030, 176030), CENTRAL_STATION, "driving-car") == 6.5
+    assert store.get(cell_point(318060, 176010), CENTRAL_STATION, "driving-car") is None
+    store.put(CITY_HALL, CENTRAL_STATION, "driving-car", 6.5)
+    assert store.get(CITY_HALL, CENTRAL_STATION, "cycling-regular") is None
+    assert store.get((51.50, -3.20), CENTRAL_STATION, "driving-car") is None
+
+
+def test_transit_durations_are_keyed_by_departure_bucket(store):
+    store.put(CITY_HALL, CENTRAL_STATION, "bus-transit", 12.0, "2025-05-01T08:00:00+01:00")
+
+    assert store.get(CITY_HALL, CENTRAL_STATION, "bus-transit", "2025-05-01T08:45:00+01:00") == 12.0
+    assert store.get(CITY_HALL, CENTRAL_STATION, "bus-transit", "2025-05-01T09:05:00+01:00") is None
+    # Profiles without a timetable ignore the departure time
+    store.put(CITY_HALL, CENTRAL_STATION, "walking", 15.0, "2025-05-01T08:00:00+01:00")
+    assert store.get(CITY_HALL, CENTRAL_STATION, "walking", "2025-05-01T18:00:00+01:00") == 15.0
+
+
+def test_expired_entries_are_ignored_and_purged(tmp_path):
+    store = TravelTimeStore(db_path=tmp_path / "travel_times.sqlite", ttl_hours=1)
+    store.put(CITY_HALL, CENTRAL_STATION, "driving-car", 6.5)
+    with store._conn:
+        store._conn.execute("UPDATE travel_times SET fetched_at = ?", (time.time() - 7200,))
+
+    assert store.get(CITY_HALL, CENTRAL_STATION, "driving-car") is None
+    assert store.purge_expired() == 1
+
+
+def test_executor_only_fetches_jobs_missing_from_the_store(store):
+    calls = []
+
+    def fetch(origin, destination, profile):
+        calls.append((origin, destination, profile))
+        return 9.0 if profile == "driving-car" else None
+
+    store.put(CITY_HALL, CENTRAL_STATION, "driving-car", 6.5)
+    executor = TravelTimeExecutor({"ors": fetch}, store=store)
+    jobs = [(CITY_HALL, CENTRAL_STATION, "driving-car"), (CENTRAL_STATION, CITY_HALL, "driving-car"),
+            (CITY_HALL, CENTRAL_STATION, "walking")]
+
+    assert executor.run(jobs) == {jobs[0]: 6.5, jobs[1]: 9.0, jobs[2]: None}
+    assert calls == jobs[1:]
+
+    # Found routes are stored; the failed one is retried
+    calls.clear()
+    executor.run(jobs)
+    assert calls == [jobs[2]]
+    assert store.status()["hits"] == 3
+
+
+def test_lookups_are_batched_and_declined_results_are_not_stored(store):
+    points = [cell_point(318000 + 100 * i, 176000) for i in range(400)]
+    store.put_many({(point, CENTRAL_STATION, "driving-car"): float(i) for i, point in enumerate(points)})
+    jobs = [(point, CENTRAL_STATION, "driving-car") for point in points]
+    assert store.get_many(jobs) == {job: float(i) for i, job in enumerate(jobs)}
+
+    # e.g. bus times from the local router while OTP is down
+    executor = TravelTimeExecutor({"otp": lambda origin, destination, profile: 20.0}, store=store,
+                                  should_store=lambda service: service != "otp")
+    job = (CITY_HALL, CENTRAL_STATION, "bus-transit")
+    assert executor.run([job]) == {job: 20.0}
+    assert store.get(*job) is None
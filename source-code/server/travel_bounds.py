@@ -0,0 +1,139 @@
+import os
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
+
+# Speeds no real route can beat on average, so straight-line distance / speed is a
+# guaranteed lower bound on the routed duration
+MAX_SPEEDS_KMH = {
+    "driving-car": float(os.environ.get("MAX_SPEED_DRIVING_KMH", "113")),  # 70 mph limit
+    "cycling-regular": float(os.environ.get("MAX_SPEED_CYCLING_KMH", "30")),
+    "foot-walking": float(os.environ.get("MAX_SPEED_WALKING_KMH", "7")),
+    "bus-transit": float(os.environ.get("MAX_SPEED_BUS_KMH", "113")),
+}
+
+# Profiles calculate_travel_time may report for each requested mode; 'bus' can
+# fall back to any ORS profile when OTP finds no route
+MODE_PROFILES = {
+    "auto": list(MAX_SPEEDS_KMH),
+    "bus": list(MAX_SPEEDS_KMH),
+    "driving": ["driving-car"],
+    "cycling": ["cycling-regular"],
+    "walking": ["foot-walking"],
+}
+
+# Travel score: full marks for no travel, zero at MAX_ACCEPTABLE_TRAVEL_MINUTES
+MAX_ACCEPTABLE_TRAVEL_MINUTES = 600
+TRAVEL_SCORE_WEIGHT = 40
+
+
+def haversine_m(lats, lons, dest_lat, dest_lon):
+    """Great-circle distance in metres from arrays of points to one destination"""
+    phi1 = np.radians(lats)
+    phi2 = np.radians(dest_lat)
+    dphi = phi2 - phi1
+    dlambda = np.radians(dest_lon) - np.radians(lons)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def min_travel_minutes(lats, lons, dest_lat, dest_lon, mode="auto"):
+    """Lower bound on the duration calculate_travel_time can return for a mode"""
+    profiles = MODE_PROFILES.get(mode, ["driving-car"])
+    fastest_kmh = max(MAX_SPEEDS_KMH[profile] for profile in profiles)
+    return haversine_m(lats, lons, dest_lat, dest_lon) / 1000 / fastest_kmh * 60
+
+
+def profile_lower_bounds(origin, destination, profiles):
+    """[(profile, minutes)] lower bounds for one (lat, lon) pair, most optimistic first.
+
+    Ties keep the order of profiles, so cheaper ORS profiles go before OTP."""
+    distance_km = float(haversine_m(origin[0], origin[1], destination[0], destination[1])) / 1000
+    bounds = [(profile, distance_km / MAX_SPEEDS_KMH[profile] * 60) for profile in profiles]
+    return sorted(bounds, key=lambda bound: bound[1])
+
+
+def fastest_mode_times(pairs, profiles, fetch, exhaustive=False):
+    """Travel times needed to find the fastest profile for each (origin, destination) pair.
+
+    Profiles are queried in order of their lower bound, one per pair per
+    round, and dropped once their bound exceeds the best time found so far,
+    so the fastest profile is the same as if all were queried. fetch(jobs)
+    returns {(origin, destination, profile): minutes or None} and gets every
+    pair's next job at once. exhaustive queries all profiles. Returns the
+    fetch results for the jobs that were queried."""
+    queues = {pair: profile_lower_bounds(pair[0], pair[1], profiles) for pair in dict.fromkeys(pairs)}
+    best = {pair: np.inf for pair in queues}
+    results = {}
+    while True:
+        jobs = []
+        for pair, queue in queues.items():
+            if queue and not exhaustive and queue[0][1] > best[pair]:
+                queue.clear()
+            if queue:
+                profile, _ = queue.pop(0)
+                jobs.append((pair[0], pair[1], profile))
+        if not jobs:
+            break
+        fetched = fetch(jobs)
+        for origin, destination, profile in jobs:
+            minutes = fetched.get((origin, destination, profile))
+            results[(origin, destination, profile)] = minutes
+            if minutes:
+                best[(origin, destination)] = min(best[(origin, destination)], minutes)
+    return results
+
+
+def travel_score(total_penalty):
+    """Travel component of the location score from the frequency-weighted travel time"""
+    return max(0, (MAX_ACCEPTABLE_TRAVEL_MINUTES - total_penalty) / MAX_ACCEPTABLE_TRAVEL_MINUTES) * TRAVEL_SCORE_WEIGHT
+
+
+def trip_penalty(weight, minutes):
+    """Weighted minutes one trip adds to the travel penalty.
+
+    A trip that could not be routed (minutes is None) costs the maximum,
+    MAX_ACCEPTABLE_TRAVEL_MINUTES, so a failed lookup never scores better than
+    the upper bound the shortlist was pruned with."""
+    return weight * (MAX_ACCEPTABLE_TRAVEL_MINUTES if minutes is None else minutes)
+
+
+def travel_score_upper_bounds(lats, lons, destinations):
+    """Best travel score each point could still get.
+
+    destinations is a list of (lat, lon, weight, mode) with weights summing to
+    at most 1, matching how analyze_location weights trips by frequency."""
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    penalty = np.zeros(len(lats))
+    for dest_lat, dest_lon, weight, mode in destinations:
+        penalty += weight * min_travel_minutes(lats, lons, dest_lat, dest_lon, mode)
+    return np.maximum(0, (MAX_ACCEPTABLE_TRAVEL_MINUTES - penalty) / MAX_ACCEPTABLE_TRAVEL_MINUTES) * TRAVEL_SCORE_WEIGHT
+
+
+def shortlist_by_upper_bound(upper_bounds, evaluate, top_n, tolerance=0.0, batch_size=1):
+    """Evaluate candidates best-bound first until none left can reach the top_n.
+
+    evaluate(indices) returns the exact scores of those candidates (never
+    above their bounds); it gets up to batch_size candidates at a time so
+    their routing calls can run concurrently. Stops once the next bound is
+    below the current top_n-th exact score minus tolerance. Returns the
+    evaluated indices in evaluation order."""
+    order = [int(i) for i in np.argsort(-np.asarray(upper_bounds, dtype=float), kind="stable")]
+    evaluated = []
+    best = []
+    position = 0
+    while position < len(order):
+        threshold = best[top_n - 1] - tolerance if len(best) >= top_n else -np.inf
+        batch = []
+        while (position < len(order) and len(batch) < batch_size and
+               upper_bounds[order[position]] >= threshold):
+            batch.append(order[position])
+            position += 1
+        if not batch:
+            break
+        scores = evaluate(batch)
+        evaluated += batch
+        best = sorted(best + list(scores), reverse=True)[:top_n]
+    return evaluated
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Maximum in-flight requests per routing service
+SERVICE_CONCURRENCY = {
+    "ors": int(os.environ.get("ORS_MAX_CONCURRENCY", "8")),
+    "otp": int(os.environ.get("OTP_MAX_CONCURRENCY", "4")),
+}
+
+
+def profile_service(profile):
+    """Routing service that answers a travel profile"""
+    return "otp" if profile == "bus-transit" else "ors"
+
+
+class TravelTimeExecutor:
+    """Runs batches of (origin, destination, profile) travel-time jobs concurrently.
+
+    Each service gets its own thread pool sized to its concurrency limit, so
+    a slow OTP can't starve ORS and neither server sees more than its share
+    of parallel requests. fetchers maps a service name to
+    fn(origin, destination, profile) -> minutes or None.
+
+    Services in matrix_fetchers answer all of a profile's jobs with one
+    fn(origins, destinations, profile) -> {(origin, destination): minutes}
+    call, origins[i] -> destinations[i] being the jobs' pairs; pairs it
+    can't answer fall back to the per-pair fetcher.
+
+    With a store, jobs it already holds are answered without any request
+    and fetched durations are written back to it, except for services that
+    should_store(service) declines (e.g. fallback estimates) before or after
+    the fetch. Jobs for a service that is_available(service) reports down
+    resolve to None straight away."""
+
+    def __init__(self, fetchers, concurrency=SERVICE_CONCURRENCY, matrix_fetchers=None,
+                 store=None, departure=None, is_available=None, should_store=None):
+        self.fetchers = fetchers
+        self.concurrency = concurrency
+        self.matrix_fetchers = matrix_fetchers or {}
+        self.store = store
+        self.departure = departure
+        self.is_available = is_available
+        self.should_store = should_store
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, service):
+        with self._lock:
+            if service not in self._pools:
+                self._pools[service] = ThreadPoolExecutor(
+                    max_workers=max(1, self.concurrency.get(service, 4)),
+                    thread_name_prefix=f"travel-{service}"
+                )
+            return self._pools[service]
+
+    def _fetch(self, service, origin, destination, profile):
+        try:
+            return self.fetchers[service](origin, destination, profile)
+        except Exception as e:
+            print(f"Error fetching {profile} travel time: {str(e)}")
+            return None
+
+    def _fetch_matrix(self, service, origins, destinations, profile):
+        try:
+            return self.matrix_fetchers[service](origins, destinations, profile)
+        except Exception as e:
+            print(f"⚠️ {profile} matrix request failed, falling back to single routes: {str(e)}")
+            return {}
+
+    def _storable(self, service):
+        return self.store is not None and (self.should_store is None or self.should_store(service))
+
+    def run(self, jobs):
+        """Return {(origin, destination, profile): minutes or None} for every distinct job"""
+        started = time.time()
+        jobs = list(dict.fromkeys(jobs))
+        stored = self.store.get_many(jobs, self.departure) if self.store is not None else {}
+        jobs = [job for job in jobs if job not in stored]
+        down = set()
+        if self.is_available is not None:
+            down = {job for job in jobs if not self.is_available(profile_service(job[2]))}
+            jobs = [job for job in jobs if job not in down]
+        storable = {service: self._storable(service) for service in {profile_service(job[2]) for job in jobs}}
+
+        # One matrix request per profile for services that support it
+        matrix_futures = {}
+        for profile in dict.fromkeys(profile for _, _, profile in jobs):
+            service = profile_service(profile)
+            if service in self.matrix_fetchers:
+                origins = [o for o, _, p in jobs if p == profile]
+                destinations = [d for _, d, p in jobs if p == profile]
+                matrix_futures[profile] = self._pool(service).submit(
+                    self._fetch_matrix, service, origins, destinations, profile
+                )
+
+        matrices = {profile: future.result() for profile, future in matrix_futures.items()}
+        results = {}
+        futures = {}
+        for key in jobs:
+            origin, destination, profile = key
+            matrix = matrices.get(profile, {})
+            if (origin, destination) in matrix:
+                # None means the matrix found no route; don't ask again pair by pair
+                results[key] = matrix[(origin, destination)]
+            else:
+                service = profile_service(profile)
+                futures[key] = self._pool(service).submit(self._fetch, service, origin, destination, profile)
+
+        results.update({key: future.result() for key, future in futures.items()})
+        if self.store is not None:
+            # Checked again in case the service switched engines while fetching
+            storable = {service: ok and self._storable(service) for service, ok in storable.items()}
+            self.store.put_many({job: minutes for job, minutes in results.items()
+                                 if storable[profile_service(job[2])]}, self.departure)
+        if results or stored:
+            print(f"⏱️ Fetched {len(results)} travel times in {time.time() - started:.2f}s "
+                  f"({len(stored)} stored, {len(matrices)} matrix profiles, {len(futures)} single routes)")
+        if down:
+            print(f"⚠️ Skipped {len(down)} travel times for unavailable services")
+        results.update(stored)
+        results.update({job: None for job in down})
+        return results
@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from projection import to_bng
+
+TRAVEL_TIME_DB = os.environ.get(
+    "TRAVEL_TIME_DB", str(Path(__file__).parent / "cache" / "travel_times.sqlite")
+)
+TRAVEL_TIME_TTL_HOURS = float(os.environ.get("TRAVEL_TIME_TTL_HOURS", "168"))
+# Origins/destinations within the same grid cell share routing results
+TRAVEL_TIME_SNAP_METRES = float(os.environ.get("TRAVEL_TIME_SNAP_METRES", "50"))
+TRAVEL_TIME_BUCKET_MINUTES = int(os.environ.get("TRAVEL_TIME_BUCKET_MINUTES", "60"))
+# Expired rows are deleted on startup and then at most this often, on write
+TRAVEL_TIME_PURGE_INTERVAL_HOURS = float(os.environ.get("TRAVEL_TIME_PURGE_INTERVAL_HOURS", "1"))
+# Keys per SELECT; 6 parameters each stays under SQLite's default 999 limit
+LOOKUP_BATCH_SIZE = 150
+
+# Only timetabled profiles depend on the departure time
+TIME_DEPENDENT_PROFILES = {"bus-transit"}
+
+
+class TravelTimeStore:
+    """Routing durations in SQLite, shared by every worker process and kept across restarts.
+
+    Keys are origin and destination snapped to a snap_metres British National
+    Grid cell, the routing profile and, for timetabled profiles, the departure
+    time floored to bucket_minutes. Entries expire after ttl_hours and are
+    purged on startup and every purge_interval_hours. Only found routes are
+    stored, so failed lookups are retried."""
+
+    def __init__(self, db_path=TRAVEL_TIME_DB, ttl_hours=TRAVEL_TIME_TTL_HOURS,
+                 snap_metres=TRAVEL_TIME_SNAP_METRES, bucket_minutes=TRAVEL_TIME_BUCKET_MINUTES,
+                 purge_interval_hours=TRAVEL_TIME_PURGE_INTERVAL_HOURS):
+        self.db_path = str(db_path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.snap_metres = snap_metres
+        self.bucket_minutes = bucket_minutes
+        self.purge_interval_seconds = purge_interval_hours * 3600
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "purged": 0, "errors": 0}
+        self._lock = threading.Lock()
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        with self._conn:
+            # WAL lets other gunicorn workers read while one writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS travel_times ("
+                "origin_x INTEGER, origin_y INTEGER, dest_x INTEGER, dest_y INTEGER, "
+                "profile TEXT, bucket TEXT, minutes REAL NOT NULL, fetched_at REAL NOT NULL, "
+                "PRIMARY KEY (origin_x, origin_y, dest_x, dest_y, profile, bucket))"
+            )
+        self._last_purge = 0.0
+        self.purge_expired()
+
+    def departure_bucket(self, profile, departure=None):
+        """Departure time floored to the bucket size, or '' if the profile ignores it"""
+        if profile not in TIME_DEPENDENT_PROFILES or not departure:
+            return ""
+        dt = datetime.fromisoformat(departure)
+        minutes = (dt.hour * 60 + dt.minute) // self.bucket_minutes * self.bucket_minutes
+        return dt.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0).isoformat()
+
+    def keys(self, jobs, departure=None):
+        """Snapped store key for each (origin, destination, profile) job, origins as (lat, lon)"""
+        if not jobs:
+            return []
+        lats = np.array([[job[0][0], job[1][0]] for job in jobs], dtype=float)
+        lons = np.array([[job[0][1], job[1][1]] for job in jobs], dtype=float)
+        x, y = to_bng(lons, lats)
+        cells_x = np.floor(np.asarray(x) / self.snap_metres).astype(np.int64)
+        cells_y = np.floor(np.asarray(y) / self.snap_metres).astype(np.int64)
+        return [
+            (int(cells_x[i, 0]), int(cells_y[i, 0]), int(cells_x[i, 1]), int(cells_y[i, 1]),
+             profile, self.departure_bucket(profile, departure))
+            for i, (_, _, profile) in enumerate(jobs)
+        ]
+
+    def get_many(self, jobs, departure=None):
+        """{job: minutes} for the (origin, destination, profile) jobs with a fresh entry"""
+        jobs = list(dict.fromkeys(jobs))
+        found = {}
+        try:
+            keys = self.keys(jobs, departure)
+            distinct = list(dict.fromkeys(keys))
+            cutoff = time.time() - self.ttl_seconds
+            stored = {}
+            with self._lock:
+                for start in range(0, len(distinct), LOOKUP_BATCH_SIZE):
+                    batch = distinct[start:start + LOOKUP_BATCH_SIZE]
+                    rows = self._conn.execute(
+                        "SELECT origin_x, origin_y, dest_x, dest_y, profile, bucket, minutes FROM travel_times "
+                        "WHERE (origin_x, origin_y, dest_x, dest_y, profile, bucket) IN "
+                        f"(VALUES {', '.join(['(?, ?, ?, ?, ?, ?)'] * len(batch))}) AND fetched_at >= ?",
+                        [value for key in batch for value in key] + [cutoff]
+                    ).fetchall()
+                    stored.update({tuple(row[:6]): row[6] for row in rows})
+            found = {job: stored[key] for job, key in zip(jobs, keys) if key in stored}
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"⚠️ Travel time store read failed: {e}")
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(jobs) - len(found)
+        return found
+
+    def put_many(self, results, departure=None):
+        """Store {(origin, destination, profile): minutes}; None durations are skipped"""
+        results = {job: minutes for job, minutes in results.items() if minutes is not None}
+        if not results:
+            return
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO travel_times VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(*key, float(minutes), now)
+                     for key, minutes in zip(self.keys(list(results), departure), results.values())]
+                )
+            self.stats["writes"] += len(results)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"⚠️ Travel time store write failed: {e}")
+        if now - self._last_purge >= self.purge_interval_seconds:
+            self.purge_expired()
+
+    def get(self, origin, destination, profile, departure=None):
+        return self.get_many([(origin, destination, profile)], departure).get((origin, destination, profile))
+
+    def put(self, origin, destination, profile, minutes, departure=None):
+        self.put_many({(origin, destination, profile): minutes}, departure)
+
+    def purge_expired(self):
+        """Delete expired entries; returns how many were removed"""
+        self._last_purge = time.time()
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    "DELETE FROM travel_times WHERE fetched_at < ?", (self._last_purge - self.ttl_seconds,)
+                )
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"⚠️ Travel time store purge failed: {e}")
+            return 0
+        self.stats["purged"] += cursor.rowcount
+        return cursor.rowcount
+
+    def status(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "db_path": self.db_path,
+            "snap_metres": self.snap_metres,
+            "bucket_minutes": self.bucket_minutes,
+            "ttl_hours": self.ttl_seconds / 3600,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0,
+            **self.stats
+        }